@@ -7,6 +7,7 @@ import { ArrowRight } from 'lucide-react';
 import { Card, CardContent, CardFooter, CardHeader } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { useNavigate } from 'react-router-dom';
+import { getEventPath } from '@/services/eventService';
 
 interface EventCardProps {
   event: SecurityEvent;
@@ -52,7 +53,7 @@ const EventCard = ({ event }: EventCardProps) => {
         <Button 
           variant="ghost" 
           size="sm" 
-          onClick={() => navigate(`/event/${event.id}`)}
+          onClick={() => navigate(getEventPath(event))}
         >
           View Details
         </Button>
@@ -7,6 +7,7 @@ import {
   TableHeader,
   TableRow,
 } from '@/components/ui/table';
+import { Button } from '@/components/ui/button';
 import { SecurityEvent } from '@/types';
 import EventsTableLoading from './events/EventsTableLoading';
 import EventsTableEmpty from './events/EventsTableEmpty';
@@ -21,6 +22,10 @@ interface EventsTableProps {
   approvingIds?: Set<string>;
   rejectingIds?: Set<string>;
   isAdmin?: boolean;
+  // Set when the API has more pages; the table then offers to load the next one
+  onLoadMore?: () => void;
+  hasMore?: boolean;
+  isLoadingMore?: boolean;
 }
 
 const EventsTable = ({
@@ -31,7 +36,10 @@ const EventsTable = ({
   onReject,
   approvingIds = new Set(),
   rejectingIds = new Set(),
-  isAdmin = false
+  isAdmin = false,
+  onLoadMore,
+  hasMore = false,
+  isLoadingMore = false
 }: EventsTableProps) => {
   if (isLoading) {
     return <EventsTableLoading />;
@@ -42,33 +50,42 @@ const EventsTable = ({
   }
 
   return (
-    <div className="rounded-md border">
-      <Table>
-        <TableHeader>
-          <TableRow>
-            <TableHead>Time</TableHead>
-            {showClient && <TableHead>Client</TableHead>}
-            <TableHead>Event Source</TableHead>
-            <TableHead>Severity</TableHead>
-            <TableHead>Status</TableHead>
-            <TableHead></TableHead>
-          </TableRow>
-        </TableHeader>
-        <TableBody>
-          {events.map((event) => (
-            <EventTableRow
-              key={event.id}
-              event={event}
-              showClient={showClient}
-              onApprove={onApprove}
-              onReject={onReject}
-              approvingIds={approvingIds}
-              rejectingIds={rejectingIds}
-              isAdmin={isAdmin}
-            />
-          ))}
-        </TableBody>
-      </Table>
+    <div className="space-y-4">
+      <div className="rounded-md border">
+        <Table>
+          <TableHeader>
+            <TableRow>
+              <TableHead>Time</TableHead>
+              {showClient && <TableHead>Client</TableHead>}
+              <TableHead>Event Source</TableHead>
+              <TableHead>Severity</TableHead>
+              <TableHead>Status</TableHead>
+              <TableHead></TableHead>
+            </TableRow>
+          </TableHeader>
+          <TableBody>
+            {events.map((event) => (
+              <EventTableRow
+                key={event.id}
+                event={event}
+                showClient={showClient}
+                onApprove={onApprove}
+                onReject={onReject}
+                approvingIds={approvingIds}
+                rejectingIds={rejectingIds}
+                isAdmin={isAdmin}
+              />
+            ))}
+          </TableBody>
+        </Table>
+      </div>
+      {onLoadMore && hasMore && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={onLoadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? 'Loading...' : 'Load more'}
+          </Button>
+        </div>
+      )}
     </div>
   );
 };
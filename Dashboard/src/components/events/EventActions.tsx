@@ -3,6 +3,7 @@ import React from 'react';
 import { Button } from '@/components/ui/button';
 import { SecurityEvent } from '@/types';
 import { useNavigate } from 'react-router-dom';
+import { getEventPath } from '@/services/eventService';
 import GuardDutyLink from './GuardDutyLink';
 import { toast } from 'sonner';
 import { API_KEY, GUARDDUTY_API_ENDPOINT } from '@/services/apiConfig';
@@ -120,7 +121,7 @@ const EventActions = ({
       <Button
         size="sm"
         variant="outline"
-        onClick={() => navigate(`/event/${event.id}`)}
+        onClick={() => navigate(getEventPath(event))}
       >
         Details
       </Button>
@@ -24,7 +24,7 @@ const GuardDutyLink = ({ event }: GuardDutyLinkProps) => {
       // Show loading toast
       toast.loading("Fetching GuardDuty finding details...");
       
-      // Fetch the detailed finding with the direct URL format
+      // Fetch the full, unprojected finding with the direct URL format
       const response = await fetch(getDetailedFindingUrl(eventKey), {
         method: 'GET',
         headers: {
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { useParams, useNavigate } from 'react-router-dom';
+import { useParams, useNavigate, useSearchParams } from 'react-router-dom';
 import { useAuth } from '@/contexts/AuthContext';
 import { getEventById, approveRemediation } from '@/services/securityService';
 import { SecurityEvent } from '@/types';
@@ -14,10 +14,12 @@ import { API_KEY, getDetailedFindingUrl } from '@/services/apiConfig';
 
 const EventDetailsPage = () => {
   const { eventId } = useParams<{ eventId: string }>();
+  const [searchParams] = useSearchParams();
   const navigate = useNavigate();
   const { user } = useAuth();
   const [event, setEvent] = useState<SecurityEvent | null>(null);
-  const [findingDetails, setFindingDetails] = useState<any>(null);
+  // The full, unprojected finding, once "View in GuardDuty" has fetched it
+  const [rawFinding, setRawFinding] = useState<any>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [isApproving, setIsApproving] = useState(false);
   
@@ -26,56 +28,11 @@ const EventDetailsPage = () => {
       if (!eventId) return;
       
       try {
-        const eventData = await getEventById(eventId);
+        // The finding key in the link lets the page read just this finding, in its summary projection
+        const eventData = await getEventById(eventId, searchParams.get('key') ?? undefined);
         
         if (eventData) {
           setEvent(eventData);
-          
-          // Fetch detailed finding data if metadata key exists
-          if (eventData.metadata?.key) {
-            try {
-              const response = await fetch(getDetailedFindingUrl(eventData.metadata.key), {
-                method: 'GET',
-                headers: {
-                  'x-api-key': API_KEY
-                }
-              });
-              if (response.ok) {
-                const finding = await response.json();
-                setFindingDetails(finding);
-                
-                // Update the event with more detailed information from the finding
-                if (finding) {
-                  setEvent(prev => prev ? {
-                    ...prev,
-                    eventType: finding.Types?.[0] || prev.eventType,
-                    description: finding.Description || prev.description,
-                    // Extract source and destination IPs from the finding
-                    sourceIp: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.IpAddressV4 || prev.sourceIp,
-                    destinationIp: finding.Resources?.[0]?.Details?.AwsEc2Instance?.IpV4Addresses?.[0] || prev.destinationIp,
-                    // Extract remediation status
-                    remediated: finding.remediationStatus?.remediated || prev.remediated,
-                    remediationTimestamp: finding.remediationStatus?.remediationTimestamp || prev.remediationTimestamp,
-                    remediationDetails: finding.remediationStatus?.remediationAction || prev.remediationDetails,
-                    // Add additional finding details
-                    severity: finding.Severity?.Label?.toLowerCase() || prev.severity,
-                    firstObserved: finding.FirstObservedAt || prev.firstObserved,
-                    lastObserved: finding.LastObservedAt || prev.lastObserved,
-                    updatedAt: finding.UpdatedAt || prev.updatedAt,
-                    // Add source location information
-                    sourceLocation: {
-                      country: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.Country?.CountryName,
-                      city: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.City?.CityName
-                    },
-                    // Add protocol information
-                    protocol: finding.Action?.NetworkConnectionAction?.Protocol
-                  } : prev);
-                }
-              }
-            } catch (error) {
-              console.error('Error fetching detailed finding:', error);
-            }
-          }
         } else {
           toast.error('Event not found');
           navigate(-1);
@@ -89,14 +46,14 @@ const EventDetailsPage = () => {
     };
     
     fetchEvent();
-  }, [eventId, navigate]);
+  }, [eventId, searchParams, navigate]);
   
   const handleApprove = async () => {
     if (!event) return;
     
     setIsApproving(true);
     try {
-      const updatedEvent = await approveRemediation(event.id);
+      const updatedEvent = await approveRemediation(event);
       setEvent(updatedEvent);
       toast.success('Remediation approved successfully');
     } catch (error) {
@@ -121,17 +78,18 @@ const EventDetailsPage = () => {
       // Show loading toast
       toast.loading("Fetching GuardDuty finding details...");
       
-      // If we already have the finding details, just display them
-      if (findingDetails) {
+      // If we already fetched the full finding, just display it
+      if (rawFinding) {
         toast.dismiss();
-        const jsonBlob = new Blob([JSON.stringify(findingDetails, null, 2)], {type: 'application/json'});
+        const jsonBlob = new Blob([JSON.stringify(rawFinding, null, 2)], {type: 'application/json'});
         const blobUrl = URL.createObjectURL(jsonBlob);
         window.open(blobUrl, '_blank');
         setTimeout(() => URL.revokeObjectURL(blobUrl), 100);
         return;
       }
       
-      // Otherwise fetch the detailed finding
+      // Otherwise fetch the full finding; the summary the page was filled from lacks
+      // ProductFields, resource details and the rest of the raw finding
       const response = await fetch(getDetailedFindingUrl(event.metadata.key), {
         method: 'GET',
         headers: {
@@ -145,7 +103,7 @@ const EventDetailsPage = () => {
       
       // Get the detailed finding data
       const finding = await response.json();
-      setFindingDetails(finding);
+      setRawFinding(finding);
       
       // Update the event type and description with the type field from the finding
       if (finding.type && event) {
@@ -1,7 +1,7 @@
 
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getClientEvents, getClient, approveRemediation } from '@/services/securityService';
+import { getClientEventsPage, getClient, approveRemediation } from '@/services/securityService';
 import { SecurityEvent, Client } from '@/types';
 import { Button } from '@/components/ui/button';
 import EventsTable from '@/components/EventsTable';
@@ -14,6 +14,8 @@ const AdminClientEventsPage = () => {
   const [client, setClient] = useState<Client | null>(null);
   const [events, setEvents] = useState<SecurityEvent[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [approvingIds, setApprovingIds] = useState<Set<string>>(new Set());
   
   useEffect(() => {
@@ -21,9 +23,9 @@ const AdminClientEventsPage = () => {
       if (!clientId) return;
       
       try {
-        const [clientData, eventsData] = await Promise.all([
+        const [clientData, eventsPage] = await Promise.all([
           getClient(clientId),
-          getClientEvents(clientId)
+          getClientEventsPage(clientId)
         ]);
         
         if (clientData) {
@@ -33,7 +35,8 @@ const AdminClientEventsPage = () => {
           navigate('/admin/clients');
         }
         
-        setEvents(eventsData);
+        setEvents(eventsPage.events);
+        setNextCursor(eventsPage.nextCursor);
       } catch (error) {
         console.error('Error fetching client data:', error);
         toast.error('Error loading client data');
@@ -45,11 +48,29 @@ const AdminClientEventsPage = () => {
     fetchData();
   }, [clientId, navigate]);
   
+  const loadMore = async () => {
+    if (!clientId) return;
+    
+    setIsLoadingMore(true);
+    try {
+      const page = await getClientEventsPage(clientId, { cursor: nextCursor });
+      setEvents(prev => [...prev, ...page.events]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching client events:', error);
+      toast.error('Failed to load more events');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+  
   const handleApprove = async (eventId: string) => {
+    const event = events.find(e => e.id === eventId);
+    if (!event) return;
     setApprovingIds(prev => new Set(prev).add(eventId));
     
     try {
-      const updatedEvent = await approveRemediation(eventId);
+      const updatedEvent = await approveRemediation(event);
       
       // Update the events list with the updated event
       setEvents(prev => 
@@ -110,6 +131,9 @@ const AdminClientEventsPage = () => {
         onApprove={handleApprove}
         approvingIds={approvingIds}
         isAdmin={true}
+        onLoadMore={loadMore}
+        hasMore={nextCursor !== null}
+        isLoadingMore={isLoadingMore}
       />
     </div>
   );
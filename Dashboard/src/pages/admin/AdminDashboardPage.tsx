@@ -1,6 +1,6 @@
 
 import { useState, useEffect } from 'react';
-import { getAllEvents, getAllClients } from '@/services/securityService';
+import { getDashboardStats, getPendingApprovalEvents, getAllClients, DashboardStats } from '@/services/securityService';
 import { SecurityEvent, Client } from '@/types';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import SeverityDonutChart from '@/components/SeverityDonutChart';
@@ -9,18 +9,23 @@ import EventCard from '@/components/EventCard';
 import { format } from 'date-fns';
 
 const AdminDashboardPage = () => {
-  const [events, setEvents] = useState<SecurityEvent[]>([]);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
+  const [pendingEvents, setPendingEvents] = useState<SecurityEvent[]>([]);
   const [clients, setClients] = useState<Client[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [eventsData, clientsData] = await Promise.all([
-          getAllEvents(),
+        // Counts come pre-aggregated from /findings/stats; only the 3 newest
+        // critical/high events pending approval are listed
+        const [statsData, pendingData, clientsData] = await Promise.all([
+          getDashboardStats(),
+          getPendingApprovalEvents(3),
           getAllClients()
         ]);
-        setEvents(eventsData);
+        setStats(statsData);
+        setPendingEvents(pendingData);
         setClients(clientsData);
       } catch (error) {
         console.error('Error fetching data:', error);
@@ -32,26 +37,11 @@ const AdminDashboardPage = () => {
     fetchData();
   }, []);
   
-  // Calculate summary statistics
-  const totalEvents = events.length;
-  const remediatedEvents = events.filter(e => e.remediated).length;
-  const pendingApprovalEvents = events.filter(
-    e => (e.severity === 'critical' || e.severity === 'high') && !e.remediated
-  ).length;
-  
-  // Count by severity
-  const severityCounts = events.reduce(
-    (acc, event) => {
-      acc[event.severity]++;
-      return acc;
-    }, 
-    { critical: 0, high: 0, medium: 0, low: 0 }
-  );
-  
-  // Recent critical/high events requiring approval (last 3)
-  const pendingEvents = events
-    .filter(e => (e.severity === 'critical' || e.severity === 'high') && !e.remediated)
-    .slice(0, 3);
+  // Summary statistics
+  const totalEvents = stats?.total ?? 0;
+  const remediatedEvents = stats?.remediated ?? 0;
+  const pendingApprovalEvents = stats?.pendingApproval ?? 0;
+  const severityCounts = stats?.severityCounts ?? { critical: 0, high: 0, medium: 0, low: 0 };
   
   if (isLoading) {
     return (
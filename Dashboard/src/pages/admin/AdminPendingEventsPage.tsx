@@ -1,12 +1,17 @@
 import { useState, useEffect } from 'react';
-import { getAllEvents, approveRemediation, rejectRemediation } from '@/services/securityService';
+import { getEventsPage, approveRemediation, rejectRemediation } from '@/services/securityService';
 import { SecurityEvent } from '@/types';
 import EventsTable from '@/components/EventsTable';
 import { toast } from 'sonner';
 
+// Critical and high severity events not remediated yet, filtered by the API
+const PENDING_FILTER = { severity: ['critical', 'high'], remediated: false };
+
 const AdminPendingEventsPage = () => {
   const [events, setEvents] = useState<SecurityEvent[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [approvingIds, setApprovingIds] = useState<Set<string>>(new Set());
   const [rejectingIds, setRejectingIds] = useState<Set<string>>(new Set());
@@ -16,17 +21,9 @@ const AdminPendingEventsPage = () => {
       try {
         setIsLoading(true);
         setError(null);
-        const allEvents = await getAllEvents();
-        
-        // Filter for critical and high severity events that need approval
-        const pendingEvents = allEvents.filter(
-          event => 
-            (event.severity === 'critical' || event.severity === 'high') && 
-            !event.remediated && 
-            !event.remediationApproved
-        );
-        
-        setEvents(pendingEvents);
+        const page = await getEventsPage(PENDING_FILTER);
+        setEvents(page.events);
+        setNextCursor(page.nextCursor);
       } catch (error) {
         console.error('Error fetching events:', error);
         setError('Failed to load events. Please try again later.');
@@ -39,12 +36,28 @@ const AdminPendingEventsPage = () => {
     fetchEvents();
   }, []);
   
+  const loadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      const page = await getEventsPage({ ...PENDING_FILTER, cursor: nextCursor });
+      setEvents(prev => [...prev, ...page.events]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching events:', error);
+      toast.error('Failed to load more events');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+  
   const handleApprove = async (eventId: string) => {
+    const event = events.find(e => e.id === eventId);
+    if (!event) return;
     setApprovingIds(prev => new Set(prev).add(eventId));
     
     try {
       // Approve remediation and get updated event
-      const updatedEvent = await approveRemediation(eventId);
+      const updatedEvent = await approveRemediation(event);
       
       // Update the event in the list with the new data
       setEvents(prev => prev.map(event => 
@@ -71,11 +84,13 @@ const AdminPendingEventsPage = () => {
   };
   
   const handleReject = async (eventId: string) => {
+    const event = events.find(e => e.id === eventId);
+    if (!event) return;
     setRejectingIds(prev => new Set(prev).add(eventId));
     
     try {
       // Reject remediation and get updated event
-      const updatedEvent = await rejectRemediation(eventId);
+      const updatedEvent = await rejectRemediation(event);
       
       // Update the event in the list with the new data
       setEvents(prev => prev.map(event => 
@@ -127,6 +142,9 @@ const AdminPendingEventsPage = () => {
         approvingIds={approvingIds}
         rejectingIds={rejectingIds}
         isAdmin={true}
+        onLoadMore={loadMore}
+        hasMore={nextCursor !== null}
+        isLoadingMore={isLoadingMore}
       />
       
       {!isLoading && !error && events.length === 0 && (
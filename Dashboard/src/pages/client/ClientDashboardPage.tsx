@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
-import { getClientEvents } from '@/services/eventService';
-import { generateClientReport } from '@/services/securityService';
+import { getRecentClientEvents } from '@/services/eventService';
+import { generateClientReport, getDashboardStats, DashboardStats } from '@/services/securityService';
 import { SecurityEvent } from '@/types';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import EventCard from '@/components/EventCard';
@@ -12,7 +12,8 @@ import { toast } from 'sonner';
 
 const ClientDashboardPage = () => {
   const { user } = useAuth();
-  const [events, setEvents] = useState<SecurityEvent[]>([]);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
+  const [recentEvents, setRecentEvents] = useState<SecurityEvent[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [isGeneratingReport, setIsGeneratingReport] = useState(false);
   const [sidebarOpen, setSidebarOpen] = useState(true);
@@ -24,11 +25,17 @@ const ClientDashboardPage = () => {
       try {
         setIsLoading(true);
         const accountId = user.username;
-        const data = await getClientEvents(accountId);
-        setEvents(data);
+        // Counts come pre-aggregated from /findings/stats; only the 5 newest events are listed
+        const [statsData, recentData] = await Promise.all([
+          getDashboardStats(accountId),
+          getRecentClientEvents(accountId, 5)
+        ]);
+        setStats(statsData);
+        setRecentEvents(recentData);
       } catch (error) {
         toast.error('Failed to load security events');
-        setEvents([]);
+        setStats(null);
+        setRecentEvents([]);
       } finally {
         setIsLoading(false);
       }
@@ -55,29 +62,11 @@ const ClientDashboardPage = () => {
     }
   };
   
-  // Sort events by timestamp descending (most recent first)
-  const sortedEvents = [...events].sort((a, b) =>
-    (b.timestamp && a.timestamp)
-      ? new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime()
-      : 0
-  );
-  
-  // Calculate summary statistics
-  const totalEvents = events.length;
-  const remediatedEvents = events.filter(e => e.remediated).length;
-  const pendingEvents = events.filter(e => !e.remediated).length;
-  
-  // Count by severity
-  const severityCounts = events.reduce(
-    (acc, event) => {
-      acc[event.severity]++;
-      return acc;
-    }, 
-    { critical: 0, high: 0, medium: 0, low: 0 }
-  );
-  
-  // Recent events (last 5, most recent first)
-  const recentEvents = sortedEvents.slice(0, 5);
+  // Summary statistics
+  const totalEvents = stats?.total ?? 0;
+  const remediatedEvents = stats?.remediated ?? 0;
+  const pendingEvents = stats?.pending ?? 0;
+  const severityCounts = stats?.severityCounts ?? { critical: 0, high: 0, medium: 0, low: 0 };
   
   if (isLoading) {
     return (
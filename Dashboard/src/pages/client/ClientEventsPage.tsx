@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
-import { getClientEvents } from '@/services/eventService';
+import { getClientEventsPage } from '@/services/eventService';
+import { FindingsPageOptions } from '@/services/apiConfig';
 import { SecurityEvent } from '@/types';
 import EventsTable from '@/components/EventsTable';
 import { Input } from '@/components/ui/input';
@@ -15,21 +16,56 @@ import {
 import { Search } from 'lucide-react';
 import { toast } from 'sonner';
 
+// Stored severity categories behind each severity level shown in the dashboard
+const SEVERITY_CATEGORIES: Record<string, string[]> = {
+  critical: ['critical'],
+  high: ['high'],
+  medium: ['medium'],
+  low: ['low', 'informational', 'unknown']
+};
+
+// The API filters on severity and remediation state; returns null when no event can match
+const pageFilter = (severityFilter: string, statusFilter: string): FindingsPageOptions | null => {
+  let severity = severityFilter === 'all' ? undefined : SEVERITY_CATEGORIES[severityFilter];
+  if (statusFilter === 'pending') {
+    // Pending approval only applies to critical and high severity events
+    severity = (severity ?? ['critical', 'high']).filter(s => s === 'critical' || s === 'high');
+    if (!severity.length) {
+      return null;
+    }
+  }
+  const remediated = statusFilter === 'remediated'
+    ? true
+    : statusFilter === 'not-remediated' || statusFilter === 'pending' ? false : undefined;
+  return { severity, remediated };
+};
+
 const ClientEventsPage = () => {
   const { user } = useAuth();
   const [events, setEvents] = useState<SecurityEvent[]>([]);
   const [filteredEvents, setFilteredEvents] = useState<SecurityEvent[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   
   // Filters
   const [searchTerm, setSearchTerm] = useState('');
   const [severityFilter, setSeverityFilter] = useState<string>('all');
   const [statusFilter, setStatusFilter] = useState<string>('all');
   
+  // Severity and status changes fetch a new first page from the API
   useEffect(() => {
     const fetchEvents = async () => {
       if (!user) return;
       
+      const filter = pageFilter(severityFilter, statusFilter);
+      if (!filter) {
+        setEvents([]);
+        setNextCursor(null);
+        setIsLoading(false);
+        return;
+      }
+      
       try {
         setIsLoading(true);
         
@@ -37,77 +73,61 @@ const ClientEventsPage = () => {
         const accountId = user.username;
         console.log('Fetching findings for client:', accountId);
         
-        const data = await getClientEvents(accountId);
-        console.log('Findings data received:', data);
+        const page = await getClientEventsPage(accountId, filter);
+        console.log('Findings data received:', page);
         
-        if (Array.isArray(data)) {
-          setEvents(data);
-          setFilteredEvents(data);
-          toast.success(`Loaded ${data.length} security events`);
+        setEvents(page.events);
+        setNextCursor(page.nextCursor);
+        if (page.events.length) {
+          toast.success(`Loaded ${page.events.length} security events`);
         } else {
-          console.error('Unexpected data format:', data);
           toast.info('No security events found');
-          setEvents([]);
-          setFilteredEvents([]);
         }
       } catch (error) {
         console.error('Error fetching events:', error);
         toast.error('Failed to load security events');
         setEvents([]);
-        setFilteredEvents([]);
+        setNextCursor(null);
       } finally {
         setIsLoading(false);
       }
     };
     
     fetchEvents();
-  }, [user]);
+  }, [user, severityFilter, statusFilter]);
   
-  // Apply filters when they change
-  useEffect(() => {
-    if (!events.length) {
-      setFilteredEvents([]);
-      return;
-    }
-    
-    let filtered = [...events];
-    
-    // Apply search term
-    if (searchTerm) {
-      filtered = filtered.filter(
-        event => 
-          event.eventType?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          event.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          event.sourceIp?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          event.destinationIp?.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
+  const loadMore = async () => {
+    const filter = pageFilter(severityFilter, statusFilter);
+    if (!user || !filter) return;
     
-    // Apply severity filter
-    if (severityFilter !== 'all') {
-      filtered = filtered.filter(
-        event => event.severity === severityFilter
-      );
+    setIsLoadingMore(true);
+    try {
+      const page = await getClientEventsPage(user.username, { ...filter, cursor: nextCursor });
+      setEvents(prev => [...prev, ...page.events]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching events:', error);
+      toast.error('Failed to load more events');
+    } finally {
+      setIsLoadingMore(false);
     }
-    
-    // Apply status filter
-    if (statusFilter !== 'all') {
-      if (statusFilter === 'remediated') {
-        filtered = filtered.filter(event => event.remediated);
-      } else if (statusFilter === 'not-remediated') {
-        filtered = filtered.filter(event => !event.remediated);
-      } else if (statusFilter === 'pending') {
-        filtered = filtered.filter(
-          event => 
-            !event.remediated && 
-            (event.severity === 'critical' || event.severity === 'high') &&
-            !event.remediationApproved
-        );
-      }
+  };
+  
+  // The search box filters the events loaded so far
+  useEffect(() => {
+    if (!searchTerm) {
+      setFilteredEvents(events);
+      return;
     }
     
-    setFilteredEvents(filtered);
-  }, [events, searchTerm, severityFilter, statusFilter]);
+    setFilteredEvents(events.filter(
+      event => 
+        event.eventType?.toLowerCase().includes(searchTerm.toLowerCase()) ||
+        event.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
+        event.sourceIp?.toLowerCase().includes(searchTerm.toLowerCase()) ||
+        event.destinationIp?.toLowerCase().includes(searchTerm.toLowerCase())
+    ));
+  }, [events, searchTerm]);
   
   return (
     <div className="space-y-6">
@@ -179,6 +199,9 @@ const ClientEventsPage = () => {
       <EventsTable
         events={filteredEvents}
         isLoading={isLoading}
+        onLoadMore={loadMore}
+        hasMore={nextCursor !== null}
+        isLoadingMore={isLoadingMore}
       />
     </div>
   );
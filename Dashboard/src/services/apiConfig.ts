@@ -7,9 +7,11 @@ export const API_ENDPOINT = import.meta.env.VITE_API_ENDPOINT;
 // GuardDuty API endpoint (using the same base URL)
 export const GUARDDUTY_API_ENDPOINT = import.meta.env.VITE_GUARDDUTY_API_ENDPOINT;
 
-// Helper to get a specific finding by key - using the full path format
-export const getDetailedFindingUrl = (key: string) => {
-  return `${GUARDDUTY_API_ENDPOINT}/findings/${key}`;
+// Helper to get a specific finding by key - using the full path format.
+// Pass view 'summary' to fetch only the fields the detail views render.
+export const getDetailedFindingUrl = (key: string, view?: 'summary') => {
+  const url = `${GUARDDUTY_API_ENDPOINT}/findings/${key}`;
+  return view ? `${url}?view=${view}` : url;
 };
 
 // Type definition for the GuardDuty finding summary from the API
@@ -19,9 +21,101 @@ export interface GuardDutyFindingSummary {
   date: string;
   accountId: string;
   findingId: string;
+  type?: string | null;
   lastModified: string;
+  remediationStatus?: {
+    remediated?: boolean;
+    remediationTimestamp?: string;
+    remediationAction?: string;
+  };
+}
+
+// One page of findings returned when the list endpoints are called with limit/cursor
+export interface GuardDutyFindingPage {
+  findings: GuardDutyFindingSummary[];
+  nextCursor: string | null;
+  // Set when the API ran out of time; nextCursor continues where it stopped
+  partial?: boolean;
+}
+
+// Page size of the dashboard's lists; further pages are loaded on demand (the API caps it at 500)
+export const FINDINGS_PAGE_SIZE = 50;
+
+// Filters and paging for one request to the findings list endpoints
+export interface FindingsPageOptions {
+  accountId?: string;
+  severity?: string[];
+  remediated?: boolean;
+  limit?: number;
+  cursor?: string | null;
+}
+
+// Fetch one page of finding summaries, newest first. An account on its own is read from
+// /finding/{accountId}; with any other filter the account goes to /findings as a parameter.
+export const fetchFindingsPage = async (options: FindingsPageOptions = {}): Promise<GuardDutyFindingPage> => {
+  const { accountId, severity, remediated, limit = FINDINGS_PAGE_SIZE, cursor } = options;
+  const filtered = Boolean(severity?.length) || remediated !== undefined;
+  const endpoint = accountId && !filtered
+    ? `${GUARDDUTY_API_ENDPOINT}/finding/${encodeURIComponent(accountId)}`
+    : API_ENDPOINT;
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (accountId && filtered) {
+    params.set('accountId', accountId);
+  }
+  if (severity?.length) {
+    params.set('severity', severity.join(','));
+  }
+  if (remediated !== undefined) {
+    params.set('remediated', String(remediated));
+  }
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(`${endpoint}?${params.toString()}`, {
+    method: 'GET',
+    headers: {
+      'x-api-key': API_KEY
+    }
+  });
+  if (!response.ok) {
+    throw new Error('Failed to fetch events');
+  }
+  return await response.json() as GuardDutyFindingPage;
+};
+
+// Pre-aggregated finding counts from /findings/stats
+export interface FindingStats {
+  total: number;
+  bySeverity: Record<string, number>;
+  byDay: Record<string, number>;
+  byAccount: Record<string, number>;
+  byAccountSeverity: Record<string, Record<string, number>>;
+  remediation: {
+    remediated: number;
+    pending: number;
+    pendingBySeverity: Record<string, number>;
+  };
 }
 
+// Fetch the chart counts, for every account or only the given one
+export const fetchFindingStats = async (accountId?: string): Promise<FindingStats> => {
+  const params = new URLSearchParams();
+  if (accountId) {
+    params.set('accountId', accountId);
+  }
+  const query = params.toString();
+  const response = await fetch(`${GUARDDUTY_API_ENDPOINT}/findings/stats${query ? `?${query}` : ''}`, {
+    method: 'GET',
+    headers: {
+      'x-api-key': API_KEY
+    }
+  });
+  if (!response.ok) {
+    throw new Error('Failed to fetch finding stats');
+  }
+  return await response.json() as FindingStats;
+};
+
 // GuardDuty finding to SecurityEvent mapper
 export const mapGuardDutyFindingSummaryToSecurityEvent = (finding: GuardDutyFindingSummary) => {
   // Map severity from string to our severity levels
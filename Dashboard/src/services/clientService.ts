@@ -1,64 +1,21 @@
-
 import { Client } from '@/types';
-import {API_KEY, API_ENDPOINT, GuardDutyFindingSummary } from './apiConfig';
+import { fetchFindingStats, FindingStats } from './apiConfig';
+import { toSeverityCounts } from './statsService';
+
+const toClient = (accountId: string, stats: FindingStats): Client => ({
+  id: accountId,
+  name: `AWS Account ${accountId}`,
+  eventCount: {
+    ...toSeverityCounts(stats.byAccountSeverity[accountId] || {}),
+    total: stats.byAccount[accountId]
+  }
+});
 
 export const getAllClients = async (): Promise<Client[]> => {
   try {
-    // Fetch all GuardDuty findings
-    const response = await fetch(`${API_ENDPOINT}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      }
-    });
-    if (!response.ok) {
-      throw new Error('Failed to fetch clients');
-    }
-    const data = await response.json() as GuardDutyFindingSummary[];
-    
-    // Extract unique client IDs and generate client objects
-    const clientMap = new Map<string, Client>();
-    
-    data.forEach(finding => {
-      const accountId = finding.accountId;
-      
-      if (!clientMap.has(accountId)) {
-        // Initialize a new client
-        clientMap.set(accountId, {
-          id: accountId,
-          name: `AWS Account ${accountId}`,
-          eventCount: {
-            critical: 0,
-            high: 0, 
-            medium: 0,
-            low: 0,
-            total: 0
-          }
-        });
-      }
-      
-      // Update event counts
-      const client = clientMap.get(accountId)!;
-      client.eventCount.total += 1;
-      
-      // Update severity counts
-      switch(finding.severity.toLowerCase()) {
-        case 'critical':
-          client.eventCount.critical += 1;
-          break;
-        case 'high':
-          client.eventCount.high += 1;
-          break;
-        case 'medium':
-          client.eventCount.medium += 1;
-          break;
-        case 'low':
-          client.eventCount.low += 1;
-          break;
-      }
-    });
-    
-    return Array.from(clientMap.values());
+    // Every account with findings and its counts by severity, from the stats rollups
+    const stats = await fetchFindingStats();
+    return Object.keys(stats.byAccount).map(accountId => toClient(accountId, stats));
   } catch (error) {
     console.error('Error fetching clients:', error);
     throw error;
@@ -67,9 +24,9 @@ export const getAllClients = async (): Promise<Client[]> => {
 
 export const getClient = async (clientId: string): Promise<Client | undefined> => {
   try {
-    // Fetch all clients and find the specific one
-    const clients = await getAllClients();
-    return clients.find(client => client.id === clientId);
+    // Only the client's own counts
+    const stats = await fetchFindingStats(clientId);
+    return stats.byAccount[clientId] ? toClient(clientId, stats) : undefined;
   } catch (error) {
     console.error('Error fetching client:', error);
     throw error;
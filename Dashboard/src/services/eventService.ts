@@ -1,99 +1,125 @@
 import { SecurityEvent } from '@/types';
 import { 
   API_KEY,
-  API_ENDPOINT, 
-  GUARDDUTY_API_ENDPOINT, 
-  GuardDutyFindingSummary
+  GuardDutyFindingSummary,
+  FindingsPageOptions,
+  fetchFindingsPage,
+  getDetailedFindingUrl
 } from './apiConfig';
 
-export const getAllEvents = async (): Promise<SecurityEvent[]> => {
+// One page of events and the cursor for the next one (null on the last page)
+export interface SecurityEventPage {
+  events: SecurityEvent[];
+  nextCursor: string | null;
+}
+
+// Fetch one page of events matching the filters, newest first. Lists show the
+// first page and pass nextCursor back in to load more.
+export const getEventsPage = async (options: FindingsPageOptions = {}): Promise<SecurityEventPage> => {
   try {
-    const response = await fetch(`${API_ENDPOINT}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      }
-    });
-    if (!response.ok) {
-      throw new Error('Failed to fetch events');
-    }
-    const data = await response.json() as GuardDutyFindingSummary[];
-    // Map GuardDuty findings to our SecurityEvent format and include original key in metadata
-    return data.map(finding => {
-      const event = mapGuardDutyFindingSummaryToSecurityEvent(finding);
-      // Add metadata with the original key for detailed lookup
-      event.metadata = { key: finding.key };
-      return event;
-    });
+    const page = await fetchFindingsPage(options);
+    return {
+      events: page.findings.map(mapGuardDutyFindingSummaryToSecurityEvent),
+      nextCursor: page.nextCursor
+    };
   } catch (error) {
     console.error('Error fetching events:', error);
     throw error;
   }
 };
 
-export const getClientEvents = async (clientId: string): Promise<SecurityEvent[]> => {
+// The same for a single client, from the per-account endpoint
+export const getClientEventsPage = async (
+  clientId: string,
+  options: Omit<FindingsPageOptions, 'accountId'> = {}
+): Promise<SecurityEventPage> => {
   try {
-    // Fetch all events and filter for the specific client
-    const response = await fetch(`${API_ENDPOINT}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      }
-    });
-    if (!response.ok) {
-      throw new Error('Failed to fetch client events');
-    }
-    const data = await response.json() as GuardDutyFindingSummary[];
-    
-    // Filter by accountId (clientId) and map to SecurityEvents
-    const clientEvents = data
-      .filter(finding => finding.accountId === clientId)
-      .map(finding => {
-        const event = mapGuardDutyFindingSummaryToSecurityEvent(finding);
-        // Add metadata with the original key for detailed lookup
-        event.metadata = { key: finding.key };
-        return event;
-      });
-    
-    return clientEvents;
+    return await getEventsPage({ ...options, accountId: clientId });
   } catch (error) {
     console.error('Error fetching client events:', error);
     throw error;
   }
 };
 
-export const getEventById = async (eventId: string): Promise<SecurityEvent | undefined> => {
+// Route of an event's details page; the finding key lets it read just that finding
+export const getEventPath = (event: SecurityEvent) => {
+  const key = event.metadata?.key;
+  return key ? `/event/${event.id}?key=${encodeURIComponent(key)}` : `/event/${event.id}`;
+};
+
+// The newest critical and high severity events still awaiting remediation, filtered by the API
+export const getPendingApprovalEvents = async (limit: number): Promise<SecurityEvent[]> => {
+  const page = await getEventsPage({ severity: ['critical', 'high'], remediated: false, limit });
+  return page.events;
+};
+
+// A client's most recent events, newest first
+export const getRecentClientEvents = async (clientId: string, limit: number): Promise<SecurityEvent[]> => {
+  const page = await getClientEventsPage(clientId, { limit });
+  return page.events;
+};
+
+// Read one event through the /findings/{key} detail route (summary view).
+// Events are addressed by their stored key; without one there is nothing to look up.
+export const getEventById = async (eventId: string, key?: string): Promise<SecurityEvent | undefined> => {
+  if (!key) {
+    return undefined;
+  }
   try {
-    // Fetch all events and find the specific one
-    const response = await fetch(`${API_ENDPOINT}`, {
+    const response = await fetch(getDetailedFindingUrl(key, 'summary'), {
       method: 'GET',
       headers: {
         'x-api-key': API_KEY
       }
     });
-    if (!response.ok) {
-      throw new Error('Failed to fetch events');
-    }
-    const data = await response.json() as GuardDutyFindingSummary[];
-    
-    // Find the event with the matching ID
-    const finding = data.find(finding => finding.findingId === eventId);
-    
-    if (!finding) {
+    if (response.status === 404) {
       return undefined;
     }
-    
-    // Map to SecurityEvent format
-    const event = mapGuardDutyFindingSummaryToSecurityEvent(finding);
-    // Add metadata with the original key for detailed lookup
-    event.metadata = { key: finding.key };
-    return event;
+    if (!response.ok) {
+      throw new Error(`Error fetching finding: ${response.statusText}`);
+    }
+    const finding = await response.json();
+    return mapFindingDetailToSecurityEvent(eventId, key, finding);
   } catch (error) {
     console.error('Error fetching event:', error);
     throw error;
   }
 };
 
+// Map a finding from the detail route to a SecurityEvent. Keys look like
+// security-hub-findings/{severity}/{YYYY/MM/DD}/{account}_{findingId}_{uuid}.json
+export const mapFindingDetailToSecurityEvent = (eventId: string, key: string, finding: any): SecurityEvent => {
+  const parts = key.split('/');
+  const event = mapGuardDutyFindingSummaryToSecurityEvent({
+    key,
+    severity: finding.Severity?.Label || parts[1] || 'low',
+    date: parts.slice(2, 5).join('/'),
+    accountId: finding.AwsAccountId,
+    findingId: eventId,
+    type: finding.Types?.[0],
+    lastModified: finding.UpdatedAt,
+    remediationStatus: finding.remediationStatus
+  });
+  return {
+    ...event,
+    eventType: finding.Types?.[0] || event.eventType,
+    description: finding.Description || event.description,
+    // Extract source and destination IPs from the finding
+    sourceIp: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.IpAddressV4 || event.sourceIp,
+    destinationIp: finding.Resources?.[0]?.Details?.AwsEc2Instance?.IpV4Addresses?.[0] || event.destinationIp,
+    firstObserved: finding.FirstObservedAt,
+    lastObserved: finding.LastObservedAt,
+    updatedAt: finding.UpdatedAt,
+    // Add source location information
+    sourceLocation: {
+      country: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.Country?.CountryName,
+      city: finding.Action?.NetworkConnectionAction?.RemoteIpDetails?.City?.CityName
+    },
+    // Add protocol information
+    protocol: finding.Action?.NetworkConnectionAction?.Protocol
+  };
+};
+
 export const mapGuardDutyFindingSummaryToSecurityEvent = (finding: GuardDutyFindingSummary) => {
   const remediationStatus = finding.remediationStatus || {};
   let severity: 'critical' | 'high' | 'medium' | 'low' = 'low';
@@ -1,38 +1,18 @@
 
 import { SecurityEvent } from '@/types';
-import { API_KEY, API_ENDPOINT, GUARDDUTY_API_ENDPOINT, getDetailedFindingUrl } from './apiConfig';
+import { API_KEY, getDetailedFindingUrl } from './apiConfig';
 
 // Since we don't have specific remediation endpoints in the provided API,
-// we'll keep the function signatures but modify the implementation to match our app's needs
-export const approveRemediation = async (eventId: string): Promise<SecurityEvent> => {
+// we'll keep these functions but modify the implementation to match our app's needs.
+// Callers pass the event they already have loaded, so nothing is looked up here.
+export const approveRemediation = async (event: SecurityEvent): Promise<SecurityEvent> => {
   try {
     // For now, we'll log the approval but return a mocked response
-    console.log(`Approving remediation for event ID: ${eventId}`);
-
-    const getAllEventsResponse = await fetch(`${API_ENDPOINT}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      }
-    });
-    const allEvents = await getAllEventsResponse.json();
-    const foundEvent = allEvents.find((e: any) => e.findingId === eventId);
-    
-    if (!foundEvent) {
-      throw new Error('Event not found');
-    }
+    console.log(`Approving remediation for event ID: ${event.id}`);
     
     // Return modified event with remediation approved and remediated set to true
     return {
-      id: eventId,
-      clientId: foundEvent.accountId,
-      clientName: `AWS Account ${foundEvent.accountId}`,
-      timestamp: foundEvent.lastModified,
-      eventType: 'GuardDuty Finding',
-      description: `GuardDuty finding detected in account ${foundEvent.accountId}`,
-      severity: foundEvent.severity.toLowerCase(),
-      sourceIp: 'N/A',
-      destinationIp: 'N/A',
+      ...event,
       remediated: true,
       remediationApproved: true,
       remediationTimestamp: new Date().toISOString()
@@ -43,29 +23,19 @@ export const approveRemediation = async (eventId: string): Promise<SecurityEvent
   }
 };
 
-export const rejectRemediation = async (eventId: string): Promise<SecurityEvent> => {
+export const rejectRemediation = async (event: SecurityEvent): Promise<SecurityEvent> => {
   try {
     // For now, we'll log the rejection but use the same endpoint as GuardDuty link button
-    console.log(`Rejecting remediation for event ID: ${eventId}`);
-    
-    // First, get the event to find its metadata key
-    const getAllEventsResponse = await fetch(`${API_ENDPOINT}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      }
-    });
-    const allEvents = await getAllEventsResponse.json();
-    const foundEvent = allEvents.find((e: any) => e.findingId === eventId);
+    console.log(`Rejecting remediation for event ID: ${event.id}`);
     
-    if (!foundEvent) {
+    if (!event.metadata?.key) {
       throw new Error('Event not found');
     }
     
     // Use the same endpoint as the GuardDuty link button to fetch detailed finding
     // but add /reject to the URL
     try {
-      const rejectUrl = getDetailedFindingUrl(foundEvent.key).replace('/findings/', '/reject/');
+      const rejectUrl = getDetailedFindingUrl(event.metadata.key).replace('/findings/', '/reject/');
       const response = await fetch(rejectUrl, {
         method: 'GET',
         headers: {
@@ -88,15 +58,7 @@ export const rejectRemediation = async (eventId: string): Promise<SecurityEvent>
     
     // Return modified event with remediation rejected
     return {
-      id: eventId,
-      clientId: foundEvent.accountId,
-      clientName: `AWS Account ${foundEvent.accountId}`,
-      timestamp: foundEvent.lastModified,
-      eventType: 'GuardDuty Finding',
-      description: `GuardDuty finding detected in account ${foundEvent.accountId}`,
-      severity: foundEvent.severity.toLowerCase(),
-      sourceIp: 'N/A',
-      destinationIp: 'N/A',
+      ...event,
       remediated: false,
       remediationApproved: false,
       remediationTimestamp: new Date().toISOString()
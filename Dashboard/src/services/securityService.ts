@@ -2,7 +2,8 @@
 export * from './clientService';
 export * from './eventService';
 export * from './remediationService';
-import { API_KEY, GUARDDUTY_API_ENDPOINT } from '@/services/apiConfig';
+export * from './statsService';
+import { API_KEY, GUARDDUTY_API_ENDPOINT, fetchFindingsPage } from '@/services/apiConfig';
 import { UserRole } from '@/types';
 
 // Authentication service
@@ -33,21 +34,11 @@ export const authenticateUser = async (username: string, password: string , role
   }
 };
 
-// Service to get client-specific findings
+// Service to get the first page of client-specific findings
 export const getClientFindings = async (accountId: string): Promise<any[]> => {
   try {
-    const response = await fetch(`${GUARDDUTY_API_ENDPOINT}/finding/${accountId}`, {
-      method: 'GET',
-      headers: {
-        'x-api-key': API_KEY
-      },
-    });
-    
-    if (!response.ok) {
-      throw new Error('Failed to fetch client findings');
-    }
-    
-    return await response.json();
+    const page = await fetchFindingsPage({ accountId });
+    return page.findings;
   } catch (error) {
     console.error('Error fetching client findings:', error);
     return [];
@@ -0,0 +1,52 @@
+import { fetchFindingStats } from './apiConfig';
+
+export interface SeverityCounts {
+  critical: number;
+  high: number;
+  medium: number;
+  low: number;
+}
+
+export interface DashboardStats {
+  total: number;
+  remediated: number;
+  pending: number;
+  // Critical and high severity events not remediated yet
+  pendingApproval: number;
+  severityCounts: SeverityCounts;
+  clientCount: number;
+}
+
+// Fold the API's severity categories into the dashboard's four levels;
+// informational and unknown findings are shown as low, like in the event lists
+export const toSeverityCounts = (counts: Record<string, number>): SeverityCounts => {
+  const result = { critical: 0, high: 0, medium: 0, low: 0 };
+  Object.entries(counts).forEach(([severity, count]) => {
+    switch (severity.toLowerCase()) {
+      case 'critical': result.critical += count; break;
+      case 'high': result.high += count; break;
+      case 'medium': result.medium += count; break;
+      default: result.low += count;
+    }
+  });
+  return result;
+};
+
+// Summary counts for the dashboards, from the pre-aggregated /findings/stats rollups
+export const getDashboardStats = async (accountId?: string): Promise<DashboardStats> => {
+  try {
+    const stats = await fetchFindingStats(accountId);
+    const pendingBySeverity = toSeverityCounts(stats.remediation.pendingBySeverity);
+    return {
+      total: stats.total,
+      remediated: stats.remediation.remediated,
+      pending: stats.remediation.pending,
+      pendingApproval: pendingBySeverity.critical + pendingBySeverity.high,
+      severityCounts: toSeverityCounts(stats.bySeverity),
+      clientCount: Object.keys(stats.byAccount).length
+    };
+  } catch (error) {
+    console.error('Error fetching dashboard stats:', error);
+    throw error;
+  }
+};
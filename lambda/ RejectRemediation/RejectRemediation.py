@@ -1,15 +1,20 @@
 import json
-import boto3
 import os
 import logging
 from botocore.exceptions import ClientError
 
+from finding_index import remove_summary, parse_finding_key
+from finding_archive import read_archived_finding
+from finding_changes import record_change, CHANGE_REJECTED
+from finding_search import unindex_terms
+from aws_clients import get_client
+
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize S3 client
-s3_client = boto3.client('s3')
+s3_client = get_client('s3')
 S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'soarcery')
 
 def lambda_handler(event, context):
@@ -40,13 +45,21 @@ def lambda_handler(event, context):
             logger.info(f"Attempting to delete S3 object with key: {object_key}")
             
             try:
-                # First, check if the S3 object exists
-                s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=object_key)
+                # First, check if the S3 object exists, keeping its content to find its search terms
+                finding = read_finding(object_key)
                 
-                # Delete the S3 object
+                # Delete the S3 object (the compacted copy drops out once the day is compacted again)
                 s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=object_key)
                 logger.info(f"Successfully deleted object {object_key} from bucket {S3_BUCKET_NAME}")
                 
+                # Drop the finding from the dashboard summary index and leave a tombstone in the change log
+                try:
+                    remove_summary(s3_client, S3_BUCKET_NAME, object_key)
+                    unindex_terms(s3_client, S3_BUCKET_NAME, object_key, finding)
+                    record_change(s3_client, S3_BUCKET_NAME, CHANGE_REJECTED, object_key, deleted=True)
+                except Exception as index_error:
+                    logger.error(f"Failed to remove {object_key} from finding index: {str(index_error)}")
+                
                 return build_response(200, {
                     'message': 'S3 object successfully deleted',
                     'objectKey': object_key
@@ -77,6 +90,25 @@ def lambda_handler(event, context):
             'error': f"Unexpected error: {str(e)}"
         })
 
+def read_finding(object_key):
+    """
+    The stored finding, from its compacted file once compaction has deleted the raw JSON.
+    Raises the NoSuchKey error when there is neither.
+    """
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=object_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+            raise
+        finding = read_archived_finding(s3_client, S3_BUCKET_NAME, parse_finding_key(object_key))
+        if finding is None:
+            raise
+        return finding
+    try:
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except json.JSONDecodeError:
+        return None
+
 def build_response(status_code, body):
     """Helper function to build the API Gateway response"""
     return {
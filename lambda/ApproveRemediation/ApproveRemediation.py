@@ -1,18 +1,22 @@
 import json
-import boto3
 import os
+import base64
 import datetime
 import uuid
 import logging
 
+from finding_index import upsert_summary, parse_finding_key
+from finding_archive import read_archived_finding
+from finding_changes import record_change, CHANGE_APPROVED
+from aws_clients import get_client
+from credential_broker import get_role_client
+from rate_limiter import RateLimitedClient, limiter_stats
+from ec2_inventory import find_instance, inventory_stats
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3_client = boto3.client('s3')
-ec2_client = boto3.client('ec2')
-ssm_client = boto3.client('ssm')
-sts_client = boto3.client('sts')
-organizations_client = boto3.client('organizations')
+s3_client = get_client('s3')
 
 # Configuration variables
 BUCKET_NAME = os.environ.get('FINDINGS_BUCKET', 'soarcery')
@@ -35,7 +39,10 @@ def lambda_handler(event, context):
             logger.info(f"Extracted finding key from path parameter: {finding_key}")
         # Check if this is coming from API Gateway POST request (body)
         elif event.get('body'):
-            body = json.loads(event.get('body', '{}'))
+            raw_body = event['body']
+            if event.get('isBase64Encoded'):
+                raw_body = base64.b64decode(raw_body).decode('utf-8')
+            body = json.loads(raw_body)
             finding_key = body.get('findingKey')
             logger.info(f"Extracted finding key from request body: {finding_key}")
         # Check if this is a direct path invocation (e.g. from Lambda console)
@@ -69,6 +76,13 @@ def lambda_handler(event, context):
             
             logger.info(f"Successfully updated finding in S3 at s3://{BUCKET_NAME}/{finding_key}")
             
+            # Reflect the new remediation status in the dashboard summary index and change log
+            try:
+                summary = upsert_summary(s3_client, BUCKET_NAME, finding_key, finding)
+                record_change(s3_client, BUCKET_NAME, CHANGE_APPROVED, finding_key, summary)
+            except Exception as index_error:
+                logger.error(f"Failed to update finding index for {finding_key}: {str(index_error)}")
+            
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -114,13 +128,24 @@ def lambda_handler(event, context):
         }
 
 def get_finding_from_s3(key):
-    """Retrieve a finding from the S3 bucket using the provided key"""
+    """
+    Retrieve a finding from the S3 bucket using the provided key. Once compaction has deleted
+    its raw JSON the finding comes from its compacted file; saving the approval writes the
+    raw object back, and the next compaction of the day picks it up.
+    """
     try:
         logger.info(f"Retrieving finding from S3: s3://{BUCKET_NAME}/{key}")
-        response = s3_client.get_object(
-            Bucket=BUCKET_NAME,
-            Key=key
-        )
+        try:
+            response = s3_client.get_object(
+                Bucket=BUCKET_NAME,
+                Key=key
+            )
+        except s3_client.exceptions.NoSuchKey:
+            finding = read_archived_finding(s3_client, BUCKET_NAME, parse_finding_key(key))
+            if finding is None:
+                raise
+            logger.info(f"Raw JSON of {key} was compacted, using the archived copy")
+            return finding
         finding_content = response['Body'].read().decode('utf-8')
         return json.loads(finding_content)
     except Exception as e:
@@ -208,7 +233,10 @@ def process_reverse_shell_finding(finding):
         remote_port = product_fields.get('aws/guardduty/service/action/networkConnectionAction/remotePortDetails/port', '')
         
         # Perform remediation
-        remediation_result = remediate_reverse_shell(account_id, instance_id, suspicious_command, remote_ip, remote_port)
+        severity = finding.get('Severity', {}).get('Label', 'MEDIUM').lower()
+        remediation_result = remediate_reverse_shell(account_id, instance_id, suspicious_command, remote_ip, remote_port, severity)
+        logger.info(f"Rate limiter stats: {json.dumps(limiter_stats())}")
+        logger.info(f"EC2 inventory stats: {json.dumps(inventory_stats())}")
         
         return {
             'findingId': finding_id,
@@ -234,57 +262,27 @@ def get_severity_category_from_number(severity):
     else:
         return "unknown"
 
-def assume_role_in_account(account_id):
-    """Assume the remediation role in the specified account"""
-    try:
-        role_arn = f"arn:aws:iam::{account_id}:role/{REMEDIATION_ROLE_NAME}"
-        logger.info(f"Attempting to assume role: {role_arn}")
-        
-        response = sts_client.assume_role(
-            RoleArn=role_arn,
-            RoleSessionName=f"SecurityHubRemediation-{uuid.uuid4()}"
-        )
-        
-        credentials = response['Credentials']
-        return {
-            'AccessKeyId': credentials['AccessKeyId'],
-            'SecretAccessKey': credentials['SecretAccessKey'],
-            'SessionToken': credentials['SessionToken']
-        }
-    except Exception as e:
-        logger.error(f"Failed to assume role in account {account_id}: {str(e)}")
-        raise
-
-def remediate_reverse_shell(account_id, instance_id, suspicious_command, remote_ip='', remote_port=''):
+def remediate_reverse_shell(account_id, instance_id, suspicious_command, remote_ip='', remote_port='', severity=None):
     """Remediate reverse shell execution on an EC2 instance"""
     try:
-        # Create specialized credentials for the account where the instance exists
-        credentials = assume_role_in_account(account_id)
+        # Clients acting as the remediation role in the account where the instance exists,
+        # reused across findings until the role's credentials near expiry. Their calls are
+        # paced per account and API family, most severe findings first.
+        account_ssm_client = RateLimitedClient(get_role_client('ssm', account_id, REMEDIATION_ROLE_NAME), account_id, severity)
+        account_ec2_client = RateLimitedClient(get_role_client('ec2', account_id, REMEDIATION_ROLE_NAME), account_id, severity)
         
-        # Create clients with the account-specific credentials
-        account_ssm_client = boto3.client(
-            'ssm',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken']
-        )
-        
-        account_ec2_client = boto3.client(
-            'ec2',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken']
-        )
-        
-        # Check if the instance is managed by SSM
-        managed_instance = is_instance_ssm_managed(account_ssm_client, instance_id)
+        # VPC and SSM management status from the account's cached EC2 inventory
+        instance = lookup_instance(account_id, account_ec2_client, account_ssm_client, instance_id)
+        managed_instance = bool(instance and instance['ssmManaged'])
         
         remediation_actions = []
         
         # Isolate the instance by modifying security groups
         try:
             # Create a new security group that blocks all traffic except SSM
-            isolation_sg_id = create_isolation_security_group(account_ec2_client, instance_id)
+            isolation_sg_id = create_isolation_security_group(
+                account_ec2_client, instance_id, instance['vpcId'] if instance else None
+            )
             
             # Apply the isolation security group to the instance
             account_ec2_client.modify_instance_attribute(
@@ -406,23 +404,21 @@ def remediate_reverse_shell(account_id, instance_id, suspicious_command, remote_
             'details': f"Remediation failed: {str(e)}"
         }
 
-def is_instance_ssm_managed(ssm_client, instance_id):
-    """Check if an instance is managed by SSM"""
+def lookup_instance(account_id, ec2_client, ssm_client, instance_id):
+    """The instance's inventory entry, whose ssmManaged says whether SSM manages it, or None"""
     try:
-        response = ssm_client.describe_instance_information(
-            Filters=[{'Key': 'InstanceIds', 'Values': [instance_id]}]
-        )
-        return len(response.get('InstanceInformationList', [])) > 0
+        return find_instance(account_id, instance_id, ec2_client, ssm_client)
     except Exception as e:
         logger.error(f"Error checking SSM management status for instance {instance_id}: {str(e)}")
-        return False
+        return None
 
-def create_isolation_security_group(ec2_client, instance_id):
+def create_isolation_security_group(ec2_client, instance_id, vpc_id=None):
     """Create a security group that isolates an instance but allows SSM access"""
     try:
-        # Get VPC ID for the instance
-        response = ec2_client.describe_instances(InstanceIds=[instance_id])
-        vpc_id = response['Reservations'][0]['Instances'][0]['VpcId']
+        # Get VPC ID for the instance, unless the inventory already had it
+        if not vpc_id:
+            response = ec2_client.describe_instances(InstanceIds=[instance_id])
+            vpc_id = response['Reservations'][0]['Instances'][0]['VpcId']
         
         # Create security group
         sg_response = ec2_client.create_security_group(
@@ -1,13 +1,16 @@
 import json
-import boto3
 import os
+import base64
+import binascii
 import logging
 from botocore.exceptions import ClientError
 
+from aws_clients import get_client
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-secretsmanager = boto3.client('secretsmanager')
+secretsmanager = get_client('secretsmanager')
 
 def lambda_handler(event, context):
     try:
@@ -19,8 +22,13 @@ def lambda_handler(event, context):
         
         # Safer parsing of body
         try:
-            body = json.loads(event.get('body', '{}')) if event.get('body') else {}
-        except json.JSONDecodeError as e:
+            raw_body = event.get('body')
+            # The API treats every media type as binary so compressed responses pass through,
+            # which means request bodies arrive base64 encoded
+            if raw_body and event.get('isBase64Encoded'):
+                raw_body = base64.b64decode(raw_body).decode('utf-8')
+            body = json.loads(raw_body) if raw_body else {}
+        except (json.JSONDecodeError, binascii.Error, UnicodeDecodeError) as e:
             logger.error(f"Error parsing request body: {str(e)}")
             return build_response(400, {"message": "Invalid request body format"})
         
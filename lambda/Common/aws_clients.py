@@ -0,0 +1,91 @@
+import os
+import time
+import threading
+import logging
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger()
+
+# One tuned configuration for every client. The pool is sized for the index fan-out
+# (several concurrent requests per client), idle connections are kept alive between
+# warm invocations and throttling is absorbed by adaptive client-side retries.
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '32')),
+    tcp_keepalive=True,
+    connect_timeout=int(os.environ.get('AWS_CONNECT_TIMEOUT_SECONDS', '5')),
+    read_timeout=int(os.environ.get('AWS_READ_TIMEOUT_SECONDS', '30')),
+    retries={
+        'mode': 'adaptive',
+        'total_max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '5'))
+    }
+)
+
+# Assumed-role clients kept at most; temporary credentials expire, so the oldest go first
+MAX_ROLE_CLIENTS = int(os.environ.get('AWS_MAX_ROLE_CLIENTS', '32'))
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+_stats = {'created': 0, 'reused': 0, 'createMs': 0.0}
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service, region_name=None, credentials=None):
+    """
+    A client for service, created on first use and reused for the life of the container.
+
+    Clients are cached per (service, region, credentials); `credentials` is an STS
+    Credentials dict for cross-account clients. Creation is serialized because boto3
+    sessions aren't safe to create clients from concurrently.
+    """
+    access_key = credentials['AccessKeyId'] if credentials else None
+    cache_key = (service, region_name, access_key)
+    client = _clients.get(cache_key)
+    if client is not None:
+        _stats['reused'] += 1
+        return client
+
+    with _lock:
+        client = _clients.get(cache_key)
+        if client is not None:
+            return client
+
+        started = time.perf_counter()
+        kwargs = {'region_name': region_name, 'config': CLIENT_CONFIG}
+        if credentials:
+            kwargs.update(
+                aws_access_key_id=credentials['AccessKeyId'],
+                aws_secret_access_key=credentials['SecretAccessKey'],
+                aws_session_token=credentials['SessionToken']
+            )
+        client = _get_session().client(service, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if credentials:
+            _evict_role_clients()
+        _clients[cache_key] = client
+        _stats['created'] += 1
+        _stats['createMs'] += elapsed_ms
+        logger.info(f"Created {service} client ({region_name or 'default region'}"
+                    f"{', assumed role' if credentials else ''}) in {elapsed_ms:.1f} ms")
+        return client
+
+
+def _evict_role_clients():
+    """Make room for one more assumed-role client, dropping the oldest ones"""
+    role_keys = [key for key in _clients if key[2] is not None]
+    for key in role_keys[:max(len(role_keys) - MAX_ROLE_CLIENTS + 1, 0)]:
+        del _clients[key]
+
+
+def client_stats():
+    """Counts for logging: clients created (and the time it took) versus served from the cache"""
+    return {**_stats, 'createMs': round(_stats['createMs'], 1), 'cached': len(_clients)}
@@ -0,0 +1,116 @@
+import os
+import datetime
+import threading
+import logging
+
+from aws_clients import get_client
+
+logger = logging.getLogger()
+
+# Cached credentials are refreshed in the background once they are this close to expiry, by
+# a timer or by the first caller to find them nearing it. Until they actually expire,
+# callers keep using them meanwhile.
+REFRESH_MARGIN = datetime.timedelta(seconds=int(os.environ.get('CREDENTIAL_REFRESH_SECONDS', '300')))
+SESSION_DURATION_SECONDS = int(os.environ.get('ROLE_SESSION_SECONDS', '3600'))
+
+_credentials = {}
+_timers = {}
+_locks = {}
+_locks_lock = threading.Lock()
+_stats = {'assumed': 0, 'cached': 0, 'refreshed': 0}
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _lock_for(cache_key):
+    with _locks_lock:
+        return _locks.setdefault(cache_key, threading.Lock())
+
+
+def session_name(account_id):
+    """One recognizable session name per function and account, so CloudTrail ties the calls together"""
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'soarcery')
+    return f"{function_name}-{account_id}"[:64]
+
+
+def _assume(account_id, role_name):
+    response = get_client('sts').assume_role(
+        RoleArn=f"arn:aws:iam::{account_id}:role/{role_name}",
+        RoleSessionName=session_name(account_id),
+        DurationSeconds=SESSION_DURATION_SECONDS
+    )
+    _stats['assumed'] += 1
+    logger.info(f"Assumed {role_name} in account {account_id}, valid until {response['Credentials']['Expiration']}")
+    return response['Credentials']
+
+
+def _store(cache_key, credentials):
+    """Cache credentials and arm a timer that refreshes them REFRESH_MARGIN before they expire"""
+    _credentials[cache_key] = credentials
+    delay = (credentials['Expiration'] - REFRESH_MARGIN - _now()).total_seconds()
+    timer = threading.Timer(max(delay, 0), _refresh, args=(cache_key,))
+    timer.daemon = True
+    previous = _timers.get(cache_key)
+    _timers[cache_key] = timer
+    if previous:
+        previous.cancel()
+    timer.start()
+
+
+def _refresh(cache_key):
+    """Replace cached credentials ahead of expiry, unless another caller is already doing it"""
+    lock = _lock_for(cache_key)
+    if not lock.acquire(blocking=False):
+        return
+    try:
+        cached = _credentials.get(cache_key)
+        if cached and cached['Expiration'] - _now() > REFRESH_MARGIN:
+            return
+        _store(cache_key, _assume(*cache_key))
+        _stats['refreshed'] += 1
+    except Exception as e:
+        # The cached credentials stay in use; the next caller tries again
+        logger.warning(f"Could not refresh credentials for {cache_key[1]} in {cache_key[0]}: {str(e)}")
+    finally:
+        lock.release()
+
+
+def get_credentials(account_id, role_name):
+    """
+    Temporary credentials for role_name in account_id, from the cache while they are valid.
+
+    Credentials nearing expiry are replaced in the background, so callers only wait for
+    assume_role when there are no valid credentials at all; concurrent callers then share
+    one call. A Lambda container is frozen between invocations, so the refresh timer can
+    fire late: the first caller to find the credentials nearing expiry starts the refresh
+    itself.
+    """
+    cache_key = (account_id, role_name)
+    cached = _credentials.get(cache_key)
+    if cached and cached['Expiration'] - _now() > REFRESH_MARGIN:
+        _stats['cached'] += 1
+        return cached
+    if cached and cached['Expiration'] > _now():
+        threading.Thread(target=_refresh, args=(cache_key,), daemon=True).start()
+        _stats['cached'] += 1
+        return cached
+
+    with _lock_for(cache_key):
+        cached = _credentials.get(cache_key)
+        if cached and cached['Expiration'] > _now():
+            _stats['cached'] += 1
+            return cached
+        credentials = _assume(account_id, role_name)
+        _store(cache_key, credentials)
+        return credentials
+
+
+def get_role_client(service, account_id, role_name, region_name=None):
+    """A client acting as role_name in account_id, reused until its credentials are refreshed"""
+    return get_client(service, region_name, get_credentials(account_id, role_name))
+
+
+def broker_stats():
+    return {**_stats, 'roles': len(_credentials)}
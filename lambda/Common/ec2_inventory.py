@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+import logging
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+# A region's inventory is rebuilt with bulk describes once it is this old. Instances missing
+# from it (launched since) are looked up one at a time and added in between.
+INVENTORY_TTL_SECONDS = int(os.environ.get('INVENTORY_TTL_SECONDS', '300'))
+
+_inventories = {}
+_locks = {}
+_locks_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'builds': 0, 'apiCalls': 0}
+
+
+def _lock_for(cache_key):
+    with _locks_lock:
+        return _locks.setdefault(cache_key, threading.Lock())
+
+
+def _pages(call, result_key, **kwargs):
+    """
+    Every item of a paginated describe. Pages are requested one by one rather than through
+    a paginator so rate-limited clients pace each page.
+    """
+    while True:
+        response = call(**kwargs)
+        _stats['apiCalls'] += 1
+        yield from response.get(result_key, [])
+        if not response.get('NextToken'):
+            return
+        kwargs['NextToken'] = response['NextToken']
+
+
+def _instance_entry(instance, subnet_nacls, managed):
+    subnet_id = instance.get('SubnetId')
+    return {
+        'instanceId': instance['InstanceId'],
+        'state': instance.get('State', {}).get('Name'),
+        'vpcId': instance.get('VpcId'),
+        'subnetId': subnet_id,
+        'naclId': subnet_nacls.get(subnet_id),
+        'ssmManaged': None if managed is None else instance['InstanceId'] in managed
+    }
+
+
+def _subnet_nacls(ec2_client, **filters):
+    subnet_nacls = {}
+    for nacl in _pages(ec2_client.describe_network_acls, 'NetworkAcls', **filters):
+        for association in nacl.get('Associations', []):
+            subnet_nacls[association['SubnetId']] = nacl['NetworkAclId']
+    return subnet_nacls
+
+
+def _managed_instances(ssm_client, **filters):
+    return {info['InstanceId'] for info in _pages(ssm_client.describe_instance_information, 'InstanceInformationList', **filters)}
+
+
+def build_inventory(ec2_client, ssm_client=None):
+    """
+    Map every instance in the client's account and region to its VPC, subnet, network ACL
+    and (with an SSM client) whether SSM manages it, with a few paginated bulk describes.
+    """
+    subnet_nacls = _subnet_nacls(ec2_client)
+    managed = _managed_instances(ssm_client) if ssm_client else None
+    instances = {}
+    for reservation in _pages(ec2_client.describe_instances, 'Reservations', MaxResults=1000):
+        for instance in reservation.get('Instances', []):
+            instances[instance['InstanceId']] = _instance_entry(instance, subnet_nacls, managed)
+    _stats['builds'] += 1
+    return {
+        'builtAt': time.monotonic(),
+        'instances': instances,
+        'subnetNacls': subnet_nacls,
+        'ssmLoaded': managed is not None
+    }
+
+
+def _add_instance(inventory, instance_id, ec2_client, ssm_client):
+    """Look up one instance missing from the inventory and add it, returning its entry or None"""
+    try:
+        reservations = list(_pages(ec2_client.describe_instances, 'Reservations', InstanceIds=[instance_id]))
+    except ClientError as e:
+        # Unlike a filter, an unknown Id in InstanceIds is an error rather than an empty result
+        if e.response.get('Error', {}).get('Code') == 'InvalidInstanceID.NotFound':
+            return None
+        raise
+    instance = next((i for r in reservations for i in r.get('Instances', [])), None)
+    if instance is None:
+        return None
+    subnet_id = instance.get('SubnetId')
+    if subnet_id and subnet_id not in inventory['subnetNacls']:
+        inventory['subnetNacls'].update(
+            _subnet_nacls(ec2_client, Filters=[{'Name': 'association.subnet-id', 'Values': [subnet_id]}])
+        )
+    managed = None
+    if inventory['ssmLoaded']:
+        managed = _managed_instances(ssm_client, Filters=[{'Key': 'InstanceIds', 'Values': [instance_id]}])
+    entry = _instance_entry(instance, inventory['subnetNacls'], managed)
+    inventory['instances'][instance_id] = entry
+    return entry
+
+
+def find_instance(account_id, instance_id, ec2_client, ssm_client=None):
+    """
+    The cached network placement of an instance: {'instanceId', 'state', 'vpcId', 'subnetId',
+    'naclId', 'ssmManaged'}, or None if the account has no such instance. `ssmManaged` is
+    only filled in when an SSM client is given.
+
+    The inventory of the client's account and region is built on first use and whenever it
+    is older than INVENTORY_TTL_SECONDS; instances it doesn't know yet are added one by one.
+    """
+    cache_key = (account_id, ec2_client.meta.region_name)
+    with _lock_for(cache_key):
+        inventory = _inventories.get(cache_key)
+        if inventory is None or time.monotonic() - inventory['builtAt'] > INVENTORY_TTL_SECONDS:
+            started = time.perf_counter()
+            inventory = _inventories[cache_key] = build_inventory(ec2_client, ssm_client)
+            logger.info(f"Built EC2 inventory for {account_id}/{cache_key[1]}: {len(inventory['instances'])} instances "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        elif ssm_client and not inventory['ssmLoaded']:
+            managed = _managed_instances(ssm_client)
+            for entry in inventory['instances'].values():
+                entry['ssmManaged'] = entry['instanceId'] in managed
+            inventory['ssmLoaded'] = True
+
+        entry = inventory['instances'].get(instance_id)
+        if entry is not None:
+            _stats['hits'] += 1
+            return entry
+        _stats['misses'] += 1
+        return _add_instance(inventory, instance_id, ec2_client, ssm_client)
+
+
+def refresh_subnet_nacl(account_id, subnet_id, ec2_client):
+    """
+    The network ACL associated with a subnet right now, read from EC2 rather than the cache.
+    A cached association can be up to INVENTORY_TTL_SECONDS old, so callers about to change
+    a NACL check it here; the inventory is corrected if the subnet has been moved since.
+    """
+    nacl_id = _subnet_nacls(ec2_client, Filters=[{'Name': 'association.subnet-id', 'Values': [subnet_id]}]).get(subnet_id)
+    cache_key = (account_id, ec2_client.meta.region_name)
+    with _lock_for(cache_key):
+        inventory = _inventories.get(cache_key)
+        if inventory is not None and inventory['subnetNacls'].get(subnet_id) != nacl_id:
+            logger.info(f"Subnet {subnet_id} is now associated with NACL {nacl_id}, "
+                        f"not {inventory['subnetNacls'].get(subnet_id)} as cached")
+            if nacl_id:
+                inventory['subnetNacls'][subnet_id] = nacl_id
+            else:
+                inventory['subnetNacls'].pop(subnet_id, None)
+            for entry in inventory['instances'].values():
+                if entry['subnetId'] == subnet_id:
+                    entry['naclId'] = nacl_id
+    return nacl_id
+
+
+def inventory_stats():
+    """Counts for logging: lookups served from the cache versus added individually, builds and API calls made"""
+    return {**_stats, 'inventories': len(_inventories)}
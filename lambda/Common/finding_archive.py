@@ -0,0 +1,293 @@
+import io
+import json
+import datetime
+import logging
+
+from s3_json import read_json, update_json, fan_out
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    pq = None
+
+logger = logging.getLogger()
+
+ARCHIVE_PREFIX = 'compacted-findings/'
+MANIFEST_KEY = f"{ARCHIVE_PREFIX}manifest.json"
+ARCHIVE_VERSION = 2
+
+# The first request for a compacted file is a suffix range of this many bytes: the footer,
+# and for a small file all of it. Column chunks are fetched with further ranged GETs.
+FOOTER_READ_BYTES = 64 * 1024
+
+# Top-level finding fields stored as columns of their own, so readers decode only the ones
+# they need. Nested fields are JSON-encoded; `details` holds the rest of the finding.
+FINDING_FIELD_COLUMNS = [
+    ('title', 'Title'),
+    ('description', 'Description'),
+    ('createdAt', 'CreatedAt'),
+    ('updatedAt', 'UpdatedAt'),
+    ('firstObservedAt', 'FirstObservedAt'),
+    ('lastObservedAt', 'LastObservedAt'),
+    ('generatorId', 'GeneratorId'),
+    ('productArn', 'ProductArn'),
+    ('recordState', 'RecordState'),
+    ('sourceUrl', 'SourceUrl')
+]
+FINDING_JSON_COLUMNS = [
+    ('types', 'Types'),
+    ('resources', 'Resources'),
+    ('network', 'Network'),
+    ('workflow', 'Workflow'),
+    ('compliance', 'Compliance'),
+    ('remediationGuidance', 'Remediation'),
+    ('productFields', 'ProductFields')
+]
+
+# Column layout of a compacted day. The scalar columns cover what reports and rollups
+# filter and count on; with the finding columns after them they add up to the full finding.
+ARCHIVE_COLUMNS = [
+    ('key', 'string'),
+    ('findingId', 'string'),
+    ('accountId', 'string'),
+    ('severity', 'string'),
+    ('severityLabel', 'string'),
+    ('severityNormalized', 'int64'),
+    ('type', 'string'),
+    ('title', 'string'),
+    ('region', 'string'),
+    ('createdAt', 'string'),
+    ('updatedAt', 'string'),
+    ('resourceId', 'string'),
+    ('remediated', 'bool_'),
+    ('remediationAction', 'string'),
+    ('remediationTimestamp', 'string'),
+    ('lastModified', 'string'),
+    ('description', 'string'),
+    ('firstObservedAt', 'string'),
+    ('lastObservedAt', 'string'),
+    ('generatorId', 'string'),
+    ('productArn', 'string'),
+    ('recordState', 'string'),
+    ('sourceUrl', 'string'),
+    ('types', 'string'),
+    ('resources', 'string'),
+    ('network', 'string'),
+    ('workflow', 'string'),
+    ('compliance', 'string'),
+    ('remediationGuidance', 'string'),
+    ('productFields', 'string'),
+    ('details', 'string')
+]
+
+# What finding_from_row needs to put a full finding back together
+FINDING_COLUMNS = [column for column, _ in FINDING_FIELD_COLUMNS + FINDING_JSON_COLUMNS] + ['details']
+
+
+def archive_available():
+    return pq is not None
+
+
+def archive_key(date, account_id):
+    """Compacted files are partitioned Hive-style: compacted-findings/date=YYYY-MM-DD/account=ID/findings.parquet"""
+    return f"{ARCHIVE_PREFIX}date={date.replace('/', '-')}/account={account_id}/findings.parquet"
+
+
+def archive_row(summary, finding):
+    """Flatten a stored finding and its index summary into one archive row"""
+    finding = finding or {}
+    severity = finding.get('Severity') or {}
+    remediation = summary.get('remediationStatus') or {}
+    resources = finding.get('Resources') or [{}]
+    normalized = severity.get('Normalized')
+    return {
+        'key': summary['key'],
+        'findingId': summary.get('findingId'),
+        'accountId': summary.get('accountId'),
+        'severity': summary.get('severity'),
+        'severityLabel': severity.get('Label'),
+        'severityNormalized': int(normalized) if isinstance(normalized, (int, float)) else None,
+        'type': summary.get('type') or ((finding.get('Types') or [None])[0]),
+        'title': finding.get('Title'),
+        'region': finding.get('Region') or resources[0].get('Region'),
+        'createdAt': finding.get('CreatedAt'),
+        'updatedAt': finding.get('UpdatedAt'),
+        'resourceId': resources[0].get('Id'),
+        'remediated': bool(remediation.get('remediated')),
+        'remediationAction': remediation.get('remediationAction'),
+        'remediationTimestamp': remediation.get('remediationTimestamp'),
+        'lastModified': summary.get('lastModified'),
+        **{column: finding.get(field) for column, field in FINDING_FIELD_COLUMNS},
+        **{column: _encode(finding.get(field)) for column, field in FINDING_JSON_COLUMNS},
+        'details': _encode({field: value for field, value in finding.items() if field not in _COLUMN_FIELDS})
+    }
+
+
+_COLUMN_FIELDS = {field for _, field in FINDING_FIELD_COLUMNS + FINDING_JSON_COLUMNS}
+
+
+def _encode(value):
+    return None if value is None else json.dumps(value, separators=(',', ':'))
+
+
+def finding_from_row(row):
+    """The full finding of an archive row read with (at least) FINDING_COLUMNS"""
+    if row.get('finding') is not None:
+        # Written before the finding was split into columns
+        return json.loads(row['finding'])
+    finding = json.loads(row.get('details') or '{}')
+    for column, field in FINDING_FIELD_COLUMNS:
+        if row.get(column) is not None:
+            finding[field] = row[column]
+    for column, field in FINDING_JSON_COLUMNS:
+        if row.get(column) is not None:
+            finding[field] = json.loads(row[column])
+    return finding
+
+
+def write_archive(s3_client, bucket, date, account_id, rows):
+    """Write one day/account partition as a zstd-compressed Parquet file"""
+    schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in ARCHIVE_COLUMNS])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    key = archive_key(date, account_id)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=buffer.getvalue(),
+        ContentType='application/vnd.apache.parquet',
+        ServerSideEncryption='AES256'
+    )
+    return key
+
+
+class _S3RangeFile(io.RawIOBase):
+    """
+    A read-only, seekable file over one S3 object whose reads are ranged GETs, so a Parquet
+    reader fetches the footer and the column chunks it decodes rather than the whole object.
+    """
+
+    def __init__(self, s3_client, bucket, key):
+        self._s3 = s3_client
+        self._bucket = bucket
+        self._key = key
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{FOOTER_READ_BYTES}")
+        self._tail = response['Body'].read()
+        # Content-Range is "bytes first-last/size"; without it the whole object came back
+        content_range = response.get('ContentRange')
+        self.size = int(content_range.rsplit('/', 1)[1]) if content_range else len(self._tail)
+        self._tail_start = self.size - len(self._tail)
+        self._position = 0
+        self.requests = 1
+        self.bytes_read = len(self._tail)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self.size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def readinto(self, buffer):
+        start = self._position
+        end = min(start + len(buffer), self.size)
+        if start >= end:
+            return 0
+        # Only what lies before the footer already fetched is requested
+        data = b''
+        if start < self._tail_start:
+            data = self._s3.get_object(Bucket=self._bucket, Key=self._key,
+                                       Range=f"bytes={start}-{min(end, self._tail_start) - 1}")['Body'].read()
+            self.requests += 1
+            self.bytes_read += len(data)
+        if end > self._tail_start:
+            data += self._tail[max(start, self._tail_start) - self._tail_start:end - self._tail_start]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def read_archive(s3_client, bucket, key, columns=None, keys=None):
+    """
+    Read rows of one compacted file as dicts. Only the footer and the chunks of `columns`
+    are fetched, with ranged GETs that neighbouring chunks share, and `keys` restricts the
+    rows to those finding keys. Files written before the current layout are read whole.
+    """
+    source = _S3RangeFile(s3_client, bucket, key)
+    parquet = pq.ParquetFile(source, pre_buffer=True)
+    if columns and keys and 'key' not in columns:
+        columns = ['key'] + list(columns)
+    if columns and not set(columns) <= set(parquet.schema_arrow.names):
+        columns = None
+    table = parquet.read(columns=columns)
+    if keys:
+        table = table.filter(pc.is_in(table['key'], value_set=pa.array(list(keys), pa.string())))
+    logger.debug(f"Read {source.bytes_read} of {source.size} bytes of {key} in {source.requests} requests")
+    return table.to_pylist()
+
+
+def load_manifest(s3_client, bucket):
+    """The compaction manifest: {'days': {date: {'shardEtag', 'accounts': {id: rows}, 'rawDeleted', ...}}}"""
+    manifest, _ = read_json(s3_client, bucket, MANIFEST_KEY)
+    return manifest or {'version': ARCHIVE_VERSION, 'days': {}}
+
+
+def record_compaction(s3_client, bucket, date, entry):
+    def mutate(manifest):
+        manifest = manifest or {'version': ARCHIVE_VERSION, 'days': {}}
+        manifest['days'][date] = {**manifest['days'].get(date, {}), **entry}
+        return manifest
+    return update_json(s3_client, bucket, MANIFEST_KEY, mutate)
+
+
+def archived_files(manifest, account_id=None, date_from=None, date_to=None):
+    """(date, account, key) of every compacted file in scope"""
+    files = []
+    for date, entry in sorted(manifest.get('days', {}).items()):
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        for account in sorted(entry.get('accounts', {})):
+            if not account_id or account == account_id:
+                files.append((date, account, archive_key(date, account)))
+    return files
+
+
+def read_archived(s3_client, bucket, account_id=None, columns=None, date_from=None, date_to=None):
+    """Rows of every compacted file for an account (or all accounts), read concurrently"""
+    if not archive_available():
+        return []
+    files = archived_files(load_manifest(s3_client, bucket), account_id, date_from, date_to)
+    tables = fan_out(lambda file: read_archive(s3_client, bucket, file[2], columns), files)
+    return [row for rows in tables for row in rows]
+
+
+def read_archived_finding(s3_client, bucket, summary):
+    """The full finding for one index summary from its compacted file, or None"""
+    if not archive_available() or not summary or not summary.get('accountId'):
+        return None
+    manifest = load_manifest(s3_client, bucket)
+    entry = manifest.get('days', {}).get(summary['date'])
+    if not entry or summary['accountId'] not in entry.get('accounts', {}):
+        return None
+    rows = read_archive(s3_client, bucket, archive_key(summary['date'], summary['accountId']),
+                        FINDING_COLUMNS, [summary['key']])
+    return finding_from_row(rows[0]) if rows else None
+
+
+def closed_days(dates, after_days, today=None):
+    """Days at least `after_days` old (1 = yesterday and before); today's findings are still arriving"""
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    cutoff = (today - datetime.timedelta(days=after_days)).strftime('%Y/%m/%d')
+    return [date for date in dates if date <= cutoff]
@@ -0,0 +1,94 @@
+import os
+import re
+import uuid
+import datetime
+import logging
+
+from s3_json import read_json, write_json, fan_out
+
+logger = logging.getLogger()
+
+CHANGES_PREFIX = 'finding-changes/'
+
+# Change types written by the mutating Lambdas
+CHANGE_CREATED = 'created'
+CHANGE_UPDATED = 'updated'
+CHANGE_REMEDIATED = 'remediated'
+CHANGE_APPROVED = 'approved'
+CHANGE_REJECTED = 'rejected'
+
+SEQUENCE_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+# A sequence is taken from the writer's clock before its entry reaches S3, so a concurrent
+# writer (or one with a skewed clock) can still add entries behind the newest one listed.
+# Readers only see entries older than this, which lets those late writes land first.
+CHANGE_SETTLE_SECONDS = int(os.environ.get('CHANGE_SETTLE_SECONDS', '60'))
+
+
+def new_sequence(now=None):
+    """
+    Change sequences sort chronologically as strings: a UTC timestamp with microseconds plus
+    a random suffix so concurrent writers never collide.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return f"{now.strftime(SEQUENCE_FORMAT)}-{uuid.uuid4().hex[:8]}"
+
+
+def record_change(s3_client, bucket, change_type, key, summary=None, deleted=False):
+    """
+    Append one entry to the change log. Entries are never rewritten; deleted findings are
+    recorded as tombstones with no summary.
+    """
+    sequence = new_sequence()
+    write_json(s3_client, bucket, f"{CHANGES_PREFIX}{sequence}.json", {
+        'sequence': sequence,
+        'type': change_type,
+        'key': key,
+        'deleted': deleted,
+        'summary': summary,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat()
+    })
+    return sequence
+
+
+def parse_since(since):
+    """
+    Turn a `since` value into a listing start point. Accepts a sequence returned by a
+    previous call or an ISO 8601 timestamp. Raises ValueError for anything else.
+    """
+    if re.match(r'^\d{8}T\d{12}Z-[0-9a-f]{8}$', since):
+        return f"{CHANGES_PREFIX}{since}.json"
+
+    try:
+        moment = datetime.datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError('since must be a change sequence or an ISO 8601 timestamp')
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return f"{CHANGES_PREFIX}{moment.astimezone(datetime.timezone.utc).strftime(SEQUENCE_FORMAT)}"
+
+
+def list_changes(s3_client, bucket, since, limit):
+    """
+    Return up to `limit` changes recorded after `since`, oldest first, plus whether more
+    are waiting. The listing starts right after `since`, so cost follows the number of
+    changes rather than the size of the log.
+
+    Entries younger than CHANGE_SETTLE_SECONDS are held back, so a poller resuming from the
+    last sequence returned never skips an entry written late; changes therefore show up
+    that long after they happen.
+    """
+    settled = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=CHANGE_SETTLE_SECONDS)
+    cutoff = f"{CHANGES_PREFIX}{settled.strftime(SEQUENCE_FORMAT)}"
+    response = s3_client.list_objects_v2(
+        Bucket=bucket,
+        Prefix=CHANGES_PREFIX,
+        StartAfter=parse_since(since),
+        MaxKeys=limit + 1
+    )
+    keys = [obj['Key'] for obj in response.get('Contents', []) if obj['Key'] < cutoff]
+    has_more = len(keys) > limit
+    keys = keys[:limit]
+
+    changes = fan_out(lambda change_key: read_json(s3_client, bucket, change_key)[0], keys)
+    return [change for change in changes if change], has_more
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import datetime
+import logging
+
+from s3_json import update_json
+from finding_index import parse_finding_key
+
+logger = logging.getLogger()
+
+DEDUP_PREFIX = 'finding-dedup/'
+DEDUP_VERSION = 1
+
+# How long a claim may stay pending before it is taken to belong to an invocation that died
+# between claiming and storing the finding; at least the function's timeout
+CLAIM_TIMEOUT_SECONDS = int(os.environ.get('DEDUP_CLAIM_TIMEOUT_SECONDS', '900'))
+
+# Outcomes of claim_finding
+FINDING_NEW = 'new'
+FINDING_UPDATED = 'updated'
+FINDING_DUPLICATE = 'duplicate'
+
+
+def dedup_key(finding_id):
+    """One small record per finding Id; Ids are ARNs, so they are hashed into a flat key"""
+    return f"{DEDUP_PREFIX}{hashlib.sha1(finding_id.encode('utf-8')).hexdigest()}.json"
+
+
+def fingerprint(finding):
+    """
+    What makes a re-emitted finding an update rather than a repeat: its UpdatedAt and
+    severity. Findings without an UpdatedAt (converted GuardDuty events) fall back to a
+    hash of their content.
+    """
+    severity = finding.get('Severity') or {}
+    updated_at = finding.get('UpdatedAt') or (finding.get('ProductFields') or {}).get('updatedAt')
+    if updated_at:
+        return f"{updated_at}|{severity.get('Label')}|{severity.get('Normalized')}"
+    content = {k: v for k, v in finding.items() if k != 'remediationStatus'}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def claim_is_live(pending, now):
+    """A pending claim older than CLAIM_TIMEOUT_SECONDS belongs to an invocation that died"""
+    age = now - datetime.datetime.fromisoformat(pending['claimedAt'])
+    return age.total_seconds() < CLAIM_TIMEOUT_SECONDS
+
+
+def claim_finding(s3_client, bucket, finding, new_key):
+    """
+    Decide where an incoming finding goes, recording the decision with a conditional write
+    so concurrent deliveries of the same finding agree.
+
+    The claim is only pending until confirm_claim records that the object was stored: a
+    delivery whose invocation times out or crashes in between leaves a pending claim that
+    goes stale after CLAIM_TIMEOUT_SECONDS, after which a redelivery is processed again
+    instead of being taken for a duplicate.
+
+    Returns {'status', 'key', 'previous', 'fingerprint'}: a duplicate of the stored (or
+    in-flight) version is not to be written at all; an update goes to the key already
+    holding the finding unless its severity category changed, in which case it moves to
+    new_key. `previous` is the stored version's record, if any.
+    """
+    finding_id = finding['Id']
+    current = fingerprint(finding)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    outcome = {'fingerprint': current}
+
+    def mutate(record):
+        stored = record if record and record.get('key') else None
+        outcome['previous'] = {k: v for k, v in stored.items() if k != 'pending'} if stored else None
+        pending = (record or {}).get('pending')
+        if pending and pending['fingerprint'] == current and claim_is_live(pending, now):
+            outcome.update(status=FINDING_DUPLICATE, key=pending['key'])
+            return None
+        if stored and stored['fingerprint'] == current:
+            outcome.update(status=FINDING_DUPLICATE, key=stored['key'])
+            return None
+
+        key = new_key
+        if stored:
+            previous, incoming = parse_finding_key(stored['key']), parse_finding_key(new_key)
+            if previous and incoming and previous['severity'] == incoming['severity']:
+                key = stored['key']
+        outcome.update(status=FINDING_UPDATED if stored else FINDING_NEW, key=key)
+        return {
+            **(record or {}),
+            'version': DEDUP_VERSION,
+            'findingId': finding_id,
+            'firstSeen': record['firstSeen'] if record else now.isoformat(),
+            'pending': {'fingerprint': current, 'key': key, 'claimedAt': now.isoformat()}
+        }
+
+    update_json(s3_client, bucket, dedup_key(finding_id), mutate)
+    return outcome
+
+
+def confirm_claim(s3_client, bucket, finding_id, claimed_fingerprint, key):
+    """
+    Make a pending claim the stored version once its object is written, pointing the record
+    at the key the finding was actually stored under. A claim another delivery has replaced
+    in the meantime is left to that delivery.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def mutate(record):
+        pending = (record or {}).get('pending')
+        if not pending or pending['fingerprint'] != claimed_fingerprint:
+            return None
+        confirmed = {k: v for k, v in record.items() if k != 'pending'}
+        return {
+            **confirmed,
+            'key': key,
+            'fingerprint': claimed_fingerprint,
+            'lastSeen': now,
+            'updates': record['updates'] + 1 if 'updates' in record else 0
+        }
+    update_json(s3_client, bucket, dedup_key(finding_id), mutate)
+
+
+def release_claim(s3_client, bucket, finding_id, claimed_fingerprint):
+    """
+    Drop a pending claim whose finding could not be stored, so the next delivery is processed
+    again. Only this delivery's own claim is dropped; one a concurrent delivery made since is kept.
+    """
+    def mutate(record):
+        pending = (record or {}).get('pending')
+        if not pending or pending['fingerprint'] != claimed_fingerprint:
+            return None
+        return {k: v for k, v in record.items() if k != 'pending'}
+    update_json(s3_client, bucket, dedup_key(finding_id), mutate)
+
+
+def mark_remediation_queued(s3_client, bucket, finding_id, action, timeout_seconds):
+    """
+    Record that a remediation job for the finding is about to be queued. Returns False when
+    one for the same action is already queued and younger than timeout_seconds, in which
+    case no second job should be sent.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    outcome = {'queue': True}
+
+    def mutate(record):
+        if record is None:
+            return None
+        queued = record.get('queuedRemediation')
+        if queued and queued['action'] == action:
+            age = now - datetime.datetime.fromisoformat(queued['queuedAt'])
+            if age.total_seconds() < timeout_seconds:
+                outcome['queue'] = False
+                return None
+        return {**record, 'queuedRemediation': {'action': action, 'queuedAt': now.isoformat()}}
+
+    update_json(s3_client, bucket, dedup_key(finding_id), mutate)
+    return outcome['queue']
+
+
+def clear_remediation_queued(s3_client, bucket, finding_id):
+    """Drop the queued-job marker once the job has an outcome"""
+    def mutate(record):
+        if not record or 'queuedRemediation' not in record:
+            return None
+        return {k: v for k, v in record.items() if k != 'queuedRemediation'}
+    update_json(s3_client, bucket, dedup_key(finding_id), mutate)
@@ -0,0 +1,431 @@
+import json
+import heapq
+import hashlib
+import argparse
+import datetime
+import logging
+
+from s3_json import read_json, write_json, update_json, fan_out, FANOUT_MODE, FANOUT_WORKERS
+from finding_stats import update_rollup, rebuild_rollups
+from finding_search import add_to_search_shards, replace_search_shards
+from finding_archive import read_archived, finding_from_row, FINDING_COLUMNS
+
+logger = logging.getLogger()
+
+FINDINGS_PREFIX = 'security-hub-findings/'
+INDEX_PREFIX = 'finding-index/'
+ACCOUNT_INDEX_PREFIX = 'by-account/'
+INDEX_VERSION = 1
+
+DEFAULT_REMEDIATION_STATUS = {
+    'remediated': False,
+    'remediationAction': None,
+    'remediationTimestamp': None
+}
+
+
+def extract_account_number(finding_path):
+    parts = finding_path.replace('/', '_').split('_')
+
+    for part in parts:
+        if part.isdigit() and len(part) == 12:
+            return part
+
+    return None
+
+
+def parse_finding_key(key):
+    """
+    Split a stored finding key into its summary fields.
+
+    Keys look like security-hub-findings/{severity}/{YYYY/MM/DD}/{account}_{findingId}_{uuid}.json.
+    Returns None for keys that don't follow that layout.
+    """
+    parts = key.split('/')
+    if len(parts) < 6:
+        return None
+
+    file_parts = parts[-1].split('_')
+    if len(file_parts) < 2:
+        return None
+
+    return {
+        'key': key,
+        'severity': parts[1],
+        'date': '/'.join(parts[2:5]),
+        'accountId': extract_account_number(key),
+        'findingId': file_parts[1]
+    }
+
+
+def format_last_modified(value=None):
+    """Render a timestamp the same way S3 LastModified values are rendered in summaries"""
+    if value is None:
+        value = datetime.datetime.now(datetime.timezone.utc)
+    return value.replace(microsecond=0).isoformat()
+
+
+def build_summary(key, finding, last_modified=None):
+    """Build the compact index entry for a stored finding"""
+    summary = parse_finding_key(key)
+    if summary is None:
+        return None
+
+    summary['remediationStatus'] = (finding or {}).get('remediationStatus', DEFAULT_REMEDIATION_STATUS)
+    summary['type'] = ((finding or {}).get('Types') or [None])[0]
+    summary['lastModified'] = format_last_modified(last_modified)
+    return summary
+
+
+def shard_key_for_date(date):
+    """Index shards are one document per day: finding-index/YYYY/MM/DD.json"""
+    return f"{INDEX_PREFIX}{date}.json"
+
+
+def account_shard_prefix(account_id):
+    return f"{ACCOUNT_INDEX_PREFIX}{account_id}/"
+
+
+def account_shard_key(account_id, date):
+    """Per-account shards hold the same summaries, one document per account and day"""
+    return f"{account_shard_prefix(account_id)}{date}.json"
+
+
+def shard_keys_for_summary(summary):
+    """Every shard a summary is written to: its day shard and, when known, its account shard"""
+    keys = [shard_key_for_date(summary['date'])]
+    if summary.get('accountId'):
+        keys.append(account_shard_key(summary['accountId'], summary['date']))
+    return keys
+
+
+def upsert_summary(s3_client, bucket, key, finding, last_modified=None):
+    """Write-through: add or replace the index entry for a finding that was just stored"""
+    summary = build_summary(key, finding, last_modified)
+    if summary is None:
+        logger.info(f"Key {key} is not an indexed finding key, skipping index update")
+        return None
+
+    def mutate(shard):
+        shard = shard or {'version': INDEX_VERSION, 'findings': {}}
+        shard['findings'][key] = summary
+        shard['revision'] = shard.get('revision', 0) + 1
+        return shard
+
+    write_shards(s3_client, bucket, summary, mutate)
+    return summary
+
+
+def remove_summary(s3_client, bucket, key):
+    """Write-through: drop the index entry for a finding that was deleted"""
+    parsed = parse_finding_key(key)
+    if parsed is None:
+        return False
+
+    removed = []
+
+    def mutate(shard):
+        if not shard or key not in shard.get('findings', {}):
+            return None
+        del shard['findings'][key]
+        shard['revision'] = shard.get('revision', 0) + 1
+        removed.append(key)
+        return shard
+
+    write_shards(s3_client, bucket, parsed, mutate)
+    return bool(removed)
+
+
+def apply_summaries(s3_client, bucket, upserts=(), removals=()):
+    """
+    Write-through for any number of findings at once: add or replace the index entries of
+    the (key, finding) pairs in `upserts` and drop the keys in `removals`, with one
+    conditional write per shard touched and one rollup refresh per day. Findings processed
+    together therefore never contend with each other for a shard.
+
+    Returns ({key: summary}, failed keys) so callers can report what wasn't indexed.
+    """
+    summaries = {}
+    changes = {}
+
+    def change_for(shard_key, date):
+        return changes.setdefault(shard_key, {'date': date, 'put': {}, 'remove': set()})
+
+    for key in removals:
+        parsed = parse_finding_key(key)
+        if parsed is not None:
+            for shard_key in shard_keys_for_summary(parsed):
+                change_for(shard_key, parsed['date'])['remove'].add(key)
+    for key, finding in upserts:
+        summary = build_summary(key, finding)
+        if summary is None:
+            logger.info(f"Key {key} is not an indexed finding key, skipping index update")
+            continue
+        summaries[key] = summary
+        for shard_key in shard_keys_for_summary(summary):
+            change_for(shard_key, summary['date'])['put'][key] = summary
+
+    def apply(item):
+        shard_key, change = item
+
+        def mutate(shard):
+            if not shard and not change['put']:
+                return None
+            shard = shard or {'version': INDEX_VERSION, 'findings': {}}
+            for key in change['remove']:
+                shard['findings'].pop(key, None)
+            shard['findings'].update(change['put'])
+            shard['revision'] = shard.get('revision', 0) + 1
+            return shard
+
+        try:
+            shard = update_json(s3_client, bucket, shard_key, mutate)
+            if shard and shard_key == shard_key_for_date(change['date']):
+                update_rollup(s3_client, bucket, change['date'], shard)
+        except Exception as e:
+            logger.error(f"Failed to update index shard {shard_key}: {str(e)}")
+            return set(change['put']) | change['remove']
+        return set()
+
+    failed = set()
+    for keys in fan_out(apply, changes.items()):
+        failed |= keys
+    return summaries, failed
+
+
+def write_shards(s3_client, bucket, summary, mutate):
+    """Apply a shard mutation to every shard of a summary, then refresh that day's stats rollup"""
+    for shard_key in shard_keys_for_summary(summary):
+        shard = update_json(s3_client, bucket, shard_key, mutate)
+        if shard and shard_key == shard_key_for_date(summary['date']):
+            update_rollup(s3_client, bucket, summary['date'], shard)
+
+
+def list_shards(s3_client, bucket, prefix=INDEX_PREFIX):
+    """List every index shard object under an index prefix"""
+    shards = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith('.json'):
+                shards.append(obj)
+    return shards
+
+
+def load_shard(s3_client, bucket, shard_key):
+    """Return the list of summaries stored in one shard"""
+    shard, _ = read_json(s3_client, bucket, shard_key)
+    if not shard:
+        return []
+    return list(shard.get('findings', {}).values())
+
+
+def shard_date(shard_key, prefix=INDEX_PREFIX):
+    """Inverse of shard_key_for_date / account_shard_key"""
+    return shard_key[len(prefix):-len('.json')]
+
+
+def merge_newest_first(shards):
+    """k-way merge of per-shard summary lists into one list ordered by lastModified, newest first"""
+    ordered = [sorted(shard, key=lambda x: x['lastModified'], reverse=True) for shard in shards]
+    return list(heapq.merge(*ordered, key=lambda x: x['lastModified'], reverse=True))
+
+
+def select_shard_dates(s3_client, bucket, prefix, date=None, date_from=None, date_to=None):
+    """Days that have a shard under prefix, restricted to a single date or an inclusive YYYY/MM/DD range"""
+    if date:
+        return [date]
+    dates = [shard_date(obj['Key'], prefix) for obj in list_shards(s3_client, bucket, prefix)]
+    return [day for day in dates if (not date_from or day >= date_from) and (not date_to or day <= date_to)]
+
+
+def iter_summary_shards(s3_client, bucket, descending=True, start_date=None, date=None, account_id=None,
+                        date_from=None, date_to=None):
+    """
+    Yield (date, summaries) one shard at a time, walking days newest-first by default.
+
+    Shards are read in growing concurrent batches as they're consumed, so callers that stop
+    early (a full page) never touch most older days. `start_date` skips days beyond it in
+    the walk direction, `date` restricts the walk to a single day and `date_from`/`date_to`
+    to a range. With `account_id` the walk uses that account's shards, which is a single
+    prefix listing regardless of other accounts.
+    """
+    prefix = account_shard_prefix(account_id) if account_id else INDEX_PREFIX
+    dates = sorted(select_shard_dates(s3_client, bucket, prefix, date, date_from, date_to), reverse=descending)
+    if start_date:
+        dates = [day for day in dates if (day <= start_date if descending else day >= start_date)]
+
+    position = 0
+    batch_size = 1
+    while position < len(dates):
+        batch = dates[position:position + batch_size]
+        shards = fan_out(lambda day: load_shard(s3_client, bucket, f"{prefix}{day}.json"), batch)
+        for day, summaries in zip(batch, shards):
+            yield day, summaries
+        position += len(batch)
+        if FANOUT_MODE != 'sequential':
+            batch_size = min(batch_size * 2, FANOUT_WORKERS)
+
+
+def index_version(s3_client, bucket, date=None, account_id=None):
+    """Cheap change marker for the index shards a query reads, taken from a listing alone"""
+    prefix = account_shard_prefix(account_id) if account_id else INDEX_PREFIX
+    if date:
+        prefix += f"{date}.json"
+    return prefix_version(s3_client, bucket, prefix)
+
+
+def prefix_version(s3_client, bucket, prefix):
+    """
+    Combine the newest LastModified under a prefix with a digest of the object ETags, so any
+    write to a document in scope (or one appearing or disappearing) produces a new version.
+    """
+    shards = list_shards(s3_client, bucket, prefix)
+    newest = max((obj['LastModified'] for obj in shards), default=None)
+    digest = hashlib.sha1(''.join(f"{obj['Key']}{obj['ETag']}" for obj in shards).encode('utf-8')).hexdigest()
+    return f"{format_last_modified(newest) if newest else 'empty'}:{digest[:16]}"
+
+
+def load_summaries(s3_client, bucket, date=None, account_id=None, date_from=None, date_to=None):
+    """
+    Load summaries for a single day, a date range or every day, optionally for one account
+    only. Shards are fetched concurrently and merged newest-first by lastModified.
+    """
+    prefix = account_shard_prefix(account_id) if account_id else INDEX_PREFIX
+    dates = select_shard_dates(s3_client, bucket, prefix, date, date_from, date_to)
+    shards = fan_out(lambda day: load_shard(s3_client, bucket, f"{prefix}{day}.json"), dates)
+    return merge_newest_first(shards)
+
+
+def rebuild_index(s3_client, bucket, prefix=FINDINGS_PREFIX):
+    """
+    Regenerate every index shard, and the search index, from the raw finding objects plus
+    the compacted files of findings whose raw JSON has been deleted.
+
+    This reads each finding once, so it's meant for one-off backfills and repairs,
+    not for the request path. Every shard the scan didn't produce is deleted afterwards,
+    so the prefix must cover all of FINDINGS_PREFIX: a narrower one would wipe the index
+    entries of every finding outside it.
+    """
+    if not FINDINGS_PREFIX.startswith(prefix):
+        raise ValueError(f"rebuild replaces the whole index, so its prefix must cover {FINDINGS_PREFIX}, not {prefix}")
+    shards = {}
+    search_shards = {}
+    scanned = 0
+
+    def read_finding(obj):
+        try:
+            finding, _ = read_json(s3_client, bucket, obj['Key'])
+            return finding
+        except Exception as e:
+            logger.warning(f"Could not read {obj['Key']} while rebuilding index: {str(e)}")
+            return None
+
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        objects = [obj for obj in page.get('Contents', []) if parse_finding_key(obj['Key']) is not None]
+        scanned += len(objects)
+
+        for obj, finding in zip(objects, fan_out(read_finding, objects)):
+            key = obj['Key']
+            summary = build_summary(key, finding, obj['LastModified'])
+            for shard_key in shard_keys_for_summary(summary):
+                shards.setdefault(shard_key, {'version': INDEX_VERSION, 'findings': {}})
+                shards[shard_key]['findings'][key] = summary
+            add_to_search_shards(search_shards, key, finding, summary['lastModified'])
+
+    indexed = {key for shard in shards.values() for key in shard['findings']}
+    archived = 0
+    for row in read_archived(s3_client, bucket, columns=['key', 'lastModified'] + FINDING_COLUMNS):
+        if row['key'] in indexed:
+            continue
+        finding = finding_from_row(row)
+        summary = build_summary(row['key'], finding)
+        if summary is None:
+            continue
+        summary['lastModified'] = row['lastModified']
+        for shard_key in shard_keys_for_summary(summary):
+            shards.setdefault(shard_key, {'version': INDEX_VERSION, 'findings': {}})
+            shards[shard_key]['findings'][row['key']] = summary
+        add_to_search_shards(search_shards, row['key'], finding, summary['lastModified'])
+        archived += 1
+
+    stale = replace_shards(s3_client, bucket, shards, [INDEX_PREFIX, ACCOUNT_INDEX_PREFIX])
+    rebuild_rollups(s3_client, bucket, {
+        shard_date(shard_key): shard for shard_key, shard in shards.items() if shard_key.startswith(INDEX_PREFIX)
+    })
+    replace_search_shards(s3_client, bucket, search_shards)
+
+    logger.info(f"Rebuilt {len(shards)} index shards from {scanned} raw and {archived} compacted findings, "
+                f"removed {len(stale)} stale shards")
+    return {'findingsIndexed': scanned + archived, 'shardsWritten': len(shards), 'shardsRemoved': len(stale)}
+
+
+def backfill_account_shards(s3_client, bucket):
+    """
+    Migrate to the per-account layout by regenerating every by-account/ shard from the
+    day shards. Unlike rebuild_index this never reads the raw finding objects.
+    """
+    shards = {}
+    indexed = 0
+    for _, summaries in iter_summary_shards(s3_client, bucket, descending=False):
+        for summary in summaries:
+            if not summary.get('accountId'):
+                continue
+            indexed += 1
+            shard_key = account_shard_key(summary['accountId'], summary['date'])
+            shards.setdefault(shard_key, {'version': INDEX_VERSION, 'findings': {}})
+            shards[shard_key]['findings'][summary['key']] = summary
+
+    stale = replace_shards(s3_client, bucket, shards, [ACCOUNT_INDEX_PREFIX])
+
+    logger.info(f"Backfilled {len(shards)} account shards from {indexed} summaries, removed {len(stale)} stale shards")
+    return {'findingsIndexed': indexed, 'shardsWritten': len(shards), 'shardsRemoved': len(stale)}
+
+
+def rebuild_stats(s3_client, bucket):
+    """Regenerate the daily stats rollups from the existing day shards"""
+    day_shards = {}
+    for obj in list_shards(s3_client, bucket):
+        shard, _ = read_json(s3_client, bucket, obj['Key'])
+        day_shards[shard_date(obj['Key'])] = shard or {}
+    return rebuild_rollups(s3_client, bucket, day_shards)
+
+
+def replace_shards(s3_client, bucket, shards, prefixes):
+    """Write a freshly built set of shards and delete any other shard under the given prefixes"""
+    for shard_key, shard in shards.items():
+        write_json(s3_client, bucket, shard_key, shard)
+
+    stale = []
+    for prefix in prefixes:
+        stale.extend(obj['Key'] for obj in list_shards(s3_client, bucket, prefix) if obj['Key'] not in shards)
+    for shard_key in stale:
+        s3_client.delete_object(Bucket=bucket, Key=shard_key)
+    return stale
+
+
+def main():
+    from aws_clients import get_client
+
+    parser = argparse.ArgumentParser(description='Maintain the SOARCERY finding summary index')
+    parser.add_argument('command', choices=['rebuild', 'backfill-accounts', 'rebuild-stats'])
+    parser.add_argument('--bucket', default='soarcery')
+    parser.add_argument('--prefix', default=FINDINGS_PREFIX)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    s3_client = get_client('s3')
+    if args.command == 'rebuild':
+        if not FINDINGS_PREFIX.startswith(args.prefix):
+            parser.error(f"--prefix must cover {FINDINGS_PREFIX}: rebuild deletes every shard the scan didn't produce")
+        result = rebuild_index(s3_client, args.bucket, args.prefix)
+    elif args.command == 'backfill-accounts':
+        result = backfill_account_shards(s3_client, args.bucket)
+    else:
+        result = rebuild_stats(s3_client, args.bucket)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import time
+
+from s3_json import fan_out, FANOUT_MODE, FANOUT_WORKERS
+from finding_index import (
+    INDEX_PREFIX, account_shard_prefix, shard_date, load_shard, prefix_version
+)
+
+
+def build_query(severities=None, accounts=None, date_from=None, date_to=None, remediated=None, types=None):
+    """
+    Describe a findings query. Every predicate is optional; list-valued ones match any of
+    their values and `remediated` is True, False or None for either.
+    """
+    return {
+        'severities': set(severities) if severities else None,
+        'accounts': set(accounts) if accounts else None,
+        'dateFrom': date_from,
+        'dateTo': date_to,
+        'remediated': remediated,
+        'types': set(types) if types else None
+    }
+
+
+def sort_key(summary):
+    """Query results are ordered by finding date, then lastModified within the day, with the key as tie-breaker"""
+    return (summary['date'], summary['lastModified'], summary['key'])
+
+
+def shard_prefixes(query):
+    """Accounts are pushed down to their per-account shards; otherwise the day shards cover everything"""
+    if query['accounts']:
+        return [account_shard_prefix(account_id) for account_id in sorted(query['accounts'])]
+    return [INDEX_PREFIX]
+
+
+def list_shard_range(s3_client, bucket, prefix, date_from=None, date_to=None):
+    """
+    List the shard keys under prefix within an inclusive YYYY/MM/DD range.
+
+    Shard keys sort by date, so the listing starts right before date_from and stops at the
+    first key after date_to instead of listing the prefix's whole history.
+    """
+    if date_from and date_from == date_to:
+        # A single day needs no listing, a missing shard just reads as empty
+        return [f"{prefix}{date_from}.json"]
+
+    request = {'Bucket': bucket, 'Prefix': prefix}
+    if date_from:
+        request['StartAfter'] = f"{prefix}{date_from}"
+    end = f"{prefix}{date_to}.json" if date_to else None
+
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**request):
+        for obj in page.get('Contents', []):
+            if end and obj['Key'] > end:
+                return keys
+            if obj['Key'].endswith('.json'):
+                keys.append(obj['Key'])
+    return keys
+
+
+def plan_query(s3_client, bucket, query):
+    """
+    Resolve a query to the smallest set of index shards that can hold matches, grouped by
+    day as {date: [shard keys]}. Account and date predicates are answered here; the rest
+    are applied per summary by run_query.
+    """
+    prefixes = shard_prefixes(query)
+    listings = fan_out(
+        lambda prefix: list_shard_range(s3_client, bucket, prefix, query['dateFrom'], query['dateTo']),
+        prefixes
+    )
+
+    days = {}
+    for prefix, keys in zip(prefixes, listings):
+        for shard_key in keys:
+            days.setdefault(shard_date(shard_key, prefix), []).append(shard_key)
+    return {'prefixes': len(prefixes), 'days': days}
+
+
+def matches(summary, query):
+    """The predicates that can't be pushed down into the shard layout"""
+    if query['severities'] and summary.get('severity') not in query['severities']:
+        return False
+    if query['accounts'] and summary.get('accountId') not in query['accounts']:
+        return False
+    if query['remediated'] is not None and \
+            bool((summary.get('remediationStatus') or {}).get('remediated')) != query['remediated']:
+        return False
+    if query['types'] and summary.get('type') not in query['types']:
+        return False
+    return True
+
+
+def new_query_stats():
+    """
+    Counters filled in while a query runs. `position` is the sort_key of the last summary
+    examined and `partial` is set when the query stopped at its deadline.
+    """
+    return {
+        'prefixes': 0, 'shardsPlanned': 0, 'shardsScanned': 0, 'examined': 0, 'matched': 0,
+        'position': None, 'partial': False
+    }
+
+
+def past_deadline(deadline, stats):
+    """True once the deadline passed, as long as the query examined something to resume after"""
+    return deadline is not None and stats['position'] is not None and time.monotonic() >= deadline
+
+
+def run_query(s3_client, bucket, query, descending=True, after=None, stats=None, deadline=None):
+    """
+    Stream the summaries matching a query in sort_key order (newest first by default).
+
+    `after` is a sort_key position to resume from. Days are read in growing concurrent
+    batches as the caller consumes them, so a caller that stops early leaves most of the
+    plan unread. Pruning counts are accumulated in `stats` when one is passed.
+
+    With a `deadline` (a time.monotonic() value) the stream ends early once it passes,
+    marking stats['partial']; stats['position'] is then where to resume.
+    """
+    stats = stats if stats is not None else new_query_stats()
+    plan = plan_query(s3_client, bucket, query)
+    stats['prefixes'] += plan['prefixes']
+    stats['shardsPlanned'] += sum(len(keys) for keys in plan['days'].values())
+
+    dates = sorted(plan['days'], reverse=descending)
+    if after:
+        dates = [day for day in dates if (day <= after[0] if descending else day >= after[0])]
+
+    position = 0
+    batch_size = 1
+    while position < len(dates):
+        if past_deadline(deadline, stats):
+            stats['partial'] = True
+            return
+        batch = dates[position:position + batch_size]
+        shard_keys = [shard_key for day in batch for shard_key in plan['days'][day]]
+        shards = dict(zip(shard_keys, fan_out(lambda shard_key: load_shard(s3_client, bucket, shard_key), shard_keys)))
+        stats['shardsScanned'] += len(shard_keys)
+
+        for day in batch:
+            summaries = [summary for shard_key in plan['days'][day] for summary in shards[shard_key]]
+            for summary in sorted(summaries, key=sort_key, reverse=descending):
+                if after and ((sort_key(summary) >= after) if descending else (sort_key(summary) <= after)):
+                    continue
+                if past_deadline(deadline, stats):
+                    stats['partial'] = True
+                    return
+                stats['examined'] += 1
+                stats['position'] = sort_key(summary)
+                if matches(summary, query):
+                    stats['matched'] += 1
+                    yield summary
+
+        position += len(batch)
+        if FANOUT_MODE != 'sequential':
+            batch_size = min(batch_size * 2, FANOUT_WORKERS)
+
+
+def query_version(s3_client, bucket, query):
+    """Change marker for every shard prefix a query can read, taken from listings alone"""
+    prefixes = shard_prefixes(query)
+    if query['dateFrom'] and query['dateFrom'] == query['dateTo']:
+        prefixes = [f"{prefix}{query['dateFrom']}.json" for prefix in prefixes]
+    return '|'.join(fan_out(lambda prefix: prefix_version(s3_client, bucket, prefix), prefixes))
@@ -0,0 +1,238 @@
+import os
+import re
+import hashlib
+import logging
+
+from s3_json import read_json, write_json, update_json, fan_out
+
+logger = logging.getLogger()
+
+SEARCH_PREFIX = 'search-index/'
+SEARCH_VERSION = 2
+
+# Terms are hashed onto a fixed number of shards so a lookup reads one small document
+# per term and an ingest touches only the shards of the finding's own terms
+SEARCH_SHARD_COUNT = 256
+
+# Postings kept per term, newest first. A term common to most findings would otherwise grow
+# with the whole store and make every conditional write to its shard O(total findings).
+MAX_POSTINGS_PER_TERM = int(os.environ.get('SEARCH_MAX_POSTINGS', '1000'))
+
+# Where GuardDuty puts the remote IP in the flattened ProductFields of a Security Hub finding
+REMOTE_IP_PRODUCT_FIELD = 'aws/guardduty/service/action/networkConnectionAction/remoteIpDetails/ipAddressV4'
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9.\-:/]*[a-z0-9]|[a-z0-9]')
+STOP_WORDS = {'a', 'an', 'and', 'the', 'of', 'on', 'in', 'is', 'to', 'with', 'from', 'by', 'for'}
+
+
+def tokenize(text):
+    """Lowercased terms of free text; IPs, instance IDs and finding types stay whole"""
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def find_ip_addresses(value):
+    """Every ipAddressV4 value nested anywhere in a dict/list structure, in document order"""
+    found = []
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k == 'ipAddressV4' and isinstance(v, str):
+                found.append(v)
+            else:
+                found.extend(find_ip_addresses(v))
+    elif isinstance(value, list):
+        for item in value:
+            found.extend(find_ip_addresses(item))
+    return found
+
+
+def find_remote_ip(finding):
+    """
+    The remote (malicious) IP of a GuardDuty finding, checking the flattened ProductFields
+    key, then the nested service/action layout, then any ipAddressV4 in ProductFields.
+    """
+    product_fields = finding.get('ProductFields')
+    if not product_fields:
+        return None
+
+    if REMOTE_IP_PRODUCT_FIELD in product_fields:
+        return product_fields[REMOTE_IP_PRODUCT_FIELD]
+
+    action = (product_fields.get('service') or {}).get('action') or {}
+    remote_ip = ((action.get('networkConnectionAction') or {}).get('remoteIpDetails') or {}).get('ipAddressV4')
+    if remote_ip:
+        return remote_ip
+
+    addresses = find_ip_addresses(product_fields)
+    return addresses[0] if addresses else None
+
+
+def instance_ids(finding):
+    """Instance IDs of the finding's EC2 resources, as the remediation code reads them"""
+    return [
+        resource.get('Id', '').split('/')[-1]
+        for resource in finding.get('Resources', [])
+        if resource.get('Type') == 'AwsEc2Instance' and resource.get('Id')
+    ]
+
+
+def extract_terms(finding):
+    """
+    Searchable terms of a finding: its IPs, instance IDs, whole finding types and title
+    words. Types are not split into parts; segments like `ttps` or `ec2` would match nearly
+    every finding.
+    """
+    terms = set()
+    if not finding:
+        return terms
+
+    remote_ip = find_remote_ip(finding)
+    if remote_ip:
+        terms.add(remote_ip.lower())
+    for address in find_ip_addresses(finding.get('ProductFields') or {}):
+        terms.add(address.lower())
+    remote_ip_details = ((finding.get('Action') or {}).get('NetworkConnectionAction') or {}).get('RemoteIpDetails') or {}
+    if remote_ip_details.get('IpAddressV4'):
+        terms.add(remote_ip_details['IpAddressV4'].lower())
+
+    terms.update(instance_id.lower() for instance_id in instance_ids(finding))
+
+    for finding_type in finding.get('Types') or []:
+        terms.add(finding_type.lower())
+
+    terms.update(tokenize(finding.get('Title')))
+    return terms
+
+
+def query_terms(query):
+    """
+    Terms of a search query. Finding types can contain spaces ("TTPs/Command and Control/...");
+    a query that looks like a type is looked up as one term rather than word by word.
+    """
+    query = (query or '').strip().lower()
+    if ' ' in query and ('/' in query or ':' in query):
+        return [query]
+    return sorted(set(tokenize(query)))
+
+
+def trim_postings(postings):
+    """Keep a term's newest MAX_POSTINGS_PER_TERM postings"""
+    if len(postings) <= MAX_POSTINGS_PER_TERM:
+        return postings
+    newest = sorted(postings.items(), key=lambda item: item[1] or '', reverse=True)[:MAX_POSTINGS_PER_TERM]
+    return dict(newest)
+
+
+def search_shard_key(term):
+    shard = int(hashlib.sha1(term.encode('utf-8')).hexdigest(), 16) % SEARCH_SHARD_COUNT
+    return f"{SEARCH_PREFIX}{shard:03d}.json"
+
+
+def group_by_shard(terms):
+    shards = {}
+    for term in terms:
+        shards.setdefault(search_shard_key(term), []).append(term)
+    return shards
+
+
+def update_postings(s3_client, bucket, additions=(), removals=()):
+    """
+    Write-through for any number of findings at once: post each (key, finding, timestamp)
+    of `additions` under its terms and drop each (key, finding) of `removals`, with one
+    conditional write per shard touched. Returns the keys whose shards could not be written.
+    """
+    changes = {}
+    for key, finding in removals:
+        for term in extract_terms(finding):
+            changes.setdefault(search_shard_key(term), {}).setdefault(term, ({}, set()))[1].add(key)
+    for key, finding, timestamp in additions:
+        for term in extract_terms(finding):
+            changes.setdefault(search_shard_key(term), {}).setdefault(term, ({}, set()))[0][key] = timestamp
+
+    def update(shard_key, shard_terms):
+        def mutate(shard):
+            shard = shard or {'version': SEARCH_VERSION, 'terms': {}}
+            changed = False
+            for term, (added, removed) in shard_terms.items():
+                postings = shard['terms'].get(term, {})
+                for key in removed:
+                    if key in postings and key not in added:
+                        del postings[key]
+                        changed = True
+                if added:
+                    postings.update(added)
+                    changed = True
+                if postings:
+                    shard['terms'][term] = trim_postings(postings)
+                else:
+                    shard['terms'].pop(term, None)
+            return shard if changed else None
+        try:
+            update_json(s3_client, bucket, shard_key, mutate)
+        except Exception as e:
+            logger.error(f"Failed to update search shard {shard_key}: {str(e)}")
+            return {key for added, removed in shard_terms.values() for key in list(added) + list(removed)}
+        return set()
+
+    failed = set()
+    for keys in fan_out(lambda item: update(*item), changes.items()):
+        failed |= keys
+    return failed
+
+
+def index_terms(s3_client, bucket, key, finding, timestamp):
+    """Write-through: post a stored finding under each of its terms, one conditional write per shard"""
+    if update_postings(s3_client, bucket, additions=[(key, finding, timestamp)]):
+        raise RuntimeError(f"Could not update the search index for {key}")
+    return extract_terms(finding)
+
+
+def unindex_terms(s3_client, bucket, key, finding):
+    """Write-through: drop a deleted finding's postings"""
+    if update_postings(s3_client, bucket, removals=[(key, finding)]):
+        raise RuntimeError(f"Could not update the search index for {key}")
+
+
+def search_postings(s3_client, bucket, query):
+    """
+    Keys of the findings matching every term of a query, as {key: timestamp}. Each distinct
+    shard is read once, concurrently. Only a term's newest MAX_POSTINGS_PER_TERM findings
+    can match.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return terms, {}
+
+    shards = group_by_shard(terms)
+    documents = dict(zip(shards, fan_out(lambda shard_key: read_json(s3_client, bucket, shard_key)[0], shards)))
+
+    matches = None
+    for shard_key, shard_terms in shards.items():
+        postings = (documents[shard_key] or {}).get('terms', {})
+        for term in shard_terms:
+            found = postings.get(term, {})
+            matches = dict(found) if matches is None else {k: v for k, v in matches.items() if k in found}
+    return terms, matches or {}
+
+
+def add_to_search_shards(shards, key, finding, timestamp):
+    """Post a finding into an in-memory set of search shards, for full rebuilds"""
+    for term in extract_terms(finding):
+        shard = shards.setdefault(search_shard_key(term), {'version': SEARCH_VERSION, 'terms': {}})
+        shard['terms'].setdefault(term, {})[key] = timestamp
+
+
+def replace_search_shards(s3_client, bucket, shards):
+    """Write a freshly built set of search shards and delete the ones no longer needed"""
+    for shard in shards.values():
+        shard['terms'] = {term: trim_postings(postings) for term, postings in shard['terms'].items()}
+    fan_out(lambda item: write_json(s3_client, bucket, item[0], item[1]), shards.items())
+
+    stale = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=SEARCH_PREFIX):
+        stale.extend(obj['Key'] for obj in page.get('Contents', []) if obj['Key'] not in shards)
+    for shard_key in stale:
+        s3_client.delete_object(Bucket=bucket, Key=shard_key)
+
+    logger.info(f"Rebuilt {len(shards)} search shards, removed {len(stale)} stale shards")
+    return {'searchShardsWritten': len(shards), 'searchShardsRemoved': len(stale)}
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+import logging
+
+from botocore.exceptions import ClientError
+
+from s3_json import NOT_FOUND_ERROR_CODES
+from finding_index import iter_summary_shards
+from finding_query import past_deadline
+
+logger = logging.getLogger()
+
+SNAPSHOT_KEY = 'snapshots/findings.sqlite'
+SNAPSHOT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE findings (
+    key TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    severity TEXT,
+    account_id TEXT,
+    type TEXT,
+    remediated INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX findings_order ON findings (date, last_modified, key);
+CREATE INDEX findings_account ON findings (account_id, date, last_modified, key);
+CREATE INDEX findings_severity ON findings (severity, date, last_modified, key);
+CREATE INDEX findings_remediated ON findings (remediated, date);
+CREATE INDEX findings_type ON findings (type, date);
+CREATE TABLE snapshot (version INTEGER, built_at REAL, findings INTEGER);
+"""
+
+
+def build_snapshot(s3_client, bucket, path):
+    """Write every index summary into a fresh SQLite database at path"""
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(SCHEMA)
+        count = 0
+        for _, summaries in iter_summary_shards(s3_client, bucket, descending=False):
+            connection.executemany(
+                'INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(
+                    summary['key'],
+                    summary['date'],
+                    summary['lastModified'],
+                    summary.get('severity'),
+                    summary.get('accountId'),
+                    summary.get('type'),
+                    1 if (summary.get('remediationStatus') or {}).get('remediated') else 0,
+                    json.dumps(summary, separators=(',', ':'))
+                ) for summary in summaries]
+            )
+            count += len(summaries)
+        connection.execute('INSERT INTO snapshot VALUES (?, ?, ?)', (SNAPSHOT_VERSION, time.time(), count))
+        connection.commit()
+        connection.execute('VACUUM')
+    finally:
+        connection.close()
+    return count
+
+
+def publish_snapshot(s3_client, bucket):
+    """Build the snapshot from the summary index and upload it for DashboardFindings to pick up"""
+    started = time.monotonic()
+    path = os.path.join(tempfile.gettempdir(), 'findings-build.sqlite')
+    count = build_snapshot(s3_client, bucket, path)
+    with open(path, 'rb') as f:
+        body = f.read()
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=SNAPSHOT_KEY,
+        Body=body,
+        ContentType='application/vnd.sqlite3',
+        ServerSideEncryption='AES256'
+    )
+    os.remove(path)
+    elapsed_ms = (time.monotonic() - started) * 1000
+    logger.info(f"Published snapshot of {count} findings ({len(body)} bytes) in {elapsed_ms:.0f} ms")
+    return {'findings': count, 'bytes': len(body), 'elapsedMs': round(elapsed_ms)}
+
+
+def where_clause(query, descending=True, after=None):
+    """Translate a finding_query query (and an optional resume position) into SQL"""
+    clauses = []
+    params = []
+
+    def any_of(column, values):
+        clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+        params.extend(sorted(values))
+
+    if query['severities']:
+        any_of('severity', query['severities'])
+    if query['accounts']:
+        any_of('account_id', query['accounts'])
+    if query['types']:
+        any_of('type', query['types'])
+    if query['dateFrom']:
+        clauses.append('date >= ?')
+        params.append(query['dateFrom'])
+    if query['dateTo']:
+        clauses.append('date <= ?')
+        params.append(query['dateTo'])
+    if query['remediated'] is not None:
+        clauses.append('remediated = ?')
+        params.append(1 if query['remediated'] else 0)
+    if after:
+        clauses.append(f"(date, last_modified, key) {'<' if descending else '>'} (?, ?, ?)")
+        params.extend(after)
+
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+class FindingSnapshot:
+    """
+    Read side of the published snapshot. The database is downloaded to /tmp on first use
+    and re-downloaded only when the object's ETag changes, checked at most every
+    `check_interval` seconds, so warm invocations answer queries without touching S3.
+    """
+
+    def __init__(self, s3_client, bucket, check_interval, directory=None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.check_interval = check_interval
+        self.directory = directory or tempfile.gettempdir()
+        self.connection = None
+        self.etag = None
+        self.path = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    @property
+    def version(self):
+        return f"snapshot:{self.etag}"
+
+    def refresh(self):
+        """Make sure the local copy is current; returns False when no snapshot is published"""
+        with self.lock:
+            if self.connection and time.monotonic() - self.checked_at < self.check_interval:
+                return True
+            self.checked_at = time.monotonic()
+
+            try:
+                head = self.s3_client.head_object(Bucket=self.bucket, Key=SNAPSHOT_KEY)
+            except ClientError as e:
+                if e.response['Error']['Code'] in NOT_FOUND_ERROR_CODES:
+                    return self.connection is not None
+                raise
+            if head['ETag'] == self.etag:
+                return True
+
+            started = time.monotonic()
+            path = os.path.join(self.directory, 'findings-' + head['ETag'].strip('"') + '.sqlite')
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=SNAPSHOT_KEY)
+            with open(path, 'wb') as f:
+                for chunk in response['Body'].iter_chunks(1024 * 1024):
+                    f.write(chunk)
+
+            previous_path = self.path
+            if self.connection:
+                self.connection.close()
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.etag = response['ETag']
+            self.path = path
+            if previous_path and previous_path != path:
+                os.remove(previous_path)
+
+            logger.info(f"Loaded findings snapshot {self.etag} in {(time.monotonic() - started) * 1000:.1f} ms")
+            return True
+
+    def run_query(self, query, descending=True, after=None, stats=None, deadline=None):
+        """Same contract as finding_query.run_query, answered from the local database"""
+        where, params = where_clause(query, descending, after)
+        direction = 'DESC' if descending else 'ASC'
+        cursor = self.connection.execute(
+            f"SELECT date, last_modified, key, summary FROM findings{where} "
+            f"ORDER BY date {direction}, last_modified {direction}, key {direction}",
+            params
+        )
+        for row in cursor:
+            if stats is not None:
+                if past_deadline(deadline, stats):
+                    stats['partial'] = True
+                    return
+                stats['examined'] += 1
+                stats['matched'] += 1
+                stats['position'] = (row['date'], row['last_modified'], row['key'])
+            yield json.loads(row['summary'])
+
+    def stats(self, account_id=None, date_from=None, date_to=None):
+        """Counts in the shape of finding_stats.aggregate_rollups"""
+        query = {
+            'severities': None, 'accounts': {account_id} if account_id else None, 'types': None,
+            'dateFrom': date_from, 'dateTo': date_to, 'remediated': None
+        }
+        where, params = where_clause(query)
+        rows = self.connection.execute(
+            f"SELECT date, account_id, severity, remediated, COUNT(*) AS count FROM findings{where} "
+            f"GROUP BY date, account_id, severity, remediated",
+            params
+        ).fetchall()
+
+        stats = {
+            'total': 0, 'bySeverity': {}, 'byDay': {}, 'byAccount': {}, 'byAccountSeverity': {},
+            'remediation': {'remediated': 0, 'pending': 0, 'pendingBySeverity': {}}
+        }
+        for row in rows:
+            account = row['account_id'] or 'unknown'
+            severity = row['severity']
+            stats['total'] += row['count']
+            stats['bySeverity'][severity] = stats['bySeverity'].get(severity, 0) + row['count']
+            stats['byDay'][row['date']] = stats['byDay'].get(row['date'], 0) + row['count']
+            stats['byAccount'][account] = stats['byAccount'].get(account, 0) + row['count']
+            account_severity = stats['byAccountSeverity'].setdefault(account, {})
+            account_severity[severity] = account_severity.get(severity, 0) + row['count']
+            stats['remediation']['remediated' if row['remediated'] else 'pending'] += row['count']
+            if not row['remediated']:
+                pending = stats['remediation']['pendingBySeverity']
+                pending[severity] = pending.get(severity, 0) + row['count']
+        return stats
+
+
+def benchmark(s3_client, bucket, iterations):
+    """Time the same queries against the S3 index scan and a local snapshot"""
+    from finding_query import build_query, run_query
+    from finding_stats import load_stats
+
+    snapshot = FindingSnapshot(s3_client, bucket, check_interval=3600)
+    if not snapshot.refresh():
+        publish_snapshot(s3_client, bucket)
+        snapshot.refresh()
+
+    sample = next(snapshot.run_query(build_query()), None) or {}
+    queries = {
+        'all': build_query(),
+        'account': build_query(accounts=[sample.get('accountId')]),
+        'severity': build_query(severities=[sample.get('severity')]),
+        'pending': build_query(remediated=False),
+        'day': build_query(date_from=sample.get('date'), date_to=sample.get('date'))
+    }
+
+    def timed(fn):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            result = fn()
+        return (time.perf_counter() - started) * 1000 / iterations, result
+
+    results = {}
+    for name, query in queries.items():
+        s3_ms, s3_rows = timed(lambda: list(run_query(s3_client, bucket, query)))
+        snapshot_ms, snapshot_rows = timed(lambda: list(snapshot.run_query(query)))
+        results[name] = {
+            's3Ms': round(s3_ms, 2), 'snapshotMs': round(snapshot_ms, 2),
+            's3Rows': len(s3_rows), 'snapshotRows': len(snapshot_rows)
+        }
+    s3_ms, _ = timed(lambda: load_stats(s3_client, bucket))
+    snapshot_ms, _ = timed(lambda: snapshot.stats())
+    results['stats'] = {'s3Ms': round(s3_ms, 2), 'snapshotMs': round(snapshot_ms, 2)}
+    return results
+
+
+def main():
+    from aws_clients import get_client
+
+    parser = argparse.ArgumentParser(description='Build or benchmark the SOARCERY findings snapshot')
+    parser.add_argument('command', choices=['publish', 'benchmark'])
+    parser.add_argument('--bucket', default='soarcery')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    s3_client = get_client('s3')
+    if args.command == 'publish':
+        result = publish_snapshot(s3_client, args.bucket)
+    else:
+        result = benchmark(s3_client, args.bucket, args.iterations)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
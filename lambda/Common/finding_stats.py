@@ -0,0 +1,131 @@
+import logging
+
+from s3_json import read_json, write_json, update_json, fan_out
+
+logger = logging.getLogger()
+
+STATS_PREFIX = 'finding-stats/'
+STATS_VERSION = 2
+
+
+def stats_key_for_date(date):
+    """Rollups are one small document per day: finding-stats/YYYY/MM/DD.json"""
+    return f"{STATS_PREFIX}{date}.json"
+
+
+def build_rollup(date, summaries, revision=0):
+    """Count a day's summaries by account, severity and remediation state"""
+    accounts = {}
+    for summary in summaries:
+        counts = accounts.setdefault(summary.get('accountId') or 'unknown', {
+            'total': 0,
+            'severity': {},
+            'remediated': 0,
+            'pending': 0,
+            'pendingSeverity': {}
+        })
+        counts['total'] += 1
+        counts['severity'][summary['severity']] = counts['severity'].get(summary['severity'], 0) + 1
+        if (summary.get('remediationStatus') or {}).get('remediated'):
+            counts['remediated'] += 1
+        else:
+            counts['pending'] += 1
+            counts['pendingSeverity'][summary['severity']] = counts['pendingSeverity'].get(summary['severity'], 0) + 1
+
+    return {'version': STATS_VERSION, 'date': date, 'revision': revision, 'accounts': accounts}
+
+
+def update_rollup(s3_client, bucket, date, shard):
+    """
+    Recompute one day's rollup from the day's index shard that was just written.
+
+    Only the affected day is touched on each write. The shard revision makes the update
+    monotonic, so a slower writer can't replace a newer rollup with an older one.
+    """
+    revision = shard.get('revision', 0)
+    rollup = build_rollup(date, shard.get('findings', {}).values(), revision)
+
+    def mutate(current):
+        if current and current.get('revision', 0) >= revision:
+            return None
+        return rollup
+
+    update_json(s3_client, bucket, stats_key_for_date(date), mutate)
+
+
+def list_rollup_dates(s3_client, bucket, date_from=None, date_to=None):
+    """
+    List the rollup dates within an inclusive YYYY/MM/DD range.
+
+    Rollup keys sort by date, so like the index shard listing this starts right before
+    date_from and stops at the first key after date_to rather than listing all history.
+    """
+    request = {'Bucket': bucket, 'Prefix': STATS_PREFIX}
+    if date_from:
+        request['StartAfter'] = f"{STATS_PREFIX}{date_from}"
+    end = stats_key_for_date(date_to) if date_to else None
+
+    dates = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**request):
+        for obj in page.get('Contents', []):
+            if end and obj['Key'] > end:
+                return dates
+            if obj['Key'].endswith('.json'):
+                dates.append(obj['Key'][len(STATS_PREFIX):-len('.json')])
+    return dates
+
+
+def aggregate_rollups(rollups, account_id=None):
+    """Merge daily rollups into the chart payload, optionally for a single account"""
+    stats = {
+        'total': 0,
+        'bySeverity': {},
+        'byDay': {},
+        'byAccount': {},
+        'byAccountSeverity': {},
+        'remediation': {'remediated': 0, 'pending': 0, 'pendingBySeverity': {}}
+    }
+
+    for rollup in rollups:
+        if not rollup:
+            continue
+        for account, counts in rollup.get('accounts', {}).items():
+            if account_id and account != account_id:
+                continue
+            stats['total'] += counts['total']
+            stats['byDay'][rollup['date']] = stats['byDay'].get(rollup['date'], 0) + counts['total']
+            stats['byAccount'][account] = stats['byAccount'].get(account, 0) + counts['total']
+            stats['remediation']['remediated'] += counts['remediated']
+            stats['remediation']['pending'] += counts['pending']
+            account_severity = stats['byAccountSeverity'].setdefault(account, {})
+            for severity, count in counts['severity'].items():
+                stats['bySeverity'][severity] = stats['bySeverity'].get(severity, 0) + count
+                account_severity[severity] = account_severity.get(severity, 0) + count
+            # Version 1 rollups predate pendingSeverity; rebuild-stats fills it in
+            pending_by_severity = stats['remediation']['pendingBySeverity']
+            for severity, count in counts.get('pendingSeverity', {}).items():
+                pending_by_severity[severity] = pending_by_severity.get(severity, 0) + count
+
+    return stats
+
+
+def load_stats(s3_client, bucket, account_id=None, date_from=None, date_to=None):
+    """Aggregate the daily rollups in a date range, reading them concurrently"""
+    dates = list_rollup_dates(s3_client, bucket, date_from, date_to)
+    rollups = fan_out(lambda date: read_json(s3_client, bucket, stats_key_for_date(date))[0], dates)
+    return aggregate_rollups(rollups, account_id)
+
+
+def rebuild_rollups(s3_client, bucket, day_shards):
+    """Regenerate every rollup from {date: shard} and drop rollups for days without a shard"""
+    for date, shard in day_shards.items():
+        rollup = build_rollup(date, shard.get('findings', {}).values(), shard.get('revision', 0))
+        write_json(s3_client, bucket, stats_key_for_date(date), rollup)
+
+    stale = [date for date in list_rollup_dates(s3_client, bucket) if date not in day_shards]
+    for date in stale:
+        s3_client.delete_object(Bucket=bucket, Key=stats_key_for_date(date))
+
+    logger.info(f"Rebuilt {len(day_shards)} daily rollups, removed {len(stale)} stale rollups")
+    return {'rollupsWritten': len(day_shards), 'rollupsRemoved': len(stale)}
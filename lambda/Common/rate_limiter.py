@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+import logging
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+# The buckets live in the container, so they pace the calls of one Lambda container only:
+# N concurrent RemediationWorker containers can together make N times these rates. The
+# account-wide limit comes from the worker's event source MaximumConcurrency (SQS.json);
+# set these to the account's API quota divided by it.
+
+# Sustained calls per second and burst size per (account, region, API family). EC2 meters
+# its non-mutating and mutating actions separately and SSM's send_command is limited on its
+# own, so each gets a bucket. API_RATE_LIMITS overrides entries as {"ec2:mutate": [rate, burst]}.
+API_RATE_LIMITS = {
+    'ec2:describe': (20.0, 50),
+    'ec2:mutate': (5.0, 20),
+    'ssm:describe': (10.0, 20),
+    'ssm:mutate': (5.0, 10),
+    'ssm:command': (3.0, 5)
+}
+API_RATE_LIMITS.update({
+    family: tuple(limits) for family, limits in json.loads(os.environ.get('API_RATE_LIMITS', '{}')).items()
+})
+DEFAULT_RATE_LIMIT = (5.0, 10)
+
+# Error codes that mean a bucket's rate is too high for the account right now
+THROTTLING_ERROR_CODES = ('Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException')
+
+# A throttled bucket halves its rate, down to this fraction of the configured one, and each
+# successful call wins back this fraction of it
+MIN_RATE_FRACTION = 0.1
+RECOVERY_FRACTION = 0.05
+
+# Waiting calls are served by severity: a critical finding's calls go before any low one's
+PRIORITIES = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3, 'informational': 4, 'unknown': 5}
+
+# Client methods that don't call the API, or page through it with calls of their own
+PASSTHROUGH_METHODS = ('get_paginator', 'get_waiter', 'can_paginate', 'close', 'generate_presigned_url')
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+_tickets = itertools.count()
+
+
+def api_family(service, operation):
+    """The bucket an operation draws from: reads, writes, or SSM commands"""
+    if service == 'ssm' and operation == 'send_command':
+        return 'ssm:command'
+    if operation.startswith(('describe_', 'get_', 'list_')):
+        return f"{service}:describe"
+    return f"{service}:mutate"
+
+
+class TokenBucket:
+    """
+    A token bucket whose waiting callers are served in priority order, then arrival order.
+    Throttling responses halve its rate; successful calls restore it gradually. Priority
+    only orders threads of this container waiting on the same bucket; RemediationWorker
+    orders its batch by severity itself.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.condition = threading.Condition()
+        self.waiting = []
+        self.stats = {'calls': 0, 'queued': 0, 'waitMs': 0.0, 'maxWaitMs': 0.0, 'throttled': 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority):
+        """Block until a token is free and no higher-priority caller is waiting for it"""
+        started = time.monotonic()
+        ticket = (priority, next(_tickets))
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            while True:
+                self._refill()
+                if self.waiting[0] == ticket and self.tokens >= 1:
+                    break
+                # The caller ahead takes the next token and wakes the rest; the head of the
+                # line sleeps until that token has accrued
+                timeout = (1 - self.tokens) / self.rate if self.waiting[0] == ticket else None
+                self.condition.wait(timeout)
+            heapq.heappop(self.waiting)
+            self.tokens -= 1
+            self.condition.notify_all()
+
+            waited_ms = (time.monotonic() - started) * 1000
+            self.stats['calls'] += 1
+            if waited_ms >= 1:
+                self.stats['queued'] += 1
+            self.stats['waitMs'] += waited_ms
+            self.stats['maxWaitMs'] = max(self.stats['maxWaitMs'], waited_ms)
+
+    def throttled(self):
+        with self.condition:
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.stats['throttled'] += 1
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            with self.condition:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+
+
+def get_bucket(account_id, region, family):
+    cache_key = (account_id, region, family)
+    bucket = _buckets.get(cache_key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(cache_key)
+            if bucket is None:
+                rate, burst = API_RATE_LIMITS.get(family, DEFAULT_RATE_LIMIT)
+                bucket = _buckets[cache_key] = TokenBucket(rate, burst)
+    return bucket
+
+
+class RateLimitedClient:
+    """
+    Wraps a boto3 client so every API call first takes a token from the bucket of its
+    account, region and API family, at the priority of the finding being remediated.
+    Throttling errors still reach the caller once botocore's own retries are exhausted,
+    but they slow the bucket down for every later call.
+    """
+
+    def __init__(self, client, account_id, severity=None):
+        self._client = client
+        self._account_id = account_id
+        self._priority = PRIORITIES.get((severity or '').lower(), PRIORITIES['medium'])
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or name in PASSTHROUGH_METHODS or not callable(attr):
+            return attr
+
+        meta = self._client.meta
+        bucket = get_bucket(self._account_id, meta.region_name, api_family(meta.service_model.service_name, name))
+
+        def call(*args, **kwargs):
+            bucket.acquire(self._priority)
+            try:
+                response = attr(*args, **kwargs)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+                    bucket.throttled()
+                    logger.warning(f"{name} throttled in {self._account_id}/{meta.region_name}, "
+                                   f"slowing to {bucket.rate:.1f} calls/s")
+                raise
+            bucket.succeeded()
+            return response
+        return call
+
+
+def limiter_stats():
+    """Per-bucket counters for logging: calls, how many queued and for how long, throttles and current rate"""
+    return {
+        f"{account_id}/{region}/{family}": {
+            **bucket.stats,
+            'waitMs': round(bucket.stats['waitMs'], 1),
+            'maxWaitMs': round(bucket.stats['maxWaitMs'], 1),
+            'rate': round(bucket.rate, 2)
+        }
+        for (account_id, region, family), bucket in list(_buckets.items())
+    }
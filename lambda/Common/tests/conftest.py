@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The shared layer is imported flat, as it is inside the functions
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+import ec2_inventory
+from ec2_inventory import find_instance, refresh_subnet_nacl
+
+
+class EC2:
+    """One region's instances and NACL associations; describe calls are counted per operation"""
+
+    def __init__(self):
+        self.meta = SimpleNamespace(region_name='us-east-1')
+        self.instances = {'i-1': 'subnet-a', 'i-2': 'subnet-a', 'i-3': 'subnet-b'}
+        self.nacls = {'subnet-a': 'acl-1', 'subnet-b': 'acl-2'}
+        self.calls = []
+
+    def describe_instances(self, InstanceIds=None, **kwargs):
+        self.calls.append('describe_instances')
+        ids = InstanceIds or list(self.instances)
+        if any(instance_id not in self.instances for instance_id in ids):
+            raise ClientError({'Error': {'Code': 'InvalidInstanceID.NotFound'}}, 'DescribeInstances')
+        return {'Reservations': [{'Instances': [
+            {'InstanceId': instance_id, 'State': {'Name': 'running'}, 'VpcId': 'vpc-1', 'SubnetId': self.instances[instance_id]}
+            for instance_id in ids
+        ]}]}
+
+    def describe_network_acls(self, Filters=None, **kwargs):
+        self.calls.append('describe_network_acls')
+        subnets = Filters[0]['Values'] if Filters else list(self.nacls)
+        by_nacl = {}
+        for subnet_id in subnets:
+            if subnet_id in self.nacls:
+                by_nacl.setdefault(self.nacls[subnet_id], []).append({'SubnetId': subnet_id})
+        return {'NetworkAcls': [{'NetworkAclId': nacl_id, 'Associations': associations}
+                                for nacl_id, associations in by_nacl.items()]}
+
+
+@pytest.fixture
+def ec2(monkeypatch):
+    monkeypatch.setattr(ec2_inventory, '_inventories', {})
+    return EC2()
+
+
+def test_unknown_instance_is_not_found(ec2):
+    find_instance('111', 'i-1', ec2)
+
+    assert find_instance('111', 'i-gone', ec2) is None
+    # The inventory stays usable afterwards
+    assert find_instance('111', 'i-3', ec2)['naclId'] == 'acl-2'
+
+
+def test_other_describe_errors_still_raise(ec2):
+    find_instance('111', 'i-1', ec2)
+
+    def throttled(**kwargs):
+        raise ClientError({'Error': {'Code': 'RequestLimitExceeded'}}, 'DescribeInstances')
+    ec2.describe_instances = throttled
+
+    with pytest.raises(ClientError):
+        find_instance('111', 'i-new', ec2)
+
+
+def test_refresh_corrects_a_stale_association(ec2):
+    assert find_instance('111', 'i-1', ec2)['naclId'] == 'acl-1'
+    ec2.nacls['subnet-a'] = 'acl-9'
+
+    # Still the cached answer until the association is checked
+    assert find_instance('111', 'i-1', ec2)['naclId'] == 'acl-1'
+    assert refresh_subnet_nacl('111', 'subnet-a', ec2) == 'acl-9'
+
+    ec2.calls.clear()
+    assert find_instance('111', 'i-1', ec2)['naclId'] == 'acl-9'
+    assert find_instance('111', 'i-2', ec2)['naclId'] == 'acl-9'
+    assert find_instance('111', 'i-3', ec2)['naclId'] == 'acl-2'
+    assert ec2.calls == []
+
+
+def test_refresh_of_an_unassociated_subnet(ec2):
+    find_instance('111', 'i-3', ec2)
+    del ec2.nacls['subnet-b']
+
+    assert refresh_subnet_nacl('111', 'subnet-b', ec2) is None
+    assert find_instance('111', 'i-3', ec2)['naclId'] is None
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from finding_archive import write_archive, read_archive, archive_row, finding_from_row, FINDING_COLUMNS
+
+DATE = '2025/05/01'
+ACCOUNT = '111111111111'
+
+
+class RangedBucket:
+    """S3 stub serving byte ranges the way S3 does, recording every range handed out"""
+
+    def __init__(self):
+        self.objects = {}
+        self.ranges = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+        return {'ETag': '"1"'}
+
+    def get_object(self, Bucket, Key, Range=None):
+        data = self.objects[Key]
+        if Range is None:
+            self.ranges.append((0, len(data) - 1))
+            return {'Body': io.BytesIO(data)}
+        first, last = Range[len('bytes='):].split('-')
+        if first:
+            first, last = int(first), min(int(last), len(data) - 1)
+        else:
+            first, last = max(0, len(data) - int(last)), len(data) - 1
+        self.ranges.append((first, last))
+        return {'Body': io.BytesIO(data[first:last + 1]), 'ContentRange': f"bytes {first}-{last}/{len(data)}"}
+
+    def bytes_read(self):
+        return sum(last - first + 1 for first, last in self.ranges)
+
+
+def finding(n):
+    return {
+        'Id': f"f{n}",
+        'Title': f"finding {n}",
+        # Large, poorly compressible columns the scalar reads should never fetch
+        'Description': ''.join(f"{n * 7919 + i:x}" for i in range(2000)),
+        'Resources': [{'Id': f"i-{n}", 'Region': 'us-east-1', 'Details': {'tags': [f"{n}-{i}" for i in range(200)]}}],
+        'Severity': {'Label': 'HIGH', 'Normalized': 70}
+    }
+
+
+@pytest.fixture
+def archive():
+    bucket = RangedBucket()
+    rows = [archive_row({'key': f"k{n}", 'findingId': f"f{n}", 'accountId': ACCOUNT, 'severity': 'high'}, finding(n))
+            for n in range(300)]
+    key = write_archive(bucket, 'b', DATE, ACCOUNT, rows)
+    bucket.ranges.clear()
+    return bucket, key
+
+
+def test_scalar_columns_fetch_a_small_part_of_the_file(archive):
+    bucket, key = archive
+
+    rows = read_archive(bucket, 'b', key, ['key', 'severity'])
+
+    assert len(rows) == 300 and rows[0] == {'key': 'k0', 'severity': 'high'}
+    assert bucket.bytes_read() < len(bucket.objects[key]) / 10
+
+
+def test_full_findings_of_selected_keys(archive):
+    bucket, key = archive
+
+    rows = read_archive(bucket, 'b', key, FINDING_COLUMNS, ['k5', 'k250'])
+
+    assert [row['key'] for row in rows] == ['k5', 'k250']
+    assert finding_from_row(rows[1]) == finding(250)
+    # Nearly every column, yet no byte is fetched twice
+    assert bucket.bytes_read() <= len(bucket.objects[key])
+
+
+def test_small_file_is_read_in_one_request():
+    bucket = RangedBucket()
+    key = write_archive(bucket, 'b', DATE, ACCOUNT, [archive_row({'key': 'k0', 'severity': 'low'}, {'Title': 't'})])
+    bucket.ranges.clear()
+
+    assert read_archive(bucket, 'b', key, ['title']) == [{'title': 't'}]
+    assert bucket.ranges == [(0, len(bucket.objects[key]) - 1)]
@@ -0,0 +1,130 @@
+import io
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+import finding_changes
+from finding_changes import record_change, list_changes, parse_since, CHANGES_PREFIX, CHANGE_CREATED, CHANGE_REJECTED
+
+
+class ChangeLog:
+    """S3 stub for the change log: puts, gets and one-page listings with StartAfter/MaxKeys"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode('utf-8')
+        return {'ETag': '"1"'}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key]), 'ETag': '"1"'}
+
+    def list_objects_v2(self, Bucket, Prefix, StartAfter, MaxKeys):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix) and key > StartAfter)
+        return {'Contents': [{'Key': key} for key in keys[:MaxKeys]]}
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime.datetime(2025, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)
+
+    def tick(self, seconds=1):
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now
+    monkeypatch.setattr(finding_changes, 'datetime', SimpleNamespace(
+        datetime=FrozenDatetime, timedelta=datetime.timedelta, timezone=datetime.timezone
+    ))
+    return clock
+
+
+def write(log, clock, count):
+    sequences = []
+    for n in range(count):
+        sequences.append(record_change(log, 'b', CHANGE_CREATED, f"key-{n}", {'key': f"key-{n}"}))
+        clock.tick()
+    return sequences
+
+
+def test_pages_follow_the_last_sequence_returned(clock, monkeypatch):
+    monkeypatch.setattr(finding_changes, 'CHANGE_SETTLE_SECONDS', 0)
+    log = ChangeLog()
+    sequences = write(log, clock, 7)
+
+    seen = []
+    since = '2025-05-01T00:00:00Z'
+    while True:
+        changes, has_more = list_changes(log, 'b', since, 3)
+        seen.extend(change['sequence'] for change in changes)
+        if not has_more:
+            break
+        since = changes[-1]['sequence']
+
+    assert seen == sequences
+
+
+def test_recent_entries_are_held_back_until_they_settle(clock, monkeypatch):
+    monkeypatch.setattr(finding_changes, 'CHANGE_SETTLE_SECONDS', 60)
+    log = ChangeLog()
+    write(log, clock, 3)
+
+    assert list_changes(log, 'b', '2025-05-01T00:00:00Z', 10) == ([], False)
+
+    clock.tick(60)
+    changes, has_more = list_changes(log, 'b', '2025-05-01T00:00:00Z', 10)
+    assert [change['key'] for change in changes] == ['key-0', 'key-1', 'key-2']
+    assert not has_more
+
+
+def test_late_write_behind_a_newer_entry_is_not_skipped(clock, monkeypatch):
+    monkeypatch.setattr(finding_changes, 'CHANGE_SETTLE_SECONDS', 60)
+    log = ChangeLog()
+    started = clock.now
+    write(log, clock, 2)
+    clock.tick(30)
+    assert list_changes(log, 'b', '2025-05-01T00:00:00Z', 10) == ([], False)
+
+    # A writer took its sequence between key-0 and key-1 but its entry only lands now
+    late = finding_changes.new_sequence(started + datetime.timedelta(milliseconds=500))
+    log.put_object('b', f"{CHANGES_PREFIX}{late}.json", '{"sequence": "%s", "key": "late"}' % late)
+    clock.tick(30)
+
+    changes, _ = list_changes(log, 'b', '2025-05-01T00:00:00Z', 10)
+    assert [change['key'] for change in changes] == ['key-0', 'late', 'key-1']
+
+
+def test_tombstones_carry_no_summary(clock, monkeypatch):
+    monkeypatch.setattr(finding_changes, 'CHANGE_SETTLE_SECONDS', 0)
+    log = ChangeLog()
+    record_change(log, 'b', CHANGE_REJECTED, 'key-0', deleted=True)
+    clock.tick()
+
+    changes, _ = list_changes(log, 'b', '2025-05-01T00:00:00Z', 10)
+    assert changes[0]['deleted'] is True
+    assert changes[0]['summary'] is None
+
+
+@pytest.mark.parametrize('since', ['yesterday', '2025-13-01', ''])
+def test_bad_since_values_are_rejected(since):
+    with pytest.raises(ValueError):
+        parse_since(since)
+
+
+def test_since_accepts_sequences_and_timestamps():
+    sequence = finding_changes.new_sequence(datetime.datetime(2025, 5, 1, tzinfo=datetime.timezone.utc))
+
+    assert parse_since(sequence) == f"{CHANGES_PREFIX}{sequence}.json"
+    assert parse_since('2025-05-01T02:00:00+02:00') == f"{CHANGES_PREFIX}20250501T000000000000Z"
@@ -0,0 +1,113 @@
+import io
+import json
+
+from botocore.exceptions import ClientError
+
+import finding_dedup
+from finding_dedup import (
+    claim_finding, confirm_claim, release_claim, dedup_key, FINDING_NEW, FINDING_UPDATED, FINDING_DUPLICATE
+)
+
+FINDING_ID = 'arn:aws:securityhub:us-east-1:111111111111:finding/abc'
+LOW_KEY = "security-hub-findings/low/2025/05/01/111111111111_abc_1.json"
+HIGH_KEY = "security-hub-findings/high/2025/05/02/111111111111_abc_2.json"
+
+
+class ConditionalS3:
+    """One-bucket S3 stub honouring If-Match / If-None-Match"""
+
+    def __init__(self):
+        self.objects = {}
+        self.versions = 0
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        body, etag = self.objects[Key]
+        return {'Body': io.BytesIO(body), 'ETag': etag}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        current = self.objects.get(Key)
+        if (IfNoneMatch == '*' and current) or (IfMatch and (not current or current[1] != IfMatch)):
+            raise ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'PutObject')
+        self.versions += 1
+        self.objects[Key] = (Body.encode('utf-8'), f'"{self.versions}"')
+        return {'ETag': f'"{self.versions}"'}
+
+    def record(self):
+        return json.loads(self.objects[dedup_key(FINDING_ID)][0])
+
+
+def finding(updated_at='2025-05-01T00:00:00Z', label='LOW'):
+    return {'Id': FINDING_ID, 'UpdatedAt': updated_at, 'Severity': {'Label': label, 'Normalized': 30}}
+
+
+def store(s3, version, key):
+    """Claim and confirm, as GuardDutyLogs does around a successful put"""
+    claim = claim_finding(s3, 'b', version, key)
+    confirm_claim(s3, 'b', FINDING_ID, claim['fingerprint'], claim['key'])
+    return claim
+
+
+def test_confirmed_version_is_a_duplicate_and_updates_keep_their_key():
+    s3 = ConditionalS3()
+
+    assert store(s3, finding(), LOW_KEY)['status'] == FINDING_NEW
+    assert claim_finding(s3, 'b', finding(), 'other')['status'] == FINDING_DUPLICATE
+
+    update = store(s3, finding('2025-05-02T00:00:00Z'), 'security-hub-findings/low/2025/05/02/x_abc_3.json')
+    assert update['status'] == FINDING_UPDATED
+    assert update['key'] == LOW_KEY and update['previous']['key'] == LOW_KEY
+    assert s3.record()['updates'] == 1
+
+
+def test_severity_change_moves_the_finding():
+    s3 = ConditionalS3()
+    store(s3, finding(), LOW_KEY)
+
+    moved = store(s3, finding('2025-05-02T00:00:00Z', 'HIGH'), HIGH_KEY)
+
+    assert moved['key'] == HIGH_KEY
+    assert s3.record()['key'] == HIGH_KEY
+
+
+def test_a_claim_that_was_never_stored_blocks_redelivery_only_until_it_goes_stale(monkeypatch):
+    s3 = ConditionalS3()
+    # The invocation dies between claiming and storing: no confirm, no release
+    claim_finding(s3, 'b', finding(), LOW_KEY)
+
+    assert claim_finding(s3, 'b', finding(), LOW_KEY)['status'] == FINDING_DUPLICATE
+
+    monkeypatch.setattr(finding_dedup, 'CLAIM_TIMEOUT_SECONDS', 0)
+    redelivery = claim_finding(s3, 'b', finding(), LOW_KEY)
+    assert redelivery['status'] == FINDING_NEW
+
+
+def test_release_drops_only_its_own_claim():
+    s3 = ConditionalS3()
+    store(s3, finding(), LOW_KEY)
+    first = claim_finding(s3, 'b', finding('2025-05-02T00:00:00Z'), LOW_KEY)
+    # A concurrent delivery of a newer version claims in between
+    second = claim_finding(s3, 'b', finding('2025-05-03T00:00:00Z'), LOW_KEY)
+
+    release_claim(s3, 'b', FINDING_ID, first['fingerprint'])
+
+    assert s3.record()['pending']['fingerprint'] == second['fingerprint']
+    release_claim(s3, 'b', FINDING_ID, second['fingerprint'])
+    record = s3.record()
+    assert 'pending' not in record
+    # The stored version is untouched, so the next delivery of either is an update again
+    assert record['key'] == LOW_KEY
+    assert claim_finding(s3, 'b', finding('2025-05-02T00:00:00Z'), LOW_KEY)['status'] == FINDING_UPDATED
+
+
+def test_confirm_after_a_newer_claim_leaves_it_pending():
+    s3 = ConditionalS3()
+    first = claim_finding(s3, 'b', finding(), LOW_KEY)
+    second = claim_finding(s3, 'b', finding('2025-05-02T00:00:00Z'), LOW_KEY)
+
+    confirm_claim(s3, 'b', FINDING_ID, first['fingerprint'], LOW_KEY)
+
+    record = s3.record()
+    assert 'key' not in record
+    assert record['pending']['fingerprint'] == second['fingerprint']
@@ -0,0 +1,126 @@
+import io
+import json
+import datetime
+import itertools
+
+from botocore.exceptions import ClientError
+
+from finding_index import build_summary, shard_keys_for_summary
+from finding_query import build_query, plan_query, run_query, sort_key, new_query_stats
+
+
+class ShardBucket:
+    """Index shards in memory; listings honour Prefix and StartAfter and are recorded"""
+
+    def __init__(self):
+        self.objects = {}
+        self.listings = []
+        self.reads = []
+
+    def get_object(self, Bucket, Key):
+        self.reads.append(Key)
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key]), 'ETag': '"1"'}
+
+    def get_paginator(self, operation):
+        bucket = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, StartAfter=''):
+                bucket.listings.append((Prefix, StartAfter))
+                keys = sorted(key for key in bucket.objects if key.startswith(Prefix) and key > StartAfter)
+                yield {'Contents': [{'Key': key} for key in keys]}
+        return Paginator()
+
+    def add(self, summary):
+        for shard_key in shard_keys_for_summary(summary):
+            shard = json.loads(self.objects.get(shard_key, b'{"findings": {}}'))
+            shard['findings'][summary['key']] = summary
+            self.objects[shard_key] = json.dumps(shard).encode('utf-8')
+
+
+ACCOUNTS = ['111111111111', '222222222222', '333333333333']
+SEVERITIES = ['high', 'low']
+DAYS = ['2025/05/01', '2025/05/02', '2025/05/03', '2025/05/04']
+
+
+def populate():
+    bucket = ShardBucket()
+    summaries = []
+    for n, (day, account, severity) in enumerate(itertools.product(DAYS, ACCOUNTS, SEVERITIES)):
+        key = f"security-hub-findings/{severity}/{day}/{account}_f{n}_u{n}.json"
+        finding = {'Types': ['T1' if n % 3 else 'T2'], 'remediationStatus': {'remediated': n % 2 == 0}}
+        summary = build_summary(key, finding, datetime.datetime(2025, 5, 1, n % 24, tzinfo=datetime.timezone.utc))
+        bucket.add(summary)
+        summaries.append(summary)
+    return bucket, summaries
+
+
+def expected(summaries, query, descending=True):
+    matching = [
+        s for s in summaries
+        if (not query['accounts'] or s['accountId'] in query['accounts'])
+        and (not query['severities'] or s['severity'] in query['severities'])
+        and (not query['dateFrom'] or s['date'] >= query['dateFrom'])
+        and (not query['dateTo'] or s['date'] <= query['dateTo'])
+        and (query['remediated'] is None or s['remediationStatus']['remediated'] == query['remediated'])
+        and (not query['types'] or s['type'] in query['types'])
+    ]
+    return sorted(matching, key=sort_key, reverse=descending)
+
+
+def test_plan_pushes_accounts_down_to_their_shards():
+    bucket, _ = populate()
+    plan = plan_query(bucket, 'b', build_query(accounts=ACCOUNTS[:2], date_from='2025/05/02', date_to='2025/05/03'))
+
+    assert plan['prefixes'] == 2
+    assert sorted(plan['days']) == ['2025/05/02', '2025/05/03']
+    assert all(key.startswith('by-account/') for keys in plan['days'].values() for key in keys)
+    # The listing starts at the first day instead of walking each account's history
+    assert all(start.endswith('2025/05/02') for _, start in bucket.listings)
+
+
+def test_plan_for_a_single_day_needs_no_listing():
+    bucket, _ = populate()
+    plan = plan_query(bucket, 'b', build_query(date_from='2025/05/03', date_to='2025/05/03'))
+
+    assert plan['days'] == {'2025/05/03': ['finding-index/2025/05/03.json']}
+    assert bucket.listings == []
+
+
+def test_run_query_applies_every_predicate_in_sort_order():
+    bucket, summaries = populate()
+    query = build_query(severities=['high'], accounts=ACCOUNTS[::2], date_from='2025/05/02',
+                        remediated=True, types=['T1'])
+
+    for descending in (True, False):
+        results = list(run_query(bucket, 'b', query, descending))
+        assert results and results == expected(summaries, query, descending)
+
+
+def test_resuming_after_each_position_walks_the_whole_result_once():
+    bucket, summaries = populate()
+    query = build_query(severities=['low'])
+
+    for descending in (True, False):
+        pages = []
+        after = None
+        while True:
+            page = list(itertools.islice(run_query(bucket, 'b', query, descending, after), 5))
+            if not page:
+                break
+            pages.extend(page)
+            after = sort_key(page[-1])
+        assert pages == expected(summaries, query, descending)
+
+
+def test_stopping_early_leaves_later_days_unread():
+    bucket, _ = populate()
+    stats = new_query_stats()
+
+    next(run_query(bucket, 'b', build_query(), stats=stats))
+
+    assert stats['shardsPlanned'] == len(DAYS)
+    assert stats['shardsScanned'] == 1
+    assert bucket.reads == ['finding-index/2025/05/04.json']
@@ -0,0 +1,74 @@
+import io
+import json
+
+from finding_stats import list_rollup_dates, load_stats, build_rollup, stats_key_for_date
+
+DAYS = ['2025/04/30', '2025/05/01', '2025/05/02', '2025/05/03', '2025/05/04']
+
+
+class RollupBucket:
+    """Rollups in memory; listings honour StartAfter and record how many keys were handed out"""
+
+    def __init__(self):
+        self.objects = {}
+        self.listed = 0
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[Key]), 'ETag': '"1"'}
+
+    def get_paginator(self, operation):
+        bucket = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, StartAfter=''):
+                keys = sorted(key for key in bucket.objects if key.startswith(Prefix) and key > StartAfter)
+                # One key per page, so stopping early shows up in the count
+                for key in keys:
+                    bucket.listed += 1
+                    yield {'Contents': [{'Key': key}]}
+        return Paginator()
+
+    def add(self, date, summaries):
+        self.objects[stats_key_for_date(date)] = json.dumps(build_rollup(date, summaries)).encode('utf-8')
+
+
+def summary(account, severity, remediated=False):
+    return {'accountId': account, 'severity': severity, 'remediationStatus': {'remediated': remediated}}
+
+
+def populate():
+    bucket = RollupBucket()
+    for date in DAYS:
+        bucket.add(date, [summary('111', 'high'), summary('111', 'low', True), summary('222', 'critical')])
+    return bucket
+
+
+def test_range_listing_starts_at_date_from_and_stops_after_date_to():
+    bucket = populate()
+
+    assert list_rollup_dates(bucket, 'b', '2025/05/01', '2025/05/02') == ['2025/05/01', '2025/05/02']
+    # 05/01, 05/02 and the first key past the range, which ends the listing
+    assert bucket.listed == 3
+
+
+def test_open_ended_ranges():
+    assert list_rollup_dates(populate(), 'b', date_from='2025/05/03') == ['2025/05/03', '2025/05/04']
+    assert list_rollup_dates(populate(), 'b', date_to='2025/04/30') == ['2025/04/30']
+    assert list_rollup_dates(populate(), 'b') == DAYS
+
+
+def test_stats_count_severities_per_account_and_pending_by_severity():
+    stats = load_stats(populate(), 'b', date_from='2025/05/01', date_to='2025/05/02')
+
+    assert stats['total'] == 6
+    assert stats['bySeverity'] == {'high': 2, 'low': 2, 'critical': 2}
+    assert stats['byAccount'] == {'111': 4, '222': 2}
+    assert stats['byAccountSeverity'] == {'111': {'high': 2, 'low': 2}, '222': {'critical': 2}}
+    assert stats['remediation'] == {'remediated': 2, 'pending': 4, 'pendingBySeverity': {'high': 2, 'critical': 2}}
+
+
+def test_single_account_stats():
+    stats = load_stats(populate(), 'b', account_id='222')
+
+    assert stats['total'] == len(DAYS)
+    assert stats['byAccountSeverity'] == {'222': {'critical': len(DAYS)}}
@@ -0,0 +1,122 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+import rate_limiter
+from rate_limiter import TokenBucket, RateLimitedClient, api_family, PRIORITIES, MIN_RATE_FRACTION
+
+
+@pytest.fixture(autouse=True)
+def fresh_buckets(monkeypatch):
+    monkeypatch.setattr(rate_limiter, '_buckets', {})
+
+
+def test_api_families():
+    assert api_family('ec2', 'describe_instances') == 'ec2:describe'
+    assert api_family('ec2', 'create_network_acl_entry') == 'ec2:mutate'
+    assert api_family('ssm', 'send_command') == 'ssm:command'
+    assert api_family('ssm', 'list_commands') == 'ssm:describe'
+
+
+def test_burst_is_free_then_calls_are_paced():
+    bucket = TokenBucket(rate=20.0, burst=3)
+
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire(PRIORITIES['medium'])
+    assert time.monotonic() - started < 0.04
+
+    for _ in range(2):
+        bucket.acquire(PRIORITIES['medium'])
+    # Two more tokens accrue at 20/s
+    assert time.monotonic() - started >= 0.09
+    assert bucket.stats['calls'] == 5
+    assert bucket.stats['queued'] >= 2
+
+
+def test_waiting_callers_are_served_by_priority():
+    bucket = TokenBucket(rate=20.0, burst=1)
+    bucket.acquire(PRIORITIES['medium'])
+    served = []
+
+    def caller(severity):
+        bucket.acquire(PRIORITIES[severity])
+        served.append(severity)
+
+    threads = []
+    for severity in ('low', 'informational', 'critical', 'high'):
+        threads.append(threading.Thread(target=caller, args=(severity,)))
+        threads[-1].start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join(5)
+
+    # 'low' may grab the first token before the rest queue up; after that severity decides
+    assert served[-3:] == sorted(served[-3:], key=PRIORITIES.get)
+    assert served.index('critical') < served.index('informational')
+
+
+def test_throttling_halves_the_rate_and_successes_restore_it():
+    bucket = TokenBucket(rate=10.0, burst=5)
+
+    bucket.throttled()
+    assert bucket.rate == 5.0
+    assert bucket.tokens <= 0
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == pytest.approx(10.0 * MIN_RATE_FRACTION)
+
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 10.0
+
+
+class StubEc2:
+    meta = SimpleNamespace(region_name='us-east-1', service_model=SimpleNamespace(service_name='ec2'))
+
+    def __init__(self, error_code=None):
+        self.error_code = error_code
+        self.calls = 0
+
+    def describe_instances(self, **kwargs):
+        self.calls += 1
+        if self.error_code:
+            raise ClientError({'Error': {'Code': self.error_code}}, 'DescribeInstances')
+        return {'Reservations': []}
+
+    def get_paginator(self, operation):
+        return 'paginator'
+
+
+def test_client_calls_draw_from_their_accounts_bucket():
+    client = RateLimitedClient(StubEc2(), '111111111111', 'high')
+
+    assert client.describe_instances() == {'Reservations': []}
+    assert client.get_paginator('describe_instances') == 'paginator'
+    stats = rate_limiter.limiter_stats()
+    assert list(stats) == ['111111111111/us-east-1/ec2:describe']
+    assert stats['111111111111/us-east-1/ec2:describe']['calls'] == 1
+
+
+def test_throttled_calls_raise_and_slow_the_bucket():
+    client = RateLimitedClient(StubEc2('RequestLimitExceeded'), '111111111111')
+
+    with pytest.raises(ClientError):
+        client.describe_instances()
+
+    bucket = rate_limiter.get_bucket('111111111111', 'us-east-1', 'ec2:describe')
+    assert bucket.stats['throttled'] == 1
+    assert bucket.rate < bucket.max_rate
+
+
+def test_other_errors_leave_the_rate_alone():
+    client = RateLimitedClient(StubEc2('InvalidInstanceID.NotFound'), '111111111111')
+
+    with pytest.raises(ClientError):
+        client.describe_instances()
+
+    bucket = rate_limiter.get_bucket('111111111111', 'us-east-1', 'ec2:describe')
+    assert bucket.rate == bucket.max_rate
@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+import s3_json
+from s3_json import read_json, update_json
+
+
+class ConditionalS3:
+    """One-bucket S3 stub honouring If-Match / If-None-Match, with writers that can cut in"""
+
+    def __init__(self):
+        self.objects = {}
+        self.versions = 0
+        self.puts = 0
+        self.before_put = []
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        body, etag = self.objects[Key]
+        return {'Body': io.BytesIO(body), 'ETag': etag}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        if self.before_put:
+            self.before_put.pop(0)(self)
+        current = self.objects.get(Key)
+        if (IfNoneMatch == '*' and current) or (IfMatch and (not current or current[1] != IfMatch)):
+            raise ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'PutObject')
+        self.puts += 1
+        self.versions += 1
+        etag = f'"{self.versions}"'
+        self.objects[Key] = (Body.encode('utf-8'), etag)
+        return {'ETag': etag}
+
+    def put_raw(self, key, document):
+        self.versions += 1
+        self.objects[key] = (json.dumps(document).encode('utf-8'), f'"{self.versions}"')
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(s3_json.time, 'sleep', lambda seconds: None)
+
+
+def append(value):
+    return lambda document: {'items': (document or {'items': []})['items'] + [value]}
+
+
+def test_update_creates_missing_document():
+    s3 = ConditionalS3()
+    assert update_json(s3, 'b', 'doc.json', append(1)) == {'items': [1]}
+    assert read_json(s3, 'b', 'doc.json')[0] == {'items': [1]}
+
+
+def test_update_retries_against_the_concurrent_writers_copy():
+    s3 = ConditionalS3()
+    s3.put_raw('doc.json', {'items': [1]})
+    # Two other writers land between our read and our write, one after the other
+    s3.before_put = [lambda s: s.put_raw('doc.json', {'items': [1, 2]}),
+                     lambda s: s.put_raw('doc.json', {'items': [1, 2, 3]})]
+
+    assert update_json(s3, 'b', 'doc.json', append(4)) == {'items': [1, 2, 3, 4]}
+    assert read_json(s3, 'b', 'doc.json')[0] == {'items': [1, 2, 3, 4]}
+    assert s3.puts == 1
+
+
+def test_update_of_new_document_loses_to_a_concurrent_create():
+    s3 = ConditionalS3()
+    s3.before_put = [lambda s: s.put_raw('doc.json', {'items': ['other']})]
+
+    assert update_json(s3, 'b', 'doc.json', append('mine')) == {'items': ['other', 'mine']}
+
+
+def test_update_gives_up_after_max_attempts():
+    s3 = ConditionalS3()
+    s3.put_raw('doc.json', {'items': []})
+    s3.before_put = [lambda s: s.put_raw('doc.json', {'items': []})] * 3
+
+    with pytest.raises(RuntimeError):
+        update_json(s3, 'b', 'doc.json', append(1), max_attempts=3)
+    assert s3.puts == 0
+
+
+def test_mutate_returning_none_writes_nothing():
+    s3 = ConditionalS3()
+    s3.put_raw('doc.json', {'items': [1]})
+
+    assert update_json(s3, 'b', 'doc.json', lambda document: None) == {'items': [1]}
+    assert s3.puts == 0
+
+
+def test_other_errors_are_not_retried():
+    class Denied(ConditionalS3):
+        def put_object(self, **kwargs):
+            raise ClientError({'Error': {'Code': 'AccessDenied'}}, 'PutObject')
+
+    with pytest.raises(ClientError):
+        update_json(Denied(), 'b', 'doc.json', append(1))
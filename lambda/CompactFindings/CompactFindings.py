@@ -0,0 +1,138 @@
+import os
+import json
+import datetime
+import logging
+
+from s3_json import read_json, fan_out
+from finding_index import INDEX_PREFIX, list_shards, load_shard, shard_date
+from finding_archive import (
+    archive_available, archive_row, write_archive, read_archive, archive_key, load_manifest,
+    record_compaction, closed_days, finding_from_row, FINDING_COLUMNS, ARCHIVE_VERSION
+)
+from aws_clients import get_client
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3_client = get_client('s3')
+BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'soarcery')
+
+# Days are compacted once they are this many days old (1 = from the next day on)
+COMPACT_AFTER_DAYS = int(os.environ.get('COMPACT_AFTER_DAYS', '1'))
+# Raw JSON of compacted days older than this is deleted; unset keeps every raw object
+RAW_RETENTION_DAYS = os.environ.get('RAW_RETENTION_DAYS')
+# Stop starting new days when less than this much of the invocation is left
+TIME_RESERVE_MS = int(os.environ.get('COMPACT_TIME_RESERVE_MS', '60000'))
+
+
+def lambda_handler(event, context):
+    """
+    Scheduled job that rolls each closed day of findings into per-account Parquet files.
+
+    A day is compacted again whenever its index shard changed since the last run (an
+    approval or rejection), so the archive follows the index, and when it was written in an
+    older column layout. With RAW_RETENTION_DAYS set,
+    the raw JSON of compacted days past the retention window is deleted afterwards.
+    """
+    if not archive_available():
+        logger.error("pyarrow is not available, package it with the function to enable compaction")
+        return {'statusCode': 500, 'body': json.dumps('pyarrow is not available')}
+
+    manifest = load_manifest(s3_client, BUCKET_NAME)
+    shard_etags = {shard_date(obj['Key']): obj['ETag'] for obj in list_shards(s3_client, BUCKET_NAME, INDEX_PREFIX)}
+
+    pending = [
+        date for date in closed_days(sorted(shard_etags), COMPACT_AFTER_DAYS)
+        if manifest['days'].get(date, {}).get('shardEtag') != shard_etags[date]
+        or manifest['days'][date].get('version', 1) != ARCHIVE_VERSION
+    ]
+    if (event or {}).get('date'):
+        # Manual re-run of a single day
+        pending = [event['date']] if event['date'] in shard_etags else []
+
+    compacted = []
+    for date in pending:
+        if context and context.get_remaining_time_in_millis() < TIME_RESERVE_MS:
+            logger.info(f"Stopping with {len(pending) - len(compacted)} days left, the next run continues")
+            break
+        result = compact_day(date, shard_etags[date], manifest['days'].get(date))
+        compacted.append({'date': date, **result})
+
+    deleted = delete_expired_raw(context) if RAW_RETENTION_DAYS else 0
+
+    logger.info(f"Compacted {len(compacted)} days, deleted {deleted} raw findings")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'daysCompacted': compacted, 'rawFindingsDeleted': deleted})
+    }
+
+
+def compact_day(date, shard_etag, previous):
+    """
+    Write one Parquet file per account for a day from its index shard and raw findings.
+
+    Findings whose raw JSON was already deleted are carried over from the previous
+    compaction of the day. Raw objects found on such a day were written back by an approval,
+    so the day is marked for raw deletion again.
+    """
+    summaries = load_shard(s3_client, BUCKET_NAME, f"{INDEX_PREFIX}{date}.json")
+    findings = fan_out(lambda summary: read_json(s3_client, BUCKET_NAME, summary['key'])[0], summaries)
+
+    carried = {}
+    if previous and previous.get('rawDeleted'):
+        missing = {summary['key'] for summary, finding in zip(summaries, findings) if finding is None}
+        for account in previous.get('accounts', {}):
+            for row in read_archive(s3_client, BUCKET_NAME, archive_key(date, account), ['key'] + FINDING_COLUMNS):
+                if row['key'] in missing:
+                    carried[row['key']] = finding_from_row(row)
+
+    accounts = {}
+    for summary, finding in zip(summaries, findings):
+        finding = finding if finding is not None else carried.get(summary['key'])
+        if finding is None:
+            logger.warning(f"No raw or compacted copy of {summary['key']}, leaving it out of the archive")
+            continue
+        accounts.setdefault(summary.get('accountId') or 'unknown', []).append(archive_row(summary, finding))
+
+    fan_out(lambda item: write_archive(s3_client, BUCKET_NAME, date, item[0], item[1]), accounts.items())
+
+    # Partitions of accounts that no longer have findings on this day
+    for account in set((previous or {}).get('accounts', {})) - set(accounts):
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=archive_key(date, account))
+
+    raw_deleted = bool(previous and previous.get('rawDeleted')) and all(finding is None for finding in findings)
+    record_compaction(s3_client, BUCKET_NAME, date, {
+        'version': ARCHIVE_VERSION,
+        'rawDeleted': raw_deleted,
+        'shardEtag': shard_etag,
+        'accounts': {account: len(rows) for account, rows in accounts.items()},
+        'compactedAt': datetime.datetime.now(datetime.timezone.utc).isoformat()
+    })
+    logger.info(f"Compacted {sum(len(rows) for rows in accounts.values())} findings of {date} into {len(accounts)} files")
+    return {'findings': sum(len(rows) for rows in accounts.values()), 'files': len(accounts)}
+
+
+def delete_expired_raw(context):
+    """Delete the raw JSON of compacted days older than RAW_RETENTION_DAYS"""
+    manifest = load_manifest(s3_client, BUCKET_NAME)
+    expired = [
+        date for date in closed_days(sorted(manifest['days']), int(RAW_RETENTION_DAYS))
+        if not manifest['days'][date].get('rawDeleted')
+    ]
+
+    deleted = 0
+    for date in expired:
+        if context and context.get_remaining_time_in_millis() < TIME_RESERVE_MS:
+            break
+        # Only keys that made it into the archive are removed
+        keys = []
+        for account in manifest['days'][date].get('accounts', {}):
+            keys.extend(row['key'] for row in read_archive(s3_client, BUCKET_NAME, archive_key(date, account), ['key']))
+        for start in range(0, len(keys), 1000):
+            s3_client.delete_objects(
+                Bucket=BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+        record_compaction(s3_client, BUCKET_NAME, date, {'rawDeleted': True})
+        deleted += len(keys)
+    return deleted
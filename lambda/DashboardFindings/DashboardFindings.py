@@ -1,17 +1,79 @@
 import json
-import boto3
 import os
+import base64
 from urllib.parse import parse_qs
 import re
+import time
+import hashlib
+import gzip
+import uuid
+import datetime
+import itertools
+from botocore.exceptions import ClientError
 
-s3_client = boto3.client('s3')
+from finding_index import prefix_version, parse_finding_key, shard_key_for_date, load_shard, FANOUT_MODE
+from finding_query import build_query, run_query, query_version, sort_key, new_query_stats
+from finding_stats import load_stats, STATS_PREFIX
+from finding_changes import list_changes
+from finding_search import search_postings
+from finding_archive import read_archived_finding, read_archive, archive_key, archive_available, finding_from_row, FINDING_COLUMNS
+from finding_snapshot import FindingSnapshot
+from s3_json import fan_out
+from aws_clients import get_client, client_stats
+from response_cache import TTLCache
+from projection import parse_projection, project
+from export import EXPORT_PREFIX, EXPORT_FORMATS, parse_export_format, encode_header, encode_findings, MultipartWriter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+s3_client = get_client('s3')
 bucket_name = "soarcery"
 
+# Warm-container response cache. List entries are revalidated against the index version
+# on every request and also expire after a short TTL; detail entries are revalidated
+# with a conditional GET on the object's ETag.
+LIST_CACHE_TTL = int(os.environ.get('LIST_CACHE_TTL_SECONDS', '30'))
+DETAIL_CACHE_TTL = int(os.environ.get('DETAIL_CACHE_TTL_SECONDS', '900'))
+cache = TTLCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', '512')),
+    max_bytes=int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+
+# Responses at least this large are compressed when the client's Accept-Encoding allows it
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+# Optional local SQLite snapshot of the summary index, published by PublishSnapshot.
+# When on, list and stats queries run against /tmp and only a HEAD request per check
+# interval touches S3, at the cost of results lagging by up to the publish interval.
+SNAPSHOT_ENABLED = os.environ.get('FINDINGS_SNAPSHOT', 'off') == 'on'
+snapshot = FindingSnapshot(
+    s3_client, bucket_name, int(os.environ.get('SNAPSHOT_CHECK_SECONDS', '60'))
+) if SNAPSHOT_ENABLED else None
+
+# Page sizes for list requests; every list response is a page with a cursor
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '500'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+
+# List queries stop reading the index this long before the invocation would time out,
+# leaving time to serialize and return what was read as a partial response
+RESPONSE_TIME_RESERVE_MS = int(os.environ.get('RESPONSE_TIME_RESERVE_MS', '3000'))
+
+# Bulk exports read this many full findings at a time and are linked with a presigned URL
+# valid for EXPORT_URL_TTL_SECONDS
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '64'))
+EXPORT_URL_TTL = int(os.environ.get('EXPORT_URL_TTL_SECONDS', '3600'))
+
 def lambda_handler(event, context):
     headers = {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key',
-        'Access-Control-Allow-Methods': 'GET,OPTIONS'
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,If-None-Match',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS',
+        'Access-Control-Expose-Headers': 'ETag'
     }
     
     if event['httpMethod'] == 'OPTIONS':
@@ -21,34 +83,115 @@ def lambda_handler(event, context):
             'body': json.dumps({})
         }
     
+    deadline = None
+    if context:
+        deadline = time.monotonic() + (context.get_remaining_time_in_millis() - RESPONSE_TIME_RESERVE_MS) / 1000
+    
+    try:
+        return compress_response(route_request(event, headers, deadline), get_header(event, 'Accept-Encoding'))
+    finally:
+        print(f"Cache stats: {json.dumps(cache.describe())}")
+        print(f"Client stats: {json.dumps(client_stats())}")
+
+def route_request(event, headers, deadline=None):
     try:
         path = event['path']
         
+        query_params = event.get('queryStringParameters', {}) or {}
+        if_none_match = get_header(event, 'If-None-Match')
+        
+        try:
+            page = parse_page_params(query_params)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        date = query_params.get('date', None)
+        date_from = query_params.get('startDate', None)
+        date_to = query_params.get('endDate', None)
+        
+        for value in (date, date_from, date_to):
+            if value and not re.match(r'^\d{4}/\d{2}/\d{2}$', value):
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Dates must use the YYYY/MM/DD format'})
+                }
+        
         if path == '/findings':
-            query_params = event.get('queryStringParameters', {}) or {}
-            severity = query_params.get('severity', None)
-            date = query_params.get('date', None)
-            account_id = query_params.get('accountId', None)
+            if query_params.get('since'):
+                # Delta feed for polling clients; always read fresh from the change log
+                return get_changes_since(query_params['since'], page['limit'], headers)
             
-            if not severity and not date and not account_id:
-                return get_all_findings(headers)
-            else:
-                return get_findings_list(severity, date, account_id, headers)
+            try:
+                query = parse_query(query_params, date, date_from, date_to)
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': str(e)})
+                }
+            return list_response(path, query_params, query, page, headers, if_none_match, deadline)
         
 
         elif re.match(r'^/finding/\d+$', path):
-            account_id = event['pathParameters']['accountId']
-            return get_account_findings(account_id, headers)
+            query = build_query(accounts=[event['pathParameters']['accountId']])
+            return list_response(path, query_params, query, page, headers, if_none_match, deadline)
             
 
+        elif path == '/findings/search':
+            if not query_params.get('q', '').strip():
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Missing required query parameter q'})
+                }
+            return search_findings(query_params['q'], page['limit'], headers)
+        
+
+        elif path == '/findings/export':
+            try:
+                query = parse_query(query_params, date, date_from, date_to)
+                export_format = parse_export_format(query_params)
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': str(e)})
+                }
+            after = page['cursor']['position'] if page['cursor'] else None
+            return export_findings(query, export_format, after, headers, deadline)
+        
+
+        elif path == '/findings/stats':
+            account_id = query_params.get('accountId', None)
+            build = lambda: get_findings_stats(account_id, date_from, date_to, headers)
+            if use_snapshot():
+                version = snapshot.version
+            else:
+                version = prefix_version(s3_client, bucket_name, STATS_PREFIX)
+            return cached_list_response(path, query_params, version, build, headers, if_none_match)
+        
+
         elif path.startswith('/findings/'):
             key = event['pathParameters']['key']
             # Check if it's not a numeric account ID (to avoid overlap with case 2)
             if not key.isdigit():
-                return get_finding_detail(key, headers)
+                try:
+                    projection = parse_projection(query_params)
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({'error': str(e)})
+                    }
+                return get_finding_detail(key, headers, if_none_match, projection)
             else:
                 # Handle as account ID
-                return get_account_findings(key, headers)
+                return list_response(path, query_params, build_query(accounts=[key]), page, headers, if_none_match, deadline)
             
         else:
             return {
@@ -65,244 +208,516 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': f'Error processing request: {str(e)}'})
         }
 
-def get_all_findings(headers):
-    findings = []
+def accepted_encodings(accept_encoding):
+    """Encodings the client accepts, from an Accept-Encoding header (q=0 means refused)"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def compress_response(response, accept_encoding):
+    """
+    Compress the response body with brotli (when the module is available) or gzip if the
+    client accepts it and the body is large enough to be worth it. The compressed body is
+    returned base64 encoded, which API Gateway turns back into binary for the client.
+    """
+    body = response.get('body')
+    if response.get('statusCode') == 304 or not body or response.get('isBase64Encoded'):
+        return response
     
-    prefix = "security-hub-findings/"
+    response['headers'] = {**response.get('headers', {}), 'Vary': 'Accept-Encoding'}
+    raw = body.encode('utf-8')
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return response
     
-    paginator = s3_client.get_paginator('list_objects_v2')
-    pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+    accepted = accepted_encodings(accept_encoding)
+    started = time.perf_counter()
+    if brotli and ('br' in accepted or '*' in accepted):
+        encoding, compressed = 'br', brotli.compress(raw, quality=BROTLI_QUALITY)
+    elif 'gzip' in accepted or '*' in accepted:
+        encoding, compressed = 'gzip', gzip.compress(raw, compresslevel=GZIP_LEVEL)
+    else:
+        return response
+    elapsed_ms = (time.perf_counter() - started) * 1000
     
-    for page in pages:
-        if 'Contents' not in page:
-            continue
+    print(f"Compressed response {len(raw)} -> {len(compressed)} bytes "
+          f"({len(compressed) / len(raw):.1%}) with {encoding} in {elapsed_ms:.1f} ms")
+    response['headers']['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
 
-        for obj in page['Contents']:
-            key = obj['Key']
-            parts = key.split('/')
-            
-            if len(parts) >= 4:
-                severity = parts[1]
-                
-                filename = parts[-1]
-                file_parts = filename.split('_')
-                finding_account = extract_account_number(key)
-                if len(file_parts) >= 2:
-                    finding_id = file_parts[1]
-                    
-                    # Get remediation status
-                    remediation_status = get_remediation_status(key)
-                    
-                    finding_summary = {
-                        'key': key,
-                        'severity': severity,
-                        'date': parts[2],
-                        'accountId': finding_account,
-                        'findingId': finding_id,
-                        'source': 'Security Hub',
-                        'lastModified': obj['LastModified'].isoformat(),
-                        'remediationStatus': remediation_status
-                    }
-                    
-                    findings.append(finding_summary)
+def list_response(path, query_params, query, page, headers, if_none_match=None, deadline=None):
+    """Answer a findings list query, one page at a time, through the response cache"""
+    build = lambda: get_findings_page(query, page, headers, deadline)
+    if use_snapshot():
+        version = snapshot.version
+    else:
+        version = query_version(s3_client, bucket_name, query)
+    return cached_list_response(path, query_params, version, build, headers, if_none_match)
+
+def use_snapshot():
+    """True when queries should be answered from the local snapshot, loading or refreshing it as needed"""
+    if not snapshot:
+        return False
+    try:
+        return snapshot.refresh()
+    except Exception as e:
+        # Keep serving the copy we have, or fall back to the index shards
+        print(f"Could not refresh findings snapshot: {str(e)}")
+        return snapshot.connection is not None
+
+def query_findings(query, descending=True, after=None, stats=None, deadline=None):
+    """Stream a query from the snapshot when one is loaded, otherwise from the index shards"""
+    if snapshot and snapshot.connection:
+        stats['source'] = 'snapshot'
+        return snapshot.run_query(query, descending, after, stats, deadline)
+    return run_query(s3_client, bucket_name, query, descending, after, stats, deadline)
+
+def cached_list_response(path, query_params, version, build, headers, if_none_match=None):
+    """
+    Serve a list response from the warm-container cache while the index shards it was
+    built from are unchanged, otherwise build it and cache the body.
+
+    The ETag is derived from the index version and the query, so a client that already
+    holds the current version gets a 304 after nothing more than the shard listing.
+    Partial responses (cut short by the time budget) are neither cached nor tagged.
+    """
+    cache_key = ('list', path, json.dumps(query_params, sort_keys=True))
+    etag = '"' + hashlib.sha1(f"{version}|{cache_key}".encode('utf-8')).hexdigest() + '"'
+    headers = {**headers, 'ETag': etag}
+    if etag_matches(if_none_match, etag):
+        return not_modified(headers)
     
-    findings.sort(key=lambda x: x['lastModified'], reverse=True)
+    body = cache.get(cache_key, version)
+    if body is not None:
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': body
+        }
     
+    response = build()
+    if response.pop('partial', False):
+        return response
+    if response['statusCode'] == 200:
+        cache.put(cache_key, version, response['body'], LIST_CACHE_TTL, len(response['body']))
+        response['headers'] = headers
+    return response
+
+def get_header(event, name):
+    """Case-insensitive lookup of a request header in an API Gateway proxy event"""
+    for header, value in (event.get('headers') or {}).items():
+        if header.lower() == name.lower():
+            return value
+    return None
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header lists the current ETag (or *)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(headers):
     return {
-        'statusCode': 200,
+        'statusCode': 304,
         'headers': headers,
-        'body': json.dumps(findings)
+        'body': ''
     }
 
-def get_account_findings(account_id, headers):
-    """Get all findings for a specific AWS account ID"""
-    findings = []
+def parse_query(query_params, date=None, date_from=None, date_to=None):
+    """
+    Build a findings query from the list filters. severity, accountId and type take comma
+    separated values, remediated takes true or false. Raises ValueError for malformed values.
+    """
+    def values(name):
+        return [value.strip() for value in (query_params.get(name) or '').split(',') if value.strip()]
     
-    # Updated prefix to match the new Security Hub findings path
-    prefix = "security-hub-findings/"
+    remediated = query_params.get('remediated')
+    if remediated not in (None, '', 'true', 'false'):
+        raise ValueError("remediated must be 'true' or 'false'")
+    
+    if date:
+        date_from = date_to = date
+    
+    return build_query(
+        severities=values('severity'),
+        accounts=values('accountId'),
+        date_from=date_from,
+        date_to=date_to,
+        remediated={'true': True, 'false': False}.get(remediated),
+        types=values('type')
+    )
+
+def log_query(query, stats, returned, started):
+    filters = {name: sorted(value) if isinstance(value, set) else value for name, value in query.items() if value is not None}
+    elapsed_ms = (time.monotonic() - started) * 1000
+    partial = ', partial: stopped at time budget' if stats['partial'] else ''
+    if stats.get('source') == 'snapshot':
+        print(f"Query {json.dumps(filters)}: returned {returned} from snapshot in {elapsed_ms:.1f} ms{partial}")
+        return
+    print(f"Query {json.dumps(filters)}: {stats['prefixes']} prefixes, scanned {stats['shardsScanned']} of "
+          f"{stats['shardsPlanned']} shards, examined {stats['examined']} findings, returned {returned} "
+          f"in {elapsed_ms:.1f} ms (fan-out: {FANOUT_MODE}){partial}")
+
+def parse_page_params(query_params):
+    """
+    Read limit/cursor/order from the query string. Without a limit, pages hold
+    DEFAULT_PAGE_SIZE findings. Raises ValueError for malformed values.
+    """
+    order = query_params.get('order') or 'desc'
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    try:
+        limit = int(query_params.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    cursor = None
+    if query_params.get('cursor'):
+        cursor = decode_cursor(query_params['cursor'])
+        # A cursor is only valid for the ordering it was issued under
+        order = cursor['order']
+
+    return {'limit': min(limit, MAX_PAGE_SIZE), 'cursor': cursor, 'order': order}
+
+def encode_cursor(position, order):
+    """Opaque token for a sort_key position, resuming right after it"""
+    position = {'order': order, 'position': position}
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_cursor(token):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        if position['order'] not in ('asc', 'desc') or len(position['position']) != 3:
+            raise ValueError
+        position['position'] = tuple(position['position'])
+        return position
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_findings_page(query, page, headers, deadline=None):
+    """
+    Return one page of findings plus an opaque cursor for the next page.
+
+    The query is streamed one day at a time in page order and stops as soon as the page is
+    full, so the cost depends on the page size rather than the bucket's history. When the
+    time budget runs out first, the page is returned short with `partial` set and a cursor
+    to resume from where the scan stopped.
+    """
+    started = time.monotonic()
+    stats = new_query_stats()
+    limit = page['limit']
+    after = page['cursor']['position'] if page['cursor'] else None
+
+    findings = []
+    has_more = False
     
-    paginator = s3_client.get_paginator('list_objects_v2')
-    pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+    for summary in query_findings(query, page['order'] == 'desc', after, stats, deadline):
+        if len(findings) == limit:
+            has_more = True
+            break
+        findings.append(with_source(summary))
+
+    next_cursor = None
+    if stats['partial']:
+        next_cursor = encode_cursor(stats['position'], page['order'])
+    elif has_more:
+        next_cursor = encode_cursor(sort_key(findings[-1]), page['order'])
+
+    log_query(query, stats, len(findings), started)
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'partial': stats['partial'],
+        'body': json.dumps({
+            'findings': findings,
+            'nextCursor': next_cursor,
+            'partial': stats['partial']
+        })
+    }
+
+def read_full_findings(summaries):
+    """
+    The stored finding of each summary, read concurrently. Findings whose raw JSON is past
+    the retention window are read from their compacted file, once per day and account.
+    """
+    def read(summary):
+        try:
+            return json.loads(s3_client.get_object(Bucket=bucket_name, Key=summary['key'])['Body'].read())
+        except s3_client.exceptions.NoSuchKey:
+            return None
+    findings = fan_out(read, summaries)
     
-    for page in pages:
-        if 'Contents' not in page:
+    missing = {}
+    for summary, finding in zip(summaries, findings):
+        if finding is None and summary.get('accountId') and archive_available():
+            missing.setdefault(archive_key(summary['date'], summary['accountId']), []).append(summary['key'])
+    archived = {}
+    for key, keys in missing.items():
+        try:
+            rows = read_archive(s3_client, bucket_name, key, FINDING_COLUMNS, keys)
+        except s3_client.exceptions.NoSuchKey:
             continue
+        archived.update((row['key'], finding_from_row(row)) for row in rows)
+    
+    return [
+        (summary, finding if finding is not None else archived[summary['key']])
+        for summary, finding in zip(summaries, findings)
+        if finding is not None or summary['key'] in archived
+    ]
 
-        for obj in page['Contents']:
-            key = obj['Key']
-            parts = key.split('/')
-            
-            if len(parts) >= 4:
-                severity = parts[1]
-                
-                filename = parts[-1]
-                file_parts = filename.split('_')
-                if len(file_parts) >= 2:
-                    finding_account = extract_account_number(key)
-                    
-                    # Filter by account ID
-                    if finding_account == account_id:
-                        finding_id = file_parts[1]
-                        
-                        # Get remediation status
-                        remediation_status = get_remediation_status(key)
-                        
-                        finding_summary = {
-                            'key': key,
-                            'severity': severity,
-                            'date': parts[2],
-                            'accountId': finding_account,
-                            'findingId': finding_id,
-                            'source': 'Security Hub',
-                            'lastModified': obj['LastModified'].isoformat(),
-                            'remediationStatus': remediation_status
-                        }
-                        
-                        findings.append(finding_summary)
+def export_findings(query, export_format, after, headers, deadline=None):
+    """
+    Write the full findings matching a query to an S3 object as NDJSON or CSV and return a
+    presigned URL for it.
+    
+    Findings are streamed newest-first in batches of EXPORT_BATCH_SIZE into a multipart
+    upload, so memory stays at one batch plus one part whatever the export's size. An export
+    that reaches the time budget is completed with what was written and returned with
+    `partial` set and a cursor for the next export.
+    """
+    started = time.monotonic()
+    stats = new_query_stats()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    key = f"{EXPORT_PREFIX}{timestamp}-{uuid.uuid4().hex[:12]}.{export_format}"
+    writer = MultipartWriter(s3_client, bucket_name, key, EXPORT_FORMATS[export_format])
+    
+    count = 0
+    last = None
+    partial = False
+    try:
+        writer.write(encode_header(export_format))
+        summaries = query_findings(query, True, after, stats, deadline)
+        while True:
+            batch = list(itertools.islice(summaries, EXPORT_BATCH_SIZE))
+            if not batch:
+                break
+            items = read_full_findings(batch)
+            writer.write(encode_findings(export_format, items))
+            count += len(items)
+            last = sort_key(batch[-1])
+            if deadline is not None and time.monotonic() >= deadline:
+                partial = True
+                break
+        size = writer.close()
+    except Exception:
+        writer.abort()
+        raise
     
-    findings.sort(key=lambda x: x['lastModified'], reverse=True)
+    next_cursor = None
+    if stats['partial']:
+        next_cursor = encode_cursor(stats['position'], 'desc')
+    elif partial:
+        next_cursor = encode_cursor(last, 'desc')
     
+    log_query(query, stats, count, started)
+    print(f"Exported {count} findings ({size} bytes of {export_format}) to {key}"
+          f"{', partial' if next_cursor else ''} in {(time.monotonic() - started) * 1000:.1f} ms")
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(findings)
+        'body': json.dumps({
+            'url': s3_client.generate_presigned_url(
+                'get_object', Params={'Bucket': bucket_name, 'Key': key}, ExpiresIn=EXPORT_URL_TTL
+            ),
+            'key': key,
+            'format': export_format,
+            'count': count,
+            'bytes': size,
+            'expiresIn': EXPORT_URL_TTL,
+            'partial': next_cursor is not None,
+            'nextCursor': next_cursor
+        })
     }
 
-def get_findings_list(severity=None, date=None, account_id=None, headers=None):
-    # Updated prefix to match the new Security Hub findings path
-    prefix = "security-hub-findings/"
-    
-    if severity:
-        prefix += f"{severity}/"
-        if date:
-            prefix += f"{date}/"
-    elif date:
-        findings = []
-        for sev in ["critical", "high", "medium", "low", "unknown"]:
-            sev_prefix = f"security-hub-findings/{sev}/{date}/"
-            findings.extend(list_findings_with_prefix(sev_prefix, account_id))
-        
+def get_changes_since(since, limit, headers):
+    """
+    Findings created, approved or rejected after `since` (a sequence or timestamp), oldest
+    first. Rejected findings appear as tombstones with deleted=true. Pass nextSince back as
+    `since` to continue.
+    """
+    try:
+        changes, has_more = list_changes(s3_client, bucket_name, since, limit)
+    except ValueError as e:
         return {
-            'statusCode': 200,
+            'statusCode': 400,
             'headers': headers,
-            'body': json.dumps(findings)
+            'body': json.dumps({'error': str(e)})
         }
     
-    findings = list_findings_with_prefix(prefix, account_id)
+    for change in changes:
+        if change.get('summary'):
+            change['summary'] = with_source(change['summary'])
     
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(findings)
+        'body': json.dumps({
+            'changes': changes,
+            'nextSince': changes[-1]['sequence'] if changes else since,
+            'hasMore': has_more
+        })
     }
 
-def list_findings_with_prefix(prefix, account_id=None):
-    findings = []
+def search_findings(q, limit, headers):
+    """
+    Findings matching every term of q (IP addresses, instance IDs, finding types and title
+    words), newest first. Postings come from the search index; the current summaries of the
+    newest `limit` matches are then read from their day shards.
+    """
+    started = time.monotonic()
+    terms, postings = search_postings(s3_client, bucket_name, q)
+    newest = sorted(postings.items(), key=lambda posting: (posting[1], posting[0]), reverse=True)[:limit]
     
-    paginator = s3_client.get_paginator('list_objects_v2')
-    pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+    days = {}
+    for key, _ in newest:
+        parsed = parse_finding_key(key)
+        if parsed:
+            days.setdefault(parsed['date'], []).append(key)
+    shards = fan_out(lambda date: load_shard(s3_client, bucket_name, shard_key_for_date(date)), days)
+    summaries = {summary['key']: summary for shard in shards for summary in shard}
     
-    for page in pages:
-        if 'Contents' not in page:
-            continue
-            
-        for obj in page['Contents']:
-            key = obj['Key']
+    # Findings deleted since they were indexed have no summary any more and drop out here
+    findings = [with_source(summaries[key]) for key, _ in newest if key in summaries]
+    
+    print(f"Search {json.dumps(terms)}: {len(postings)} matches, returned {len(findings)} "
+          f"from {len(days)} day shards in {(time.monotonic() - started) * 1000:.1f} ms")
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'terms': terms,
+            'total': len(postings),
+            'findings': findings
+        })
+    }
 
-            if account_id and account_id not in key:
-                continue
-                
-            parts = key.split('/')
-            if len(parts) >= 4:
-                severity = parts[1]
-                
-                filename = parts[-1]
-                file_parts = filename.split('_')
-                finding_account = extract_account_number(key)
-                if len(file_parts) >= 3:
-                    finding_id = file_parts[1]
-                    
-                    # Get remediation status
-                    remediation_status = get_remediation_status(key)
-                    
-                    finding_summary = {
-                        'key': key,
-                        'severity': severity,
-                        'date': parts[2],
-                        'accountId': finding_account,
-                        'findingId': finding_id,
-                        'source': 'Security Hub',
-                        'lastModified': obj['LastModified'].isoformat(),
-                        'remediationStatus': remediation_status
-                    }
-                    
-                    findings.append(finding_summary)
+def get_findings_stats(account_id, date_from, date_to, headers):
+    """Chart counts by severity, day, account and remediation state from the daily rollups (or the snapshot)"""
+    if snapshot and snapshot.connection:
+        stats = snapshot.stats(account_id, date_from, date_to)
+    else:
+        stats = load_stats(s3_client, bucket_name, account_id, date_from, date_to)
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps(stats)
+    }
+
+def with_source(summary):
+    """Index entries are stored without the constant source field, add it for the API response"""
+    return {**summary, 'source': 'Security Hub'}
+
+def with_source_field(finding_content):
+    """
+    Add "source" to a stored finding without a parse/serialize round trip by splicing it in
+    before the closing brace. A later duplicate key wins in JSON parsers, matching the old
+    overwrite. Anything that isn't a JSON object is returned as is.
+    """
+    body = finding_content.rstrip()
+    if not body.lstrip().startswith('{') or not body.endswith('}'):
+        return finding_content
+    separator = '' if body[:-1].rstrip().endswith('{') else ','
+    return f'{body[:-1].rstrip()}{separator}"source": "Security Hub"}}'
+
+def project_body(finding_content, projection):
+    if not projection:
+        return finding_content
+    try:
+        return json.dumps(project(json.loads(finding_content), projection))
+    except json.JSONDecodeError:
+        # Nothing to project in a body that isn't JSON
+        return finding_content
 
-    findings.sort(key=lambda x: x['lastModified'], reverse=True)
-    return findings
+def representation_etag(etag, projection):
+    if not projection:
+        return etag
+    digest = hashlib.sha1(','.join(projection).encode('utf-8')).hexdigest()[:12]
+    return '"' + etag.strip('"') + '-' + digest + '"'
 
-def get_finding_detail(key, headers):
+def object_etag(if_none_match, projection):
+    """Recover the S3 ETag from a client's If-None-Match for this representation"""
+    candidate = if_none_match.split(',')[0].strip()
+    if candidate.startswith('W/'):
+        candidate = candidate[2:]
+    if candidate == '*':
+        return None
+    if not projection:
+        return candidate
+    suffix = representation_etag('""', projection).strip('"')
+    if candidate.endswith(suffix + '"'):
+        return candidate[:-len(suffix) - 1] + '"'
+    return None
+
+def get_finding_detail(key, headers, if_none_match=None, projection=None):
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=key)
-        finding_content = response['Body'].read().decode('utf-8')
+        # Projected responses are a different representation of the same object, so they
+        # get their own ETag derived from the object's ETag and the projection
+        tag = lambda etag: representation_etag(etag, projection)
+        client_validator = object_etag(if_none_match, projection) if if_none_match else None
+        
+        # Revalidate with a conditional GET, against our cached copy if there is one and
+        # otherwise against the client's ETag, so unchanged findings are never re-read
+        cached = cache.peek(('detail', key))
+        validator = cached[0] if cached else client_validator
+        request = {'Bucket': bucket_name, 'Key': key}
+        if validator:
+            request['IfNoneMatch'] = validator
         
-        # Parse the JSON to include a source field
         try:
-            finding_json = json.loads(finding_content)
-            finding_json['source'] = 'Security Hub'
-            
-            # We don't need to extract remediation status here since
-            # it should already be included in the full finding JSON
-            
-            finding_content = json.dumps(finding_json)
-        except json.JSONDecodeError:
-            # If we can't parse the JSON, just return the original content
-            pass
+            response = s3_client.get_object(**request)
+        except ClientError as e:
+            if validator and e.response['Error']['Code'] in ('304', 'NotModified'):
+                if cached:
+                    cache.record('hits')
+                # The validator is the object's current ETag
+                current_etag = cached[0] if cached else validator
+                if etag_matches(if_none_match, tag(current_etag)):
+                    return not_modified({**headers, 'ETag': tag(current_etag)})
+                return {
+                    'statusCode': 200,
+                    'headers': {**headers, 'ETag': tag(current_etag)},
+                    'body': project_body(cached[1], projection)
+                }
+            raise
+        
+        cache.record('stale' if cached else 'misses')
+        # Pass the stored body through untouched apart from the source field, parsing
+        # it only when a projection was asked for
+        finding_content = with_source_field(response['Body'].read().decode('utf-8'))
+        cache.put(('detail', key), response['ETag'], finding_content, DETAIL_CACHE_TTL, len(finding_content))
         
         return {
             'statusCode': 200,
-            'headers': headers,
-            'body': finding_content
+            'headers': {**headers, 'ETag': tag(response['ETag'])},
+            'body': project_body(finding_content, projection)
         }
     except s3_client.exceptions.NoSuchKey:
+        # Raw JSON past the retention window is served from the compacted archive
+        finding = read_archived_finding(s3_client, bucket_name, parse_finding_key(key))
+        if finding is not None:
+            finding['source'] = 'Security Hub'
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': project_body(json.dumps(finding), projection)
+            }
         return {
             'statusCode': 404,
             'headers': headers,
             'body': json.dumps({'error': 'Finding not found'})
         }
-
-def extract_account_number(finding_path):
-    parts = finding_path.replace('/', '_').split('_')
-    
-    for part in parts:
-        if part.isdigit() and len(part) == 12:
-            return part
-    
-    return None
-
-def get_remediation_status(key):
-    """Extract remediation status from the finding file"""
-    try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=key)
-        finding_content = response['Body'].read().decode('utf-8')
-        
-        finding_json = json.loads(finding_content)
-        
-        # Check if remediationStatus exists in the JSON
-        if 'remediationStatus' in finding_json:
-            return finding_json['remediationStatus']
-        
-        # Return a default status if not found
-        return {
-            'remediated': False,
-            'remediationAction': None,
-            'remediationTimestamp': None
-        }
-    except Exception as e:
-        print(f"Error getting remediation status for {key}: {str(e)}")
-        # Return a default status if there's an error
-        return {
-            'remediated': False,
-            'remediationAction': None,
-            'remediationTimestamp': None
-        }
@@ -0,0 +1,118 @@
+import io
+import csv
+import json
+
+from finding_archive import ARCHIVE_COLUMNS, archive_row
+
+EXPORT_PREFIX = 'exports/'
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# CSV exports use the compacted archive's flat column layout; nested fields are JSON-encoded
+CSV_COLUMNS = [name for name, _ in ARCHIVE_COLUMNS]
+
+# S3 requires every part but the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def parse_export_format(query_params):
+    """The requested export format, ndjson unless `format` says otherwise. Raises ValueError."""
+    export_format = (query_params.get('format') or 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+
+def encode_header(export_format):
+    if export_format != 'csv':
+        return b''
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue().encode('utf-8')
+
+
+def encode_findings(export_format, items):
+    """
+    Encode (summary, finding) pairs as export records: one JSON document per line (the stored
+    finding with the index's remediation status and the source field) or one CSV row each.
+    """
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+        for summary, finding in items:
+            writer.writerow(archive_row(summary, finding))
+        return buffer.getvalue().encode('utf-8')
+
+    lines = []
+    for summary, finding in items:
+        record = {**finding, 'remediationStatus': summary.get('remediationStatus'), 'source': 'Security Hub'}
+        lines.append(json.dumps(record, separators=(',', ':')))
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+class MultipartWriter:
+    """
+    Stream bytes into one S3 object, holding at most one part in memory. Each part is
+    uploaded as soon as it fills; an object that never fills a part is written with a single
+    put_object instead.
+    """
+
+    def __init__(self, s3_client, bucket, key, content_type, part_size=MIN_PART_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.buffer.extend(data)
+        self.size += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+
+    def _upload_part(self, body):
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType=self.content_type,
+                ServerSideEncryption='AES256'
+            )['UploadId']
+        number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=body
+        )
+        self.parts.append({'PartNumber': number, 'ETag': response['ETag']})
+
+    def close(self):
+        """Upload what is buffered and complete the object; returns its size in bytes"""
+        if self.upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self.buffer),
+                ContentType=self.content_type,
+                ServerSideEncryption='AES256'
+            )
+        else:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={'Parts': self.parts}
+            )
+        self.buffer = bytearray()
+        return self.size
+
+    def abort(self):
+        """Drop the parts uploaded so far so they don't linger as billed storage"""
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        self.buffer = bytearray()
@@ -0,0 +1,97 @@
+import re
+
+# Fields the dashboard detail views render; everything else (notably the large
+# ProductFields blob) is left out of the "summary" view
+SUMMARY_FIELDS = (
+    'Id',
+    'AwsAccountId',
+    'Region',
+    'Title',
+    'Description',
+    'Types',
+    'Severity.Label',
+    'CreatedAt',
+    'FirstObservedAt',
+    'LastObservedAt',
+    'UpdatedAt',
+    'Action.NetworkConnectionAction.Protocol',
+    'Action.NetworkConnectionAction.RemoteIpDetails.IpAddressV4',
+    'Action.NetworkConnectionAction.RemoteIpDetails.Country.CountryName',
+    'Action.NetworkConnectionAction.RemoteIpDetails.City.CityName',
+    'Resources.Id',
+    'Resources.Type',
+    'Resources.Details.AwsEc2Instance.IpV4Addresses',
+    'remediationStatus',
+    'source'
+)
+
+VIEWS = {'summary': SUMMARY_FIELDS}
+
+FIELD_PATTERN = re.compile(r'^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$')
+
+
+def parse_projection(query_params):
+    """
+    Read `fields` (comma separated dotted paths) and `view` from the query string.
+
+    Returns a sorted tuple of paths, or None when the full document was asked for.
+    Raises ValueError for unknown views or malformed paths.
+    """
+    paths = set()
+
+    view = query_params.get('view')
+    if view:
+        if view not in VIEWS:
+            raise ValueError(f"view must be one of: {', '.join(sorted(VIEWS))}")
+        paths.update(VIEWS[view])
+
+    for field in (query_params.get('fields') or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if not FIELD_PATTERN.match(field):
+            raise ValueError(f"Invalid field: {field}")
+        paths.add(field)
+
+    return tuple(sorted(paths)) or None
+
+
+def build_tree(paths):
+    """Turn dotted paths into a nested dict; an empty dict marks a field kept whole"""
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = path.split('.')
+        for i, part in enumerate(parts):
+            if part in node and not node[part]:
+                # A parent of this path is already kept whole
+                break
+            if i == len(parts) - 1:
+                node[part] = {}
+            else:
+                node = node.setdefault(part, {'.': True})
+    return tree
+
+
+def project(document, paths):
+    """
+    Keep only the given dotted paths of a JSON document. Paths descend through lists, so
+    `Resources.Id` keeps the Id of every resource. Missing fields are simply left out.
+    """
+    return _project(document, build_tree(paths))
+
+
+def _project(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    projected = {}
+    for field, subtree in tree.items():
+        if field == '.' or field not in value:
+            continue
+        projected[field] = _project(value[field], subtree)
+    return projected
@@ -0,0 +1,69 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry TTLs, kept at module level so it survives
+    across warm invocations of the same container.
+
+    Every entry carries a `version` (an S3 ETag or an index version); a lookup only hits
+    when the caller's current version matches the cached one.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0}
+
+    def peek(self, key):
+        """Return (version, value) without counting a hit or miss, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry['expires'] < time.monotonic():
+                return None
+            return entry['version'], entry['value']
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry['version'] != version or entry['expires'] < time.monotonic():
+                self.stats['stale'] += 1
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry['value']
+
+    def put(self, key, version, value, ttl, size):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = {'version': version, 'value': value, 'expires': time.monotonic() + ttl, 'size': size}
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.stats['evictions'] += 1
+
+    def record(self, outcome):
+        """Count a hit/miss/stale decided by the caller, e.g. after a conditional GET"""
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.size -= entry['size']
+
+    def describe(self):
+        with self.lock:
+            return {**self.stats, 'entries': len(self.entries), 'bytes': self.size}
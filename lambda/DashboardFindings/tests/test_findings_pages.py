@@ -0,0 +1,127 @@
+import io
+import json
+import datetime
+
+import pytest
+from botocore.exceptions import ClientError
+
+import DashboardFindings
+from finding_index import build_summary, shard_keys_for_summary
+from response_cache import TTLCache
+
+
+class IndexBucket:
+    """The summary index shards of a bucket, enough for list queries and their versions"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key]), 'ETag': f'"{len(self.objects[Key])}"'}
+
+    def get_paginator(self, operation):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, StartAfter=''):
+                yield {'Contents': [
+                    {'Key': key, 'ETag': f'"{len(objects[key])}"',
+                     'LastModified': datetime.datetime(2025, 5, 5, tzinfo=datetime.timezone.utc)}
+                    for key in sorted(objects) if key.startswith(Prefix) and key > StartAfter
+                ]}
+        return Paginator()
+
+
+ACCOUNTS = ['111111111111', '222222222222']
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = IndexBucket()
+    for n in range(23):
+        account = ACCOUNTS[n % 2]
+        key = f"security-hub-findings/high/2025/05/0{n % 4 + 1}/{account}_f{n}_u{n}.json"
+        summary = build_summary(key, {'Types': ['T']}, datetime.datetime(2025, 5, 1, n, tzinfo=datetime.timezone.utc))
+        for shard_key in shard_keys_for_summary(summary):
+            shard = json.loads(bucket.objects.get(shard_key, b'{"findings": {}}'))
+            shard['findings'][key] = summary
+            bucket.objects[shard_key] = json.dumps(shard).encode('utf-8')
+    monkeypatch.setattr(DashboardFindings, 's3_client', bucket)
+    monkeypatch.setattr(DashboardFindings, 'cache', TTLCache(max_entries=64, max_bytes=1024 * 1024))
+    return bucket
+
+
+def get(path, params=None, path_parameters=None):
+    response = DashboardFindings.lambda_handler({
+        'httpMethod': 'GET',
+        'path': path,
+        'queryStringParameters': params,
+        'pathParameters': path_parameters
+    }, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def walk(path, params, path_parameters=None):
+    """Every page of a listing, following nextCursor until it runs out"""
+    pages = []
+    cursor = None
+    while True:
+        status, page = get(path, {**params, **({'cursor': cursor} if cursor else {})}, path_parameters)
+        assert status == 200
+        pages.append(page)
+        cursor = page['nextCursor']
+        if not cursor:
+            return pages
+
+
+def test_list_without_limit_is_paged(bucket, monkeypatch):
+    monkeypatch.setattr(DashboardFindings, 'DEFAULT_PAGE_SIZE', 10)
+
+    status, page = get('/findings')
+
+    assert status == 200
+    assert len(page['findings']) == 10
+    assert page['nextCursor']
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_cursor_round_trip_returns_every_finding_once(bucket, order):
+    pages = walk('/findings', {'limit': '5', 'order': order})
+
+    keys = [finding['key'] for page in pages for finding in page['findings']]
+    assert [len(page['findings']) for page in pages] == [5, 5, 5, 5, 3]
+    assert len(set(keys)) == 23
+    dates = [finding['date'] for page in pages for finding in page['findings']]
+    assert dates == sorted(dates, reverse=order == 'desc')
+
+
+def test_cursor_keeps_the_order_it_was_issued_under(bucket):
+    _, first = get('/findings', {'limit': '5', 'order': 'asc'})
+    _, second = get('/findings', {'limit': '5', 'order': 'desc', 'cursor': first['nextCursor']})
+
+    assert first['findings'][-1]['date'] <= second['findings'][0]['date']
+
+
+def test_cursor_encoding_round_trips():
+    position = ('2025/05/01', '2025-05-01T03:00:00+00:00', 'security-hub-findings/high/k.json')
+    cursor = DashboardFindings.decode_cursor(DashboardFindings.encode_cursor(position, 'asc'))
+
+    assert cursor == {'order': 'asc', 'position': position}
+
+
+@pytest.mark.parametrize('params', [{'cursor': 'not-a-cursor'}, {'limit': '0'}, {'limit': 'ten'}, {'order': 'up'}])
+def test_malformed_paging_parameters_are_rejected(bucket, params):
+    status, body = get('/findings', params)
+
+    assert status == 400
+    assert 'error' in body
+
+
+def test_account_listing_is_paged_and_scoped(bucket):
+    pages = walk(f"/finding/{ACCOUNTS[1]}", {'limit': '4'}, {'accountId': ACCOUNTS[1]})
+
+    findings = [finding for page in pages for finding in page['findings']]
+    assert len(findings) == 11
+    assert {finding['accountId'] for finding in findings} == {ACCOUNTS[1]}
@@ -0,0 +1,57 @@
+import pytest
+
+from projection import parse_projection, project, build_tree, SUMMARY_FIELDS
+
+FINDING = {
+    'Id': 'f1',
+    'Title': 'Reverse shell',
+    'Severity': {'Label': 'HIGH', 'Normalized': 70},
+    'Resources': [
+        {'Id': 'i-1', 'Type': 'AwsEc2Instance', 'Details': {'AwsEc2Instance': {'IpV4Addresses': ['10.0.0.1']}}},
+        {'Id': 'i-2', 'Type': 'AwsEc2Instance'}
+    ],
+    'ProductFields': {'large': 'x' * 100},
+    'remediationStatus': {'remediated': False}
+}
+
+
+def test_no_projection_asks_for_the_full_document():
+    assert parse_projection({}) is None
+    assert parse_projection({'fields': ' , '}) is None
+
+
+def test_view_and_fields_are_combined():
+    paths = parse_projection({'view': 'summary', 'fields': 'ProductFields.large, Id'})
+
+    assert set(paths) == set(SUMMARY_FIELDS) | {'ProductFields.large'}
+    assert list(paths) == sorted(paths)
+
+
+@pytest.mark.parametrize('params', [{'view': 'everything'}, {'fields': 'Severity..Label'}, {'fields': 'Id;Title'}])
+def test_bad_projections_are_rejected(params):
+    with pytest.raises(ValueError):
+        parse_projection(params)
+
+
+def test_projection_keeps_nested_paths_and_descends_lists():
+    projected = project(FINDING, ('Id', 'Severity.Label', 'Resources.Id', 'Missing.Field'))
+
+    assert projected == {
+        'Id': 'f1',
+        'Severity': {'Label': 'HIGH'},
+        'Resources': [{'Id': 'i-1'}, {'Id': 'i-2'}]
+    }
+
+
+def test_parent_path_keeps_the_whole_field():
+    assert project(FINDING, ('Severity', 'Severity.Label')) == {'Severity': FINDING['Severity']}
+    assert project(FINDING, ('Severity.Label', 'Severity')) == {'Severity': FINDING['Severity']}
+    assert build_tree(['Severity.Label', 'Severity']) == {'Severity': {}}
+
+
+def test_summary_view_leaves_out_product_fields():
+    projected = project(FINDING, parse_projection({'view': 'summary'}))
+
+    assert 'ProductFields' not in projected
+    assert projected['Resources'][0]['Details']['AwsEc2Instance']['IpV4Addresses'] == ['10.0.0.1']
+    assert projected['remediationStatus'] == {'remediated': False}
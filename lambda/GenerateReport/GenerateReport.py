@@ -1,5 +1,4 @@
 import json
-import boto3
 import paramiko
 import os
 import logging
@@ -10,6 +9,10 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from datetime import datetime
 
+from finding_index import load_summaries
+from finding_archive import read_archived, finding_from_row, FINDING_COLUMNS
+from aws_clients import get_client
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -172,7 +175,7 @@ def validate_key_file():
 
 def get_ec2_credentials():
     """Retrieve EC2 credentials from AWS Secrets Manager"""
-    secrets_client = boto3.client('secretsmanager')
+    secrets_client = get_client('secretsmanager')
     try:
         logger.info(f"Retrieving EC2 credentials from Secrets Manager: {SECRET_NAME}")
         response = secrets_client.get_secret_value(SecretId=SECRET_NAME)
@@ -192,13 +195,17 @@ def get_ec2_credentials():
 
 def get_account_findings(account_id):
     """Retrieve all findings for the specified account from S3"""
-    s3 = boto3.client('s3')
+    s3 = get_client('s3')
     findings = []
     
     try:
-        # List all objects in the source bucket
-        paginator = s3.get_paginator('list_objects_v2')
-        pages = paginator.paginate(Bucket=SOURCE_BUCKET)
+        # The per-account index lists exactly this account's findings, so there's
+        # no need to walk the whole bucket looking for the account ID in keys
+        summaries = load_summaries(s3, SOURCE_BUCKET, account_id=account_id)
+        
+        # Compacted days come from one columnar file per day, reading only the columns
+        # needed, instead of one request per finding
+        archived = {row['key']: row for row in read_archived(s3, SOURCE_BUCKET, account_id, ['key'] + FINDING_COLUMNS)}
         
         # Create a directory to store findings temporarily
         os.makedirs('/tmp/findings', exist_ok=True)
@@ -206,23 +213,21 @@ def get_account_findings(account_id):
         # Counter for findings
         finding_count = 0
         
-        # Iterate through all objects and download those related to the account ID
-        for page in pages:
-            if 'Contents' not in page:
-                continue
-                
-            for obj in page['Contents']:
-                key = obj['Key']
-                
-                # Check if the object contains the account ID (you might want to adjust this logic)
-                if account_id in key:
-                    # Download the finding
-                    local_file_path = f"/tmp/findings/finding_{finding_count}.json"
-                    s3.download_file(SOURCE_BUCKET, key, local_file_path)
-                    findings.append(local_file_path)
-                    finding_count += 1
-        
-        logger.info(f"Found {finding_count} findings for account {account_id}")
+        for summary in summaries:
+            local_file_path = f"/tmp/findings/finding_{finding_count}.json"
+            if summary['key'] in archived:
+                finding = finding_from_row(archived[summary['key']])
+                # The index is updated on approval, the archive only on the next compaction
+                finding['remediationStatus'] = summary['remediationStatus']
+                with open(local_file_path, 'w') as f:
+                    json.dump(finding, f, indent=2)
+            else:
+                # Download the finding
+                s3.download_file(SOURCE_BUCKET, summary['key'], local_file_path)
+            findings.append(local_file_path)
+            finding_count += 1
+        
+        logger.info(f"Found {finding_count} findings for account {account_id} ({len(archived)} from compacted files)")
         return findings
     
     except ClientError as e:
@@ -319,7 +324,7 @@ def download_report_from_ec2(ssh_client):
 
 def upload_report_to_s3(account_id):
     """Upload the report to the destination S3 bucket"""
-    s3 = boto3.client('s3')
+    s3 = get_client('s3')
     local_report_path = '/tmp/security_report.pdf'
     
     try:
@@ -360,7 +365,7 @@ def get_account_email(account_id):
     """Retrieve the account's email address from AWS Organizations"""
     try:
         # Create an AWS Organizations client
-        organizations_client = boto3.client('organizations')
+        organizations_client = get_client('organizations')
         
         # Describe the account to get its details
         response = organizations_client.describe_account(AccountId=account_id)
@@ -379,7 +384,7 @@ def get_account_email(account_id):
         
         # Try to get email from Parameter Store as a fallback
         try:
-            ssm = boto3.client('ssm')
+            ssm = get_client('ssm')
             parameter = ssm.get_parameter(Name=f"/soarcery/account-emails/{account_id}")
             email = parameter['Parameter']['Value']
             logger.info(f"Using fallback email {email} from Parameter Store for account {account_id}")
@@ -395,7 +400,7 @@ def send_email_with_report(account_id, recipient_email, report_path):
     """Send the security report via email with SES"""
     try:
         # Create SES client
-        ses_client = boto3.client('ses')
+        ses_client = get_client('ses')
         
         # Get account name (optional, for personalization)
         account_name = get_account_name(account_id)
@@ -562,7 +567,7 @@ def get_account_name(account_id):
     """Get account name from AWS Organizations"""
     try:
         # Create Organizations client
-        organizations_client = boto3.client('organizations')
+        organizations_client = get_client('organizations')
         
         # Describe the account
         response = organizations_client.describe_account(AccountId=account_id)
@@ -1,26 +1,61 @@
+import os
 import json
-import boto3
+import time
 import datetime
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError, HTTPClientError, ConnectionError as EndpointError
+
+from s3_json import read_json, update_json, fan_out
+from finding_index import upsert_summary, apply_summaries
+from finding_changes import record_change, CHANGE_CREATED, CHANGE_UPDATED, CHANGE_REMEDIATED
+from finding_search import update_postings, find_remote_ip
+from finding_dedup import (
+    claim_finding, confirm_claim, release_claim, dedup_key, mark_remediation_queued, clear_remediation_queued,
+    FINDING_DUPLICATE
+)
+from aws_clients import get_client
+from credential_broker import get_role_client
+from rate_limiter import RateLimitedClient, limiter_stats
+from ec2_inventory import find_instance, refresh_subnet_nacl, inventory_stats
+from remediation_rules import load_rules
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize AWS clients
-s3_client = boto3.client('s3')
-sts_client = boto3.client('sts')
+s3_client = get_client('s3')
+sts_client = get_client('sts')
 
 # Configuration
 bucket_name = 'soarcery'  # Replace with your actual bucket name
+REMEDIATION_ROLE_NAME = os.environ.get('REMEDIATION_ROLE_NAME', 'SecurityHubRemediationRole')
+
+# Findings of different accounts in one event are processed concurrently on this many threads
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', '8'))
+_pipeline_executor = None
+
+# When set, ingest stores the finding and queues its automatic remediation here for
+# RemediationWorker; unset, remediation runs inline before the finding is stored
+REMEDIATION_QUEUE_URL = os.environ.get('REMEDIATION_QUEUE_URL')
+
+# Error codes after which a queued remediation is retried rather than recorded as done
+TRANSIENT_ERROR_CODES = (
+    'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException',
+    'ServiceUnavailable', 'Unavailable', 'InternalError', 'InternalFailure'
+)
 
-# List of attack types to store in S3
-ALLOWED_ATTACK_TYPES = [
-    "UnauthorizedAccess:EC2/MaliciousIPCaller.Custom",
-    "TTPs/Command and Control/UnauthorizedAccess:EC2-MaliciousIPCaller.Custom",
-    "TTPs/Execution/Execution:Runtime-ReverseShell"
-]
+# A finding whose remediation job was queued this long ago without an outcome gets a new job
+QUEUED_JOB_TIMEOUT_SECONDS = int(os.environ.get('QUEUED_JOB_TIMEOUT_SECONDS', '86400'))
+
+# NACL rule numbers used for deny entries, below the usual allow rules starting at 100
+DENY_RULE_NUMBERS = range(1, 100)
+
+# Which attack types are stored and how each is remediated comes from the rules table
+# (remediation_rules.json, or REMEDIATION_RULES_PATH), compiled once per container
+_rules = None
 
 def get_severity_category_from_label(severity_label):
     """
@@ -90,9 +125,10 @@ def lambda_handler(event, context):
         region = context.invoked_function_arn.split(':')[3] if hasattr(context, 'invoked_function_arn') else 'us-east-1'
         logger.info(f"Lambda running in region: {region}")
         
-        # Re-initialize S3 client with specific region to avoid cross-region issues
+        # Use an S3 client pinned to the function's region to avoid cross-region issues;
+        # it is created once per container and reused by later invocations
         global s3_client
-        s3_client = boto3.client('s3', region_name=region)
+        s3_client = get_client('s3', region_name=region)
         
         # Get current account ID - ALWAYS retrieve fresh to ensure accuracy
         try:
@@ -133,102 +169,32 @@ def lambda_handler(event, context):
                 'body': json.dumps('No findings to process')
             }
         
-        processed_count = 0
-        filtered_count = 0
-            
-        for finding in findings:
-            finding_id = finding.get('Id', 'unknown_id')
-            account_id = finding.get('AwsAccountId', 'unknown_account')
-            
-            # Get finding type
-            finding_type = None
-            if finding.get('Types'):
-                finding_type = finding.get('Types')[0]
-            
-            # Skip findings that are not in our allowed list
-            if not finding_type or not any(allowed_type in finding_type for allowed_type in ALLOWED_ATTACK_TYPES):
-                logger.info(f"Skipping finding {finding_id} with type {finding_type} as it's not in allowed attack types")
-                filtered_count += 1
-                continue
-            
-            # Log the account IDs for debugging
-            logger.info(f"Finding Account ID: {account_id}, Lambda Account ID: {current_account_id}")
-            
-            severity = finding.get('Severity', {}).get('Normalized', 0)
-            severity_label = finding.get('Severity', {}).get('Label', 'UNKNOWN')
-            
-            logger.info(f"Processing finding: {finding_id}, Type: {finding_type}, Severity: {severity_label}")
-            
-            severity_category = get_severity_category_from_label(severity_label)
-            
-            current_date = datetime.datetime.now().strftime('%Y/%m/%d')
-            unique_id = str(uuid.uuid4())
-            key = f"security-hub-findings/{severity_category}/{current_date}/{account_id}_{finding_id}_{unique_id}.json"
-            
-            # Determine if this is a cross-account finding and handle appropriately
-            is_cross_account = False
-            if account_id and current_account_id and account_id != current_account_id:
-                is_cross_account = True
-                logger.info(f"Cross-account scenario detected: finding from {account_id}, Lambda in {current_account_id}")
-            
-            # Special handling for SuspiciousCommand - always set remediation to false
-            if "Execution:Runtime/SuspiciousCommand" in finding_type:
-                finding['remediationStatus'] = {
-                    'remediated': False,
-                    'remediationAction': "No remediation applied for SuspiciousCommand findings",
-                    'remediationTimestamp': datetime.datetime.now().isoformat()
-                }
-            else:
-                # Apply remediation for other allowed attack types
-                remediation_result = "No automatic remediation applied"
-                if severity_category in ["low", "medium"]:
-                    logger.info(f"Applying remediation for severity {severity_category}")
-                    remediation_result = auto_remediate_finding(finding, current_account_id)
-                
-                finding['remediationStatus'] = {
-                    'remediated': remediation_result != "No automatic remediation applied",
-                    'remediationAction': remediation_result,
-                    'remediationTimestamp': datetime.datetime.now().isoformat()
-                }
-            
-            try:
-                # Try to put the object without KMS encryption first
-                s3_client.put_object(
-                    Bucket=bucket_name,
-                    Key=key,
-                    Body=json.dumps(finding, indent=2),
-                    ContentType='application/json',
-                    # Explicitly disable KMS by setting ServerSideEncryption to AES256 (Amazon S3-managed encryption)
-                    ServerSideEncryption='AES256'
-                )
-                processed_count += 1
-            except Exception as s3_error:
-                logger.warning(f"Error putting object to S3 with AES256 encryption: {str(s3_error)}")
-                # If putting to main bucket fails, try a fallback approach
-                try:
-                    # Try with a different path in the same bucket
-                    fallback_key = f"unencrypted-findings/{severity_category}/{current_date}/{account_id}_{finding_id}_{unique_id}.json"
-                    s3_client.put_object(
-                        Bucket=bucket_name,
-                        Key=fallback_key,
-                        Body=json.dumps(finding, indent=2),
-                        ContentType='application/json'
-                    )
-                    logger.info(f"Used fallback path for S3 storage: {fallback_key}")
-                    key = fallback_key
-                    processed_count += 1
-                except Exception as fallback_error:
-                    logger.error(f"Fallback S3 storage also failed: {str(fallback_error)}")
-                    # Continue execution without failing the entire function
-            
-            logger.info(f"Successfully exported finding {finding_id} to s3://{bucket_name}/{key}")
+        get_rules()  # compiled before the pipeline threads start
+        started = time.perf_counter()
+        results = process_findings(findings, current_account_id)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        logger.info(f"Processed {len(results)} findings from {len({r['accountId'] for r in results})} accounts "
+                    f"in {elapsed_ms:.0f} ms: {json.dumps(counts)}")
+        if limiter_stats():
+            logger.info(f"Rate limiter stats: {json.dumps(limiter_stats())}")
+            logger.info(f"EC2 inventory stats: {json.dumps(inventory_stats())}")
         
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Successfully processed findings',
-                'findingsProcessed': processed_count,
-                'findingsFiltered': filtered_count
+                'findingsProcessed': counts.get('created', 0) + counts.get('updated', 0),
+                'findingsFiltered': counts.get('filtered', 0),
+                'findingsDuplicate': counts.get('duplicate', 0),
+                'findingsFailed': counts.get('failed', 0),
+                'findingsIndexFailed': sum(1 for result in results if result.get('indexed') is False),
+                'findingsQueueFailed': sum(1 for result in results if result.get('queued') is False),
+                'elapsedMs': round(elapsed_ms, 1),
+                'results': results
             })
         }
     except Exception as e:
@@ -238,50 +204,466 @@ def lambda_handler(event, context):
             'body': json.dumps(f'Error processing findings: {str(e)}')
         }
 
-def auto_remediate_finding(finding, current_account_id=None):
+def process_findings(findings, current_account_id):
+    """
+    Run process_finding over a batch of findings. Accounts are processed concurrently on a
+    bounded pool and each account's findings in event order, so updates of one finding never
+    overtake each other. The indexes of everything stored are then updated in one batch.
+    Results come back in event order.
+    """
+    global _pipeline_executor
+    groups = {}
+    for position, finding in enumerate(findings):
+        groups.setdefault(finding.get('AwsAccountId', 'unknown_account'), []).append((position, finding))
+    stored = []
+    
+    def run(group):
+        return [(position, process_finding(finding, current_account_id, stored)) for position, finding in group]
+    
+    if len(groups) <= 1 or PIPELINE_WORKERS <= 1:
+        outputs = [run(group) for group in groups.values()]
+    else:
+        # A pool of its own: claims and reads fan out on the shared S3 pool from inside these tasks
+        if _pipeline_executor is None:
+            _pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS)
+        outputs = list(_pipeline_executor.map(run, groups.values()))
+    
+    update_indexes(stored, current_account_id)
+    
+    results = [None] * len(findings)
+    for output in outputs:
+        for position, result in output:
+            results[position] = result
+    return results
+
+def update_indexes(stored, current_account_id):
+    """
+    Bring the summary index, stats rollups, search index and change log up to date for the
+    findings of one event, after the per-account work. Each shard is written once per event
+    rather than once per finding by concurrently running account groups, so the event's
+    findings don't exhaust each other's conditional-write attempts; shards that still fail
+    get one more pass. The per-finding change-log writes and queue sends then fan out on the
+    shared pool. Findings whose index entries couldn't be written are reported with
+    indexed: false (`rebuild` restores them), those whose remediation couldn't be queued with
+    queued: false. Queued remediation is sent after the index writes, so the worker never
+    writes a status the batch then overwrites.
+    """
+    if not stored:
+        return
+    moved = [task['previousKey'] for _, task in stored if task['previousKey'] and task['previousKey'] != task['key']]
+    upserts = [(task['key'], task['finding']) for _, task in stored]
+    
+    summaries, failed = apply_summaries(s3_client, bucket_name, upserts, moved)
+    if failed:
+        retried, failed = apply_summaries(
+            s3_client, bucket_name, [u for u in upserts if u[0] in failed], [k for k in moved if k in failed]
+        )
+        summaries.update(retried)
+    
+    additions = [(task['key'], task['finding'], summaries[task['key']]['lastModified'])
+                 for _, task in stored if task['key'] in summaries]
+    removals = [(task['previousKey'], task['previousFinding']) for _, task in stored if task['previousFinding']]
+    failed_terms = update_postings(s3_client, bucket_name, additions, removals)
+    if failed_terms:
+        failed_terms = update_postings(
+            s3_client, bucket_name,
+            [a for a in additions if a[0] in failed_terms], [r for r in removals if r[0] in failed_terms]
+        )
+    failed |= failed_terms
+    
+    # Change-log entries and queue sends run concurrently, one finding at a time per Id so a
+    # finding updated twice in the event keeps its entries in order
+    chains = {}
+    for result, task in stored:
+        chains.setdefault(task['finding'].get('Id') or task['key'], []).append((result, task))
+    
+    def record(chain):
+        failed_keys = set()
+        for result, task in chain:
+            key, previous_key = task['key'], task['previousKey']
+            try:
+                if previous_key and previous_key != key:
+                    record_change(s3_client, bucket_name, CHANGE_UPDATED, previous_key, deleted=True)
+                record_change(s3_client, bucket_name, CHANGE_UPDATED if previous_key else CHANGE_CREATED,
+                              key, summaries.get(key))
+            except Exception as change_error:
+                logger.error(f"Failed to record change for {key}: {str(change_error)}")
+                failed_keys.add(key)
+            
+            if task['queuedRule']:
+                try:
+                    enqueue_remediation(task['finding'], key, task['queuedRule'], current_account_id)
+                except Exception as queue_error:
+                    logger.error(f"Failed to queue remediation for {key}: {str(queue_error)}")
+                    result['queued'] = False
+        return failed_keys
+    
+    for failed_keys in fan_out(record, chains.values()):
+        failed |= failed_keys
+    
+    for result, task in stored:
+        result['indexed'] = task['key'] not in failed and task['previousKey'] not in failed
+        if not result['indexed']:
+            logger.error(f"Failed to update finding index for {task['key']}")
+
+def process_finding(finding, current_account_id, stored):
+    """
+    Filter, deduplicate, remediate and store one finding. Returns the finding's outcome
+    (created, updated, duplicate, filtered or failed) with how long it took; stored findings
+    are also appended to `stored` with what update_indexes needs.
+    """
+    started = time.perf_counter()
+    
+    def result(status, key=None, error=None):
+        outcome = {
+            'findingId': finding.get('Id', 'unknown_id'),
+            'accountId': finding.get('AwsAccountId', 'unknown_account'),
+            'status': status,
+            'key': key,
+            'remediation': (finding.get('remediationStatus') or {}).get('remediationAction'),
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 1)
+        }
+        if error:
+            outcome['error'] = error
+        return outcome
+    
+    def release(claim):
+        """Drop this delivery's pending dedup claim, so a redelivery is processed again"""
+        if not claim:
+            return
+        try:
+            release_claim(s3_client, bucket_name, finding['Id'], claim['fingerprint'])
+        except Exception as release_error:
+            logger.error(f"Failed to release dedup claim for {finding.get('Id')}: {str(release_error)}")
+    
+    claim = None
+    try:
+        finding_id = finding.get('Id', 'unknown_id')
+        account_id = finding.get('AwsAccountId', 'unknown_account')
+    
+        # Get finding type
+        finding_type = None
+        if finding.get('Types'):
+            finding_type = finding.get('Types')[0]
+    
+        # Skip findings that no rule covers
+        if not get_rules().match(finding_type):
+            logger.info(f"Skipping finding {finding_id} with type {finding_type} as no remediation rule matches it")
+            return result('filtered')
+    
+        # Log the account IDs for debugging
+        logger.info(f"Finding Account ID: {account_id}, Lambda Account ID: {current_account_id}")
+    
+        severity = finding.get('Severity', {}).get('Normalized', 0)
+        severity_label = finding.get('Severity', {}).get('Label', 'UNKNOWN')
+    
+        logger.info(f"Processing finding: {finding_id}, Type: {finding_type}, Severity: {severity_label}")
+    
+        severity_category = get_severity_category_from_label(severity_label)
+    
+        current_date = datetime.datetime.now().strftime('%Y/%m/%d')
+        unique_id = str(uuid.uuid4())
+        key = f"security-hub-findings/{severity_category}/{current_date}/{account_id}_{finding_id}_{unique_id}.json"
+    
+        # Security Hub re-emits a finding every time it is updated. Each version is stored
+        # once, replacing the earlier object, and a remediated finding is not remediated again
+        previous_key = None
+        previous_finding = None
+        if finding.get('Id'):
+            claim = claim_finding(s3_client, bucket_name, finding, key)
+            if claim['status'] == FINDING_DUPLICATE:
+                logger.info(f"Skipping finding {finding_id}, stored unchanged at {claim['key']}")
+                return result('duplicate', claim['key'])
+            key = claim['key']
+            if claim['previous']:
+                previous_key = claim['previous']['key']
+                previous_finding, _ = read_json(s3_client, bucket_name, previous_key)
+        previous_status = (previous_finding or {}).get('remediationStatus') or {}
+        queued_rule = None
+    
+        # Determine if this is a cross-account finding and handle appropriately
+        is_cross_account = False
+        if account_id and current_account_id and account_id != current_account_id:
+            is_cross_account = True
+            logger.info(f"Cross-account scenario detected: finding from {account_id}, Lambda in {current_account_id}")
+    
+        if previous_status.get('remediated'):
+            logger.info(f"Finding {finding_id} was already remediated, keeping its remediation status")
+            finding['remediationStatus'] = previous_status
+        else:
+            rule = get_rules().select(finding_type, severity_category)
+            remediated = False
+            if rule and rule['mode'] == 'auto' and REMEDIATION_QUEUE_URL:
+                # Stored right away; RemediationWorker runs the action and writes back the outcome
+                remediation_result = f"Queued for automatic remediation: {rule['action']}"
+                queued_rule = rule
+            elif rule and rule['mode'] == 'auto':
+                logger.info(f"Applying remediation {rule['action']} for severity {severity_category} (rule {rule['name']})")
+                remediated, remediation_result = auto_remediate_finding(finding, rule, current_account_id)
+            elif rule and rule['mode'] == 'approval':
+                remediation_result = rule['note'] or f"Awaiting approval for {rule['action']}"
+            elif rule:
+                remediation_result = rule['note'] or "No remediation applied"
+            else:
+                remediation_result = "No automatic remediation applied"
+        
+            finding['remediationStatus'] = {
+                'remediated': remediated,
+                'remediationAction': remediation_result,
+                'remediationTimestamp': datetime.datetime.now().isoformat()
+            }
+    
+        try:
+            # Try to put the object without KMS encryption first
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=key,
+                Body=json.dumps(finding, indent=2),
+                ContentType='application/json',
+                # Explicitly disable KMS by setting ServerSideEncryption to AES256 (Amazon S3-managed encryption)
+                ServerSideEncryption='AES256'
+            )
+        except Exception as s3_error:
+            logger.warning(f"Error putting object to S3 with AES256 encryption: {str(s3_error)}")
+            # If putting to main bucket fails, try a fallback approach
+            try:
+                # Try with a different path in the same bucket
+                fallback_key = f"unencrypted-findings/{severity_category}/{current_date}/{account_id}_{finding_id}_{unique_id}.json"
+                s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=fallback_key,
+                    Body=json.dumps(finding, indent=2),
+                    ContentType='application/json'
+                )
+                logger.info(f"Used fallback path for S3 storage: {fallback_key}")
+                key = fallback_key
+            except Exception as fallback_error:
+                logger.error(f"Fallback S3 storage also failed: {str(fallback_error)}")
+                release(claim)
+                # Continue with the other findings without failing the entire function
+                return result('failed')
+    
+        logger.info(f"Successfully exported finding {finding_id} to s3://{bucket_name}/{key}")
+        
+        if claim:
+            # Only now is the claim's version the stored one; until then a redelivery after
+            # the claim went stale is processed again
+            try:
+                confirm_claim(s3_client, bucket_name, finding['Id'], claim['fingerprint'], key)
+                claim = None
+            except Exception as confirm_error:
+                logger.error(f"Failed to confirm dedup claim for {finding_id}: {str(confirm_error)}")
+    
+        if previous_key and previous_key != key:
+            # The severity category changed, so the finding moved to a new key
+            try:
+                s3_client.delete_object(Bucket=bucket_name, Key=previous_key)
+            except Exception as delete_error:
+                logger.error(f"Failed to delete moved finding {previous_key}: {str(delete_error)}")
+    
+        # The indexes and change log are updated for the whole event by update_indexes
+        outcome = result('updated' if previous_key else 'created', key)
+        stored.append((outcome, {
+            'key': key,
+            'finding': finding,
+            'previousKey': previous_key,
+            'previousFinding': previous_finding,
+            'queuedRule': queued_rule
+        }))
+        return outcome
+    except Exception as e:
+        logger.error(f"Error processing finding {finding.get('Id')}: {str(e)}")
+        release(claim)
+        return result('failed', error=str(e))
+
+def get_rules():
+    """The compiled remediation rules table, loaded on first use"""
+    global _rules
+    if _rules is None:
+        _rules = load_rules(REMEDIATION_ACTIONS)
+    return _rules
+
+def auto_remediate_finding(finding, rule, current_account_id=None):
+    """Run the automatic action a rule names for a finding; returns (remediated, details)"""
     finding_type = finding.get('Types', ['unknown_type'])[0] if finding.get('Types') else 'unknown_type'
     account_id = finding.get('AwsAccountId', 'unknown_account')
     
-    remediation_functions = {
-        "UnauthorizedAccess:EC2/MaliciousIPCaller.Custom": remediate_malicious_ip_caller,
-        "TTPs/Command and Control/UnauthorizedAccess:EC2-MaliciousIPCaller.Custom" : remediate_malicious_ip_caller
+    logger.info(f"Applying automatic remediation {rule['action']} for finding: {finding_type}")
+    if account_id and current_account_id and account_id != current_account_id:
+        logger.info(f"Cross-account remediation for finding from {account_id}")
+    
+    # We'll always attempt remediation regardless of account
+    try:
+        return REMEDIATION_ACTIONS[rule['action']](finding, current_account_id)
+    except Exception as e:
+        # Inline there is no retry; the finding is stored with the error instead
+        logger.error(f"Error running remediation {rule['action']}: {str(e)}")
+        return False, f"Error running remediation {rule['action']}: {str(e)}"
+
+def is_transient_error(error):
+    """Throttling, AWS-side and connection errors, which a later attempt may not hit"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in TRANSIENT_ERROR_CODES
+    return isinstance(error, (HTTPClientError, EndpointError))
+
+def enqueue_remediation(finding, key, rule, current_account_id):
+    """
+    Queue a stored finding's automatic remediation for RemediationWorker, unless a job for
+    it is already queued (Security Hub re-emitted the finding meanwhile). If the queue can't
+    be reached the job runs inline instead, so no finding is left marked as queued.
+    """
+    job = {
+        'findingId': finding.get('Id'),
+        'key': key,
+        'accountId': finding.get('AwsAccountId'),
+        'action': rule['action'],
+        'rule': rule['name'],
+        'severity': get_severity_category_from_label(finding.get('Severity', {}).get('Label', 'UNKNOWN')),
+        'currentAccountId': current_account_id,
+        'queuedAt': datetime.datetime.now(datetime.timezone.utc).isoformat()
     }
+    if job['findingId'] and not mark_remediation_queued(
+            s3_client, bucket_name, job['findingId'], job['action'], QUEUED_JOB_TIMEOUT_SECONDS):
+        logger.info(f"Remediation {rule['action']} for {job['findingId']} is already queued")
+        return
+    try:
+        get_client('sqs').send_message(QueueUrl=REMEDIATION_QUEUE_URL, MessageBody=json.dumps(job))
+        logger.info(f"Queued remediation {rule['action']} for {key}")
+    except Exception as e:
+        logger.error(f"Could not queue remediation for {key}, running it inline: {str(e)}")
+        try:
+            status = run_remediation_job(job)
+        except Exception as job_error:
+            status = record_remediation_failure(job, job_error)
+        if status:
+            finding['remediationStatus'] = status
+
+def current_finding_key(job):
+    """Where the job's finding is stored now: an update may have moved it since it was queued"""
+    if job.get('findingId'):
+        record, _ = read_json(s3_client, bucket_name, dedup_key(job['findingId']))
+        if record and record.get('key'):
+            return record['key']
+    return job['key']
+
+def write_remediation_status(key, status):
+    """
+    Set a stored finding's remediationStatus with a conditional write, unless the finding is
+    gone or already remediated, and reflect it in the index and change log. Returns the
+    status the finding ends up with, or None if it no longer exists.
+    """
+    written = {}
     
-    severity_label = finding.get('Severity', {}).get('Label', 'UNKNOWN')
-    severity_category = get_severity_category_from_label(severity_label)
+    def mutate(finding):
+        if finding is None or (finding.get('remediationStatus') or {}).get('remediated'):
+            return None
+        written['finding'] = {**finding, 'remediationStatus': status}
+        return written['finding']
     
-    logger.info(f"Finding type {finding_type} categorized as {severity_category} severity")
+    finding = update_json(s3_client, bucket_name, key, mutate)
+    if 'finding' not in written:
+        return finding.get('remediationStatus') if finding else None
     
-    # First check if this is a SuspiciousCommand type - we should never remediate these
-    if "Execution:Runtime/SuspiciousCommand" in finding_type:
-        logger.info(f"No remediation attempted for SuspiciousCommand finding type")
-        return "No remediation for SuspiciousCommand findings"
+    try:
+        summary = upsert_summary(s3_client, bucket_name, key, written['finding'])
+        record_change(s3_client, bucket_name, CHANGE_REMEDIATED, key, summary)
+    except Exception as index_error:
+        logger.error(f"Failed to update finding index for {key}: {str(index_error)}")
+    return status
+
+def run_remediation_job(job):
+    """
+    Run one queued remediation against the stored finding and write the outcome back to its
+    remediationStatus. Transient AWS errors are raised so the job is retried; anything else
+    the action reports is recorded as its outcome, with `remediated` only when it succeeded.
+    A job for a finding that is gone or already remediated does nothing, and the actions
+    are idempotent, so redelivered jobs are harmless.
+    """
+    key = current_finding_key(job)
+    finding, _ = read_json(s3_client, bucket_name, key)
+    if finding is None:
+        logger.warning(f"Finding {job.get('findingId')} is no longer stored at {key}, dropping remediation job")
+        finish_job(job)
+        return None
+    if (finding.get('remediationStatus') or {}).get('remediated'):
+        logger.info(f"Finding at {key} is already remediated")
+        finish_job(job)
+        return finding['remediationStatus']
     
-    # For other finding types, check if we have a remediation function
-    for finding_type_pattern, remediation_function in remediation_functions.items():
-        if finding_type_pattern in finding_type and severity_category in ["low", "medium"]:
-            logger.info(f"Applying automatic remediation for {severity_category} severity finding: {finding_type}")
-            
-            # Check if this is a cross-account scenario
-            is_cross_account = False
-            if account_id and current_account_id and account_id != current_account_id:
-                is_cross_account = True
-                logger.info(f"Cross-account remediation for finding from {account_id}")
-            
-            # We'll always attempt remediation regardless of account
-            return remediation_function(finding, current_account_id)
+    action = REMEDIATION_ACTIONS.get(job.get('action'))
+    if action is None:
+        remediated, remediation_result = False, f"Unknown remediation action {job.get('action')}"
+    else:
+        logger.info(f"Running remediation {job['action']} for {key}")
+        remediated, remediation_result = action(finding, job.get('currentAccountId'))
     
-    logger.info(f"No automatic remediation configured for finding type: {finding_type} with severity: {severity_category}")
-    return f"No automatic remediation for finding type: {finding_type}"
+    status = write_remediation_status(key, {
+        'remediated': remediated,
+        'remediationAction': remediation_result,
+        'remediationTimestamp': datetime.datetime.now().isoformat()
+    })
+    finish_job(job)
+    return status
+
+def record_remediation_failure(job, error, attempts=1):
+    """Record on the finding that its remediation gave up, once the job is headed for the dead-letter queue"""
+    status = write_remediation_status(current_finding_key(job), {
+        'remediated': False,
+        'remediationAction': f"Remediation {job.get('action')} failed after {attempts} attempt(s): {str(error)}",
+        'remediationTimestamp': datetime.datetime.now().isoformat()
+    })
+    finish_job(job)
+    return status
+
+def finish_job(job):
+    """Clear the finding's queued-job marker so a later update can queue a new job"""
+    if job.get('findingId'):
+        clear_remediation_queued(s3_client, bucket_name, job['findingId'])
+
+def add_deny_entry(ec2_client, nacl_id, cidr_block, egress):
+    """
+    Add a deny entry for cidr_block to the NACL unless one is already there, so a retried
+    remediation doesn't fail on its own earlier work. The rule number is the lowest free one;
+    if another remediation takes it first, the entries are read again. Returns False when
+    the entry already existed.
+    """
+    for attempt in range(3):
+        entries = ec2_client.describe_network_acls(NetworkAclIds=[nacl_id])['NetworkAcls'][0].get('Entries', [])
+        used = set()
+        for entry in entries:
+            if entry.get('Egress') != egress:
+                continue
+            if entry.get('CidrBlock') == cidr_block and entry.get('RuleAction') == 'deny':
+                return False
+            used.add(entry['RuleNumber'])
+        rule_number = next((number for number in DENY_RULE_NUMBERS if number not in used), None)
+        if rule_number is None:
+            raise RuntimeError(f"No free deny rule number in NACL {nacl_id}")
+        try:
+            ec2_client.create_network_acl_entry(
+                NetworkAclId=nacl_id,
+                RuleNumber=rule_number,
+                Protocol='-1',
+                RuleAction='deny',
+                Egress=egress,
+                CidrBlock=cidr_block,
+                PortRange={'From': 0, 'To': 65535}
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'NetworkAclEntryAlreadyExists':
+                raise
+    raise RuntimeError(f"Could not find a free deny rule number in NACL {nacl_id}")
 
 def remediate_malicious_ip_caller(finding, current_account_id=None):
     """
     Remediate EC2 instance by adding deny rules to the subnet's Network ACL for malicious IP.
+    Returns (remediated, details).
     """
     try:
         resources = finding.get('Resources', [])
         if not resources:
-            return "No resources found in the finding"
+            return False, "No resources found in the finding"
 
         for resource in resources:
             if resource.get('Type') != 'AwsEc2Instance':
@@ -292,109 +674,63 @@ def remediate_malicious_ip_caller(finding, current_account_id=None):
             account_id = finding.get('AwsAccountId')
 
             # Extract malicious IP - checking multiple possible locations
-            malicious_ip = None
-            if 'ProductFields' in finding:
-                # Try multiple paths for the IP address
-                product_fields = finding['ProductFields']
-                if 'aws/guardduty/service/action/networkConnectionAction/remoteIpDetails/ipAddressV4' in product_fields:
-                    malicious_ip = product_fields['aws/guardduty/service/action/networkConnectionAction/remoteIpDetails/ipAddressV4']
-                elif 'service' in product_fields and 'action' in product_fields['service']:
-                    action = product_fields['service']['action']
-                    if 'networkConnectionAction' in action and 'remoteIpDetails' in action['networkConnectionAction']:
-                        malicious_ip = action['networkConnectionAction']['remoteIpDetails'].get('ipAddressV4')
-                    
-                # If normal paths fail, do a recursive dictionary search for 'ipAddressV4'
-                if not malicious_ip:
-                    def find_ip_in_dict(d):
-                        if not isinstance(d, dict):
-                            return None
-                        for k, v in d.items():
-                            if k == 'ipAddressV4' and isinstance(v, str):
-                                return v
-                            elif isinstance(v, dict):
-                                result = find_ip_in_dict(v)
-                                if result:
-                                    return result
-                            elif isinstance(v, list):
-                                for item in v:
-                                    if isinstance(item, dict):
-                                        result = find_ip_in_dict(item)
-                                        if result:
-                                            return result
-                        return None
-                    
-                    malicious_ip = find_ip_in_dict(product_fields)
+            malicious_ip = find_remote_ip(finding)
 
             if not malicious_ip:
-                return "No malicious IP found in the finding"
+                return False, "No malicious IP found in the finding"
 
             # Assume role if cross-account
             is_cross_account = account_id and current_account_id and account_id != current_account_id
             if is_cross_account:
-                role_arn = f"arn:aws:iam::{account_id}:role/SecurityHubRemediationRole"
                 try:
-                    creds = sts_client.assume_role(
-                        RoleArn=role_arn,
-                        RoleSessionName=f"RemediationSession-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    )['Credentials']
-                    ec2_client = boto3.client(
-                        'ec2',
-                        region_name=region,
-                        aws_access_key_id=creds['AccessKeyId'],
-                        aws_secret_access_key=creds['SecretAccessKey'],
-                        aws_session_token=creds['SessionToken']
-                    )
+                    ec2_client = get_role_client('ec2', account_id, REMEDIATION_ROLE_NAME, region)
                 except Exception as e:
-                    return f"Could not assume role in account {account_id}: {str(e)}"
+                    if is_transient_error(e):
+                        raise
+                    return False, f"Could not assume role in account {account_id}: {str(e)}"
             else:
-                ec2_client = boto3.client('ec2', region_name=region)
+                ec2_client = get_client('ec2', region_name=region)
+            # Paced per account and region, with the most severe findings' calls served first
+            severity_category = get_severity_category_from_label(finding.get('Severity', {}).get('Label', 'UNKNOWN'))
+            ec2_client = RateLimitedClient(ec2_client, account_id or current_account_id, severity_category)
 
-            # Get instance details
-            instance_resp = ec2_client.describe_instances(InstanceIds=[instance_id])
-            reservations = instance_resp.get('Reservations', [])
-            if not reservations:
-                return f"Instance {instance_id} not found"
+            # Instance, subnet and NACL from the account's cached EC2 inventory
+            instance = find_instance(account_id or current_account_id, instance_id, ec2_client)
+            if not instance:
+                return False, f"Instance {instance_id} not found"
 
-            instance = reservations[0]['Instances'][0]
-            subnet_id = instance.get('SubnetId')
+            subnet_id = instance['subnetId']
 
             if not subnet_id:
-                return f"No subnet found for instance {instance_id}"
-
-            # Get subnet's NACL
-            nacls_resp = ec2_client.describe_network_acls(
-                Filters=[{'Name': 'association.subnet-id', 'Values': [subnet_id]}]
-            )
-            nacls = nacls_resp.get('NetworkAcls', [])
-            if not nacls:
-                return f"No NACL associated with subnet {subnet_id}"
-
-            nacl_id = nacls[0]['NetworkAclId']
+                return False, f"No subnet found for instance {instance_id}"
 
-            # Determine next available rule number
-            existing_rules = nacls[0].get('Entries', [])
-            rule_numbers = [entry['RuleNumber'] for entry in existing_rules if entry['RuleNumber'] < 32766]
-            next_rule_number = max(rule_numbers, default=100) + 1
+            # The cached association may predate a NACL change, so the one to write to is read fresh
+            nacl_id = refresh_subnet_nacl(account_id or current_account_id, subnet_id, ec2_client)
+            if not nacl_id:
+                return False, f"No NACL associated with subnet {subnet_id}"
 
             # Add ingress and egress deny rules
             for direction, egress in [('ingress', False), ('egress', True)]:
-                ec2_client.create_network_acl_entry(
-                    NetworkAclId=nacl_id,
-                    RuleNumber=10,
-                    Protocol='-1',
-                    RuleAction='deny',
-                    Egress=egress,
-                    CidrBlock=f"{malicious_ip}/32",
-                    PortRange={'From': 0, 'To': 65535}
-                )
-                logger.info(f"Added {direction} DENY rule to NACL {nacl_id} for IP {malicious_ip}")
+                if add_deny_entry(ec2_client, nacl_id, f"{malicious_ip}/32", egress):
+                    logger.info(f"Added {direction} DENY rule to NACL {nacl_id} for IP {malicious_ip}")
+                else:
+                    logger.info(f"{direction} DENY rule for IP {malicious_ip} already in NACL {nacl_id}")
+
+            return True, f"Added DENY rules in NACL {nacl_id} for malicious IP {malicious_ip} on subnet {subnet_id}"
 
-            return f"Added DENY rules in NACL {nacl_id} for malicious IP {malicious_ip} on subnet {subnet_id}"
+        return False, "No EC2 instance found in the finding"
 
     except Exception as e:
         logger.error(f"Error remediating using NACL: {str(e)}")
-        return f"Error remediating using NACL: {str(e)}"
+        if is_transient_error(e):
+            raise
+        return False, f"Error remediating using NACL: {str(e)}"
+
 
+# Actions the rules table can name for automatic remediation
+REMEDIATION_ACTIONS = {
+    'block_malicious_ip': remediate_malicious_ip_caller
+}
 
 def create_remediation_document(finding, instance_id, region, malicious_ip, account_id):
     """
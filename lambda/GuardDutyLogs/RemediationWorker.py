@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import logging
+
+from GuardDutyLogs import run_remediation_job, record_remediation_failure
+from rate_limiter import limiter_stats, PRIORITIES
+from ec2_inventory import inventory_stats
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# The queue's redrive maxReceiveCount: on the last receive a failing job's finding is marked
+# failed before SQS moves the message to the dead-letter queue
+MAX_RECEIVE_COUNT = int(os.environ.get('REMEDIATION_MAX_RECEIVES', '5'))
+
+def job_priority(record):
+    """Order a batch's jobs by the severity of their finding, unreadable ones last"""
+    try:
+        severity = json.loads(record['body']).get('severity')
+    except Exception:
+        return len(PRIORITIES)
+    return PRIORITIES.get(severity or 'medium', PRIORITIES['unknown'])
+
+def lambda_handler(event, context):
+    """
+    Run the remediation jobs GuardDutyLogs queued, most severe first. Each SQS record is one
+    job; the ones that fail are reported as batchItemFailures so only they are redelivered,
+    not the whole batch.
+    """
+    records = sorted(event.get('Records', []), key=job_priority)
+    started = time.perf_counter()
+    failures = []
+    dead_lettered = 0
+    
+    for record in records:
+        message_id = record.get('messageId')
+        attempts = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+        job = None
+        try:
+            job = json.loads(record['body'])
+            status = run_remediation_job(job)
+            logger.info(f"Remediation job {message_id} for {job.get('key')}: "
+                        f"{(status or {}).get('remediationAction', 'nothing to do')}")
+        except Exception as e:
+            logger.error(f"Remediation job {message_id} failed on attempt {attempts}: {str(e)}")
+            failures.append({'itemIdentifier': message_id})
+            if job and attempts >= MAX_RECEIVE_COUNT:
+                dead_lettered += 1
+                try:
+                    record_remediation_failure(job, e, attempts)
+                except Exception as record_error:
+                    logger.error(f"Could not record failed remediation for {job.get('key')}: {str(record_error)}")
+    
+    logger.info(f"Ran {len(records)} remediation jobs in {(time.perf_counter() - started) * 1000:.0f} ms: "
+                f"{len(records) - len(failures)} done, {len(failures)} to retry, {dead_lettered} to the dead-letter queue")
+    logger.info(f"Rate limiter stats: {json.dumps(limiter_stats())}")
+    logger.info(f"EC2 inventory stats: {json.dumps(inventory_stats())}")
+    return {'batchItemFailures': failures}
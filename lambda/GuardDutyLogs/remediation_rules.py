@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import logging
+import argparse
+from collections import deque
+
+logger = logging.getLogger()
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'remediation_rules.json')
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EventBridge.json')
+
+# The events GuardDutyLogs is invoked for, before narrowing by finding type
+BASE_EVENT_PATTERN = {
+    'source': ['aws.securityhub'],
+    'detail-type': ['Security Hub Findings - Imported']
+}
+
+MATCH_MODES = ('exact', 'contains')
+# auto: remediate on ingest; approval: stored for ApproveRemediation; none: stored only
+REMEDIATION_MODES = ('auto', 'approval', 'none')
+SEVERITIES = ('critical', 'high', 'medium', 'low', 'informational', 'unknown')
+
+# Distinct finding types seen per container are few; results are memoized up to this many
+MATCH_CACHE_SIZE = 4096
+
+
+class PatternAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of substrings: one pass over a text finds every
+    pattern it contains, however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for index, pattern in enumerate(patterns):
+            self._add(pattern, index)
+        self._link()
+
+    def _add(self, pattern, index):
+        state = 0
+        for char in pattern:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].add(index)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.goto[state].items():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.goto[fallback].get(char, 0)
+                self.output[target] |= self.output[self.fail[target]]
+
+    def search(self, text):
+        """Indexes of every pattern occurring in text"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found |= self.output[state]
+        return found
+
+
+class RuleSet:
+    """
+    The compiled rules table. Exact type patterns are looked up in a dict and substring
+    patterns are found with one automaton pass; the rules matching a finding type are
+    memoized, so repeat types cost a single dict lookup.
+    """
+
+    def __init__(self, rules, actions):
+        self.rules = [validate_rule(rule, position, actions) for position, rule in enumerate(rules)]
+        self.exact = {}
+        patterns = []
+        pattern_rules = []
+        for position, rule in enumerate(self.rules):
+            for pattern in rule['types']:
+                if rule['match'] == 'exact':
+                    self.exact.setdefault(pattern, []).append(position)
+                else:
+                    patterns.append(pattern)
+                    pattern_rules.append(position)
+        self.pattern_rules = pattern_rules
+        self.automaton = PatternAutomaton(patterns)
+        self.cache = {}
+
+    def match(self, finding_type):
+        """Every rule whose type pattern matches, in table order"""
+        if not finding_type:
+            return []
+        cached = self.cache.get(finding_type)
+        if cached is not None:
+            return cached
+
+        positions = set(self.exact.get(finding_type, []))
+        positions.update(self.pattern_rules[index] for index in self.automaton.search(finding_type))
+        matched = [self.rules[position] for position in sorted(positions)]
+        if len(self.cache) < MATCH_CACHE_SIZE:
+            self.cache[finding_type] = matched
+        return matched
+
+    def select(self, finding_type, severity_category):
+        """The first matching rule that applies to the severity, or None"""
+        for rule in self.match(finding_type):
+            if severity_category in rule['severities']:
+                return rule
+        return None
+
+
+def validate_rule(rule, position, actions):
+    """Normalize one rules-table entry, raising ValueError for anything the matcher can't use"""
+    name = rule.get('name') or f"rule {position + 1}"
+    types = rule.get('types')
+    if not types or not all(isinstance(t, str) and t for t in types):
+        raise ValueError(f"{name}: types must be a non-empty list of finding type patterns")
+    match = rule.get('match', 'contains')
+    if match not in MATCH_MODES:
+        raise ValueError(f"{name}: match must be one of {', '.join(MATCH_MODES)}")
+    mode = rule.get('mode', 'none')
+    if mode not in REMEDIATION_MODES:
+        raise ValueError(f"{name}: mode must be one of {', '.join(REMEDIATION_MODES)}")
+    severities = [severity.lower() for severity in rule.get('severities', SEVERITIES)]
+    unknown = set(severities) - set(SEVERITIES)
+    if unknown:
+        raise ValueError(f"{name}: unknown severities {sorted(unknown)}")
+    action = rule.get('action')
+    if mode == 'auto' and action not in actions:
+        raise ValueError(f"{name}: automatic action {action!r} is not one of {sorted(actions)}")
+    return {
+        'name': name,
+        'types': list(types),
+        'match': match,
+        'severities': frozenset(severities),
+        'action': action,
+        'mode': mode,
+        'note': rule.get('note')
+    }
+
+
+def load_rules(actions, path=None):
+    """Read and compile the rules table, from REMEDIATION_RULES_PATH or the bundled default"""
+    path = path or os.environ.get('REMEDIATION_RULES_PATH') or DEFAULT_RULES_PATH
+    with open(path) as f:
+        table = json.load(f)
+    rule_set = RuleSet(table.get('rules', []), actions)
+    logger.info(f"Loaded {len(rule_set.rules)} remediation rules from {path}")
+    return rule_set
+
+
+def event_pattern(rule_set):
+    """
+    The EventBridge pattern that only lets through events with a finding some rule matches:
+    exact types as literal values, substring patterns as `*pattern*` wildcards.
+
+    EventBridge matches an event when any finding has any matching type, so the pattern is
+    a superset of what the Lambda keeps (it checks each finding's first type) and the
+    Lambda's own filter stays in place.
+    """
+    values = []
+    for rule in rule_set.rules:
+        for pattern in rule['types']:
+            if rule['match'] == 'exact':
+                value = pattern
+            else:
+                escaped = pattern.replace('\\', '\\\\').replace('*', '\\*')
+                value = {'wildcard': f"*{escaped}*"}
+            if value not in values:
+                values.append(value)
+    return {**BASE_EVENT_PATTERN, 'detail': {'findings': {'Types': values}}}
+
+
+def encode_pattern(pattern):
+    return json.dumps(pattern, separators=(',', ':'))
+
+
+def template_rules(template):
+    """The AWS::Events::Rule resources of a CloudFormation template, by logical id"""
+    return {
+        name: resource for name, resource in template.get('Resources', {}).items()
+        if resource.get('Type') == 'AWS::Events::Rule'
+    }
+
+
+def check_template(rule_set, template):
+    """Names of the template's event rules whose EventPattern differs from the generated one"""
+    expected = event_pattern(rule_set)
+    stale = []
+    for name, resource in template_rules(template).items():
+        current = resource['Properties'].get('EventPattern')
+        if isinstance(current, str):
+            current = json.loads(current)
+        if current != expected:
+            stale.append(name)
+    return stale
+
+
+def update_template(rule_set, template):
+    """Set the generated EventPattern on every event rule of the template"""
+    encoded = encode_pattern(event_pattern(rule_set))
+    for resource in template_rules(template).values():
+        resource['Properties']['EventPattern'] = encoded
+    return template
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the GuardDutyLogs EventBridge pattern from the remediation rules')
+    parser.add_argument('command', choices=['pattern', 'check', 'update'])
+    parser.add_argument('--rules', default=DEFAULT_RULES_PATH)
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE_PATH)
+    args = parser.parse_args()
+
+    # Action names are only checked against the Lambda's functions at runtime
+    with open(args.rules) as f:
+        table = json.load(f)
+    actions = {rule.get('action') for rule in table.get('rules', [])}
+    rule_set = RuleSet(table.get('rules', []), actions)
+
+    if args.command == 'pattern':
+        print(json.dumps(event_pattern(rule_set), indent=2))
+        return
+
+    with open(args.template) as f:
+        template = json.load(f)
+    if args.command == 'check':
+        stale = check_template(rule_set, template)
+        if stale:
+            print(f"{args.template}: EventPattern of {', '.join(stale)} is out of date with {args.rules}; run update")
+            sys.exit(1)
+        print(f"{args.template} is in sync with {args.rules}")
+    else:
+        with open(args.template, 'w') as f:
+            json.dump(update_template(rule_set, template), f, indent=2)
+            f.write('\n')
+        print(f"Updated {args.template}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The function's own modules and the shared layer are imported flat, as they are in Lambda
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(here), os.path.join(os.path.dirname(os.path.dirname(here)), 'Common')]
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
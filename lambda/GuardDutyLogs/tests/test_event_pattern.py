@@ -0,0 +1,49 @@
+import copy
+import json
+
+from remediation_rules import (
+    RuleSet, BASE_EVENT_PATTERN, DEFAULT_RULES_PATH, DEFAULT_TEMPLATE_PATH,
+    event_pattern, check_template, update_template
+)
+
+
+def committed_rules():
+    with open(DEFAULT_RULES_PATH) as f:
+        table = json.load(f)
+    return RuleSet(table['rules'], {rule.get('action') for rule in table['rules']})
+
+
+def committed_template():
+    with open(DEFAULT_TEMPLATE_PATH) as f:
+        return json.load(f)
+
+
+def test_pattern_uses_literals_for_exact_types_and_wildcards_for_substrings():
+    rule_set = RuleSet([
+        {'types': ['Recon:EC2/PortProbeUnprotectedPort'], 'match': 'exact'},
+        {'types': ['Backdoor*C&C', 'Recon:EC2/PortProbeUnprotectedPort'], 'match': 'contains'},
+        {'types': ['Backdoor*C&C']}
+    ], set())
+
+    assert event_pattern(rule_set) == {
+        **BASE_EVENT_PATTERN,
+        'detail': {'findings': {'Types': [
+            'Recon:EC2/PortProbeUnprotectedPort',
+            {'wildcard': '*Backdoor\\*C&C*'},
+            {'wildcard': '*Recon:EC2/PortProbeUnprotectedPort*'}
+        ]}}
+    }
+
+
+def test_committed_template_is_in_sync_with_the_committed_rules():
+    assert check_template(committed_rules(), committed_template()) == []
+
+
+def test_check_reports_stale_rules_and_update_fixes_them():
+    rule_set = committed_rules()
+    template = copy.deepcopy(committed_template())
+    for resource in template['Resources'].values():
+        resource['Properties']['EventPattern'] = json.dumps(BASE_EVENT_PATTERN)
+
+    assert check_template(rule_set, template) == list(template['Resources'])
+    assert check_template(rule_set, update_template(rule_set, template)) == []
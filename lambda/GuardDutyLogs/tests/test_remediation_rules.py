@@ -0,0 +1,67 @@
+import pytest
+
+from remediation_rules import RuleSet, PatternAutomaton, load_rules, DEFAULT_RULES_PATH
+
+ACTIONS = {'block_malicious_ip', 'isolate_instance'}
+
+RULES = [
+    {'name': 'exact-probe', 'types': ['Recon:EC2/PortProbeUnprotectedPort'], 'match': 'exact',
+     'severities': ['high'], 'mode': 'none'},
+    {'name': 'malicious-ip', 'types': ['MaliciousIPCaller'], 'severities': ['low', 'medium'],
+     'action': 'block_malicious_ip', 'mode': 'auto'},
+    {'name': 'any-ec2', 'types': ['EC2'], 'action': 'isolate_instance', 'mode': 'approval'}
+]
+
+
+def test_automaton_finds_every_overlapping_pattern():
+    automaton = PatternAutomaton(['he', 'she', 'his', 'hers'])
+
+    assert automaton.search('ushers') == {0, 1, 3}
+    assert automaton.search('nothing') == set()
+
+
+def test_match_returns_exact_and_substring_rules_in_table_order():
+    rule_set = RuleSet(RULES, ACTIONS)
+
+    assert [rule['name'] for rule in rule_set.match('Recon:EC2/PortProbeUnprotectedPort')] == ['exact-probe', 'any-ec2']
+    assert [rule['name'] for rule in rule_set.match('TTPs/UnauthorizedAccess:EC2-MaliciousIPCaller.Custom')] == \
+        ['malicious-ip', 'any-ec2']
+    # Exact rules don't match a type that merely contains their pattern
+    assert [rule['name'] for rule in rule_set.match('Recon:EC2/PortProbeUnprotectedPort/Extra')] == ['any-ec2']
+    assert rule_set.match('IAMUser/AnomalousBehavior') == []
+    assert rule_set.match(None) == []
+
+
+def test_select_takes_the_first_rule_for_the_severity():
+    rule_set = RuleSet(RULES, ACTIONS)
+    finding_type = 'UnauthorizedAccess:EC2/MaliciousIPCaller.Custom'
+
+    assert rule_set.select(finding_type, 'low')['name'] == 'malicious-ip'
+    assert rule_set.select(finding_type, 'critical')['name'] == 'any-ec2'
+    assert rule_set.select('S3/Unrelated', 'low') is None
+
+
+def test_matches_are_memoized():
+    rule_set = RuleSet(RULES, ACTIONS)
+
+    first = rule_set.match('UnauthorizedAccess:EC2/MaliciousIPCaller.Custom')
+
+    assert rule_set.match('UnauthorizedAccess:EC2/MaliciousIPCaller.Custom') is first
+
+
+@pytest.mark.parametrize('rule', [
+    {'types': []},
+    {'types': ['EC2'], 'match': 'regex'},
+    {'types': ['EC2'], 'mode': 'sometimes'},
+    {'types': ['EC2'], 'severities': ['severe']},
+    {'types': ['EC2'], 'mode': 'auto', 'action': 'reboot_everything'}
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        RuleSet([rule], ACTIONS)
+
+
+def test_bundled_rules_compile():
+    rule_set = load_rules(ACTIONS, DEFAULT_RULES_PATH)
+
+    assert rule_set.select('TTPs/Execution/Execution:Runtime-ReverseShell', 'high')['mode'] == 'approval'
@@ -0,0 +1,107 @@
+import sys
+import json
+import types
+
+import pytest
+
+
+class StubPipeline:
+    """Stands in for GuardDutyLogs: jobs whose key is in `failing` raise, the rest succeed"""
+
+    def __init__(self):
+        self.failing = set()
+        self.ran = []
+        self.recorded = []
+
+    def run_remediation_job(self, job):
+        self.ran.append(job['key'])
+        if job['key'] in self.failing:
+            raise RuntimeError(f"cannot remediate {job['key']}")
+        return {'remediated': True, 'remediationAction': f"remediated {job['key']}"}
+
+    def record_remediation_failure(self, job, error, attempts=None):
+        self.recorded.append((job['key'], str(error), attempts))
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    pipeline = StubPipeline()
+    module = types.ModuleType('GuardDutyLogs')
+    module.run_remediation_job = pipeline.run_remediation_job
+    module.record_remediation_failure = pipeline.record_remediation_failure
+    monkeypatch.setitem(sys.modules, 'GuardDutyLogs', module)
+    monkeypatch.delitem(sys.modules, 'RemediationWorker', raising=False)
+    import RemediationWorker
+    monkeypatch.setattr(RemediationWorker, 'MAX_RECEIVE_COUNT', 3)
+    return RemediationWorker, pipeline
+
+
+def record(message_id, key, severity='medium', receives=1, body=None):
+    return {
+        'messageId': message_id,
+        'body': body if body is not None else json.dumps({'key': key, 'findingId': key, 'severity': severity}),
+        'attributes': {'ApproximateReceiveCount': str(receives)}
+    }
+
+
+def test_only_failed_jobs_are_reported_for_redelivery(worker):
+    RemediationWorker, pipeline = worker
+    pipeline.failing = {'k2'}
+
+    response = RemediationWorker.lambda_handler({'Records': [record('m1', 'k1'), record('m2', 'k2'), record('m3', 'k3')]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm2'}]}
+    assert sorted(pipeline.ran) == ['k1', 'k2', 'k3']
+    assert pipeline.recorded == []
+
+
+def test_last_attempt_marks_the_finding_failed_before_dead_lettering(worker):
+    RemediationWorker, pipeline = worker
+    pipeline.failing = {'k1', 'k2'}
+
+    response = RemediationWorker.lambda_handler({'Records': [record('m1', 'k1', receives=2), record('m2', 'k2', receives=3)]}, None)
+
+    # Both go back to SQS; only the one on its last receive is recorded as failed
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}, {'itemIdentifier': 'm2'}]}
+    assert pipeline.recorded == [('k2', 'cannot remediate k2', 3)]
+
+
+def test_unreadable_message_is_reported_without_recording(worker):
+    RemediationWorker, pipeline = worker
+
+    response = RemediationWorker.lambda_handler({'Records': [record('m1', None, body='not json', receives=3)]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+    assert pipeline.ran == []
+    assert pipeline.recorded == []
+
+
+def test_failure_to_record_still_reports_the_job(worker, monkeypatch):
+    RemediationWorker, pipeline = worker
+    pipeline.failing = {'k1'}
+
+    def broken(job, error, attempts=None):
+        raise RuntimeError('S3 unavailable')
+    monkeypatch.setattr(RemediationWorker, 'record_remediation_failure', broken)
+
+    response = RemediationWorker.lambda_handler({'Records': [record('m1', 'k1', receives=3)]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+
+def test_batch_runs_most_severe_jobs_first(worker):
+    RemediationWorker, pipeline = worker
+    records = [
+        record('m1', 'low', 'low'),
+        record('m2', 'old'),
+        record('m3', 'critical', 'critical'),
+        record('m4', 'broken', body='{'),
+        record('m5', 'high', 'high')
+    ]
+    records[1]['body'] = json.dumps({'key': 'old'})
+
+    response = RemediationWorker.lambda_handler({'Records': records}, None)
+
+    # Jobs queued before severity was recorded count as medium
+    assert pipeline.ran == ['critical', 'high', 'old', 'low']
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm4'}]}
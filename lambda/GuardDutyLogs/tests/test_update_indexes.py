@@ -0,0 +1,92 @@
+import time
+import threading
+
+import pytest
+
+import s3_json
+import GuardDutyLogs
+
+
+class Recorder:
+    """Stands in for the change log and the queue: each write sleeps, and is recorded in order"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.writes = []
+        self.failing = set()
+
+    def write(self, kind, key):
+        time.sleep(self.delay)
+        if key in self.failing:
+            raise RuntimeError(f"cannot write {key}")
+        with self.lock:
+            self.writes.append((kind, key))
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(s3_json, 'FANOUT_MODE', 'parallel')
+    monkeypatch.setattr(GuardDutyLogs, 'apply_summaries',
+                        lambda s3, bucket, upserts, moved: ({key: {'key': key, 'lastModified': 'now'} for key, _ in upserts}, set()))
+    monkeypatch.setattr(GuardDutyLogs, 'update_postings', lambda s3, bucket, additions, removals: set())
+
+    def record_change(s3, bucket, change_type, key, summary=None, deleted=False):
+        recorder.write('tombstone' if deleted else change_type, key)
+    monkeypatch.setattr(GuardDutyLogs, 'record_change', record_change)
+    monkeypatch.setattr(GuardDutyLogs, 'enqueue_remediation',
+                        lambda finding, key, rule, current_account_id: recorder.write('queued', key))
+    return recorder
+
+
+def stored_finding(finding_id, key, previous_key=None, queued=False):
+    outcome = {'findingId': finding_id, 'status': 'updated' if previous_key else 'created', 'key': key}
+    return outcome, {
+        'key': key,
+        'finding': {'Id': finding_id},
+        'previousKey': previous_key,
+        'previousFinding': {'Id': finding_id} if previous_key else None,
+        'queuedRule': {'action': 'block_malicious_ip'} if queued else None
+    }
+
+
+def test_change_log_and_queue_writes_run_concurrently(recorder):
+    stored = [stored_finding(f"f{n}", f"k{n}", queued=True) for n in range(6)]
+
+    started = time.monotonic()
+    GuardDutyLogs.update_indexes(stored, '111111111111')
+    elapsed = time.monotonic() - started
+
+    # One after another the twelve writes take 600 ms; concurrently about one finding's two
+    assert elapsed < 3 * 2 * recorder.delay
+    assert sorted(recorder.writes) == sorted([('created', f"k{n}") for n in range(6)] +
+                                             [('queued', f"k{n}") for n in range(6)])
+    assert all(result['indexed'] for result, _ in stored)
+
+
+def test_versions_of_one_finding_keep_their_order(recorder):
+    stored = [
+        stored_finding('f1', 'low/k1', queued=True),
+        stored_finding('f2', 'k2'),
+        stored_finding('f1', 'high/k1', previous_key='low/k1')
+    ]
+
+    GuardDutyLogs.update_indexes(stored, '111111111111')
+
+    f1 = [write for write in recorder.writes if write[1].endswith('k1')]
+    assert f1 == [('created', 'low/k1'), ('queued', 'low/k1'), ('tombstone', 'low/k1'), ('updated', 'high/k1')]
+
+
+def test_failures_are_reported_per_finding(recorder, monkeypatch):
+    recorder.failing = {'k1'}
+    monkeypatch.setattr(GuardDutyLogs, 'enqueue_remediation', lambda finding, key, rule, current_account_id:
+                        recorder.write('queued', 'k1' if key == 'k2' else key))
+    stored = [stored_finding('f1', 'k1'), stored_finding('f2', 'k2', queued=True), stored_finding('f3', 'k3')]
+
+    GuardDutyLogs.update_indexes(stored, '111111111111')
+
+    results = {result['key']: result for result, _ in stored}
+    assert results['k1']['indexed'] is False
+    assert results['k2']['indexed'] is True and results['k2']['queued'] is False
+    assert results['k3']['indexed'] is True and 'queued' not in results['k3']
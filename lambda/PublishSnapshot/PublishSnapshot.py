@@ -0,0 +1,28 @@
+import os
+import json
+import logging
+
+from finding_snapshot import publish_snapshot
+from aws_clients import get_client
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3_client = get_client('s3')
+BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'soarcery')
+
+
+def lambda_handler(event, context):
+    """Scheduled rebuild of the SQLite snapshot of finding summaries read by DashboardFindings"""
+    try:
+        result = publish_snapshot(s3_client, BUCKET_NAME)
+        return {
+            'statusCode': 200,
+            'body': json.dumps(result)
+        }
+    except Exception as e:
+        logger.error(f"Error publishing findings snapshot: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps(f'Error publishing findings snapshot: {str(e)}')
+        }